@@ -2,13 +2,16 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path="dags/.env")
 
 import os
+import sys
 import json
 import ollama
 import random
 from uuid import uuid4
-from qdrant_client import QdrantClient, models
+from qdrant_client import models
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.qdrant_factory import get_qdrant_client
 
-qdrant_client = QdrantClient(url=os.getenv("QDRANT_URL"))
+qdrant_client = get_qdrant_client()
 
 
 def create_expert_collection(collection_name: str, vector_size: int):
@@ -35,6 +35,8 @@ with DAG("RAG_Indexing_DAG", default_args=default_args, schedule="@once", catchu
     config_data = json.load(open("dags/config.json", "r"))
     ollama_url = os.getenv("OLLAMA_HOST", "10.20.1.95:11433")
     qdrant_url = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
+    qdrant_prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false")
+    qdrant_grpc_port = os.getenv("QDRANT_GRPC_PORT", "6334")
     data_processing_image = "shaohung/airflow-data-processing:v1.0"
     data_embedding_image = "shaohung/airflow-data-embedding:v1.1"
     
@@ -110,7 +112,9 @@ with DAG("RAG_Indexing_DAG", default_args=default_args, schedule="@once", catchu
         volume_mounts=[config_volume_mount],
         env_vars=[
             V1EnvVar(name="OLLAMA_HOST", value=ollama_url),
-            V1EnvVar(name="QDRANT_URL", value=qdrant_url)
+            V1EnvVar(name="QDRANT_URL", value=qdrant_url),
+            V1EnvVar(name="QDRANT_PREFER_GRPC", value=qdrant_prefer_grpc),
+            V1EnvVar(name="QDRANT_GRPC_PORT", value=qdrant_grpc_port)
         ],
         config_file="~/.kube/config",
         in_cluster=False,
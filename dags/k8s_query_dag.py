@@ -87,6 +87,8 @@ with DAG("RAG_Query_DAG2", default_args=default_args, schedule=timedelta(hours=1
     
     ollama_url = os.getenv("OLLAMA_HOST", "10.20.1.95:11433")
     qdrant_url = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
+    qdrant_prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false")
+    qdrant_grpc_port = os.getenv("QDRANT_GRPC_PORT", "6334")
     
     llm_model = config_data.get("llm_model", "gemma2:9b")
     embed_model = config_data.get("embed_model", "imac/zpoint_large_embedding_zh")
@@ -113,7 +115,9 @@ with DAG("RAG_Query_DAG2", default_args=default_args, schedule=timedelta(hours=1
             ],
             env_vars=[
                 V1EnvVar(name="OLLAMA_HOST", value=ollama_url), 
-                V1EnvVar(name="QDRANT_URL", value=qdrant_url)
+                V1EnvVar(name="QDRANT_URL", value=qdrant_url),
+                V1EnvVar(name="QDRANT_PREFER_GRPC", value=qdrant_prefer_grpc),
+                V1EnvVar(name="QDRANT_GRPC_PORT", value=qdrant_grpc_port)
             ],
             config_file="~/.kube/config",
             in_cluster=False,
@@ -172,7 +176,9 @@ with DAG("RAG_Query_DAG2", default_args=default_args, schedule=timedelta(hours=1
             ],
             env_vars=[
                 V1EnvVar(name="OLLAMA_HOST", value=ollama_url), 
-                V1EnvVar(name="QDRANT_URL", value=qdrant_url)
+                V1EnvVar(name="QDRANT_URL", value=qdrant_url),
+                V1EnvVar(name="QDRANT_PREFER_GRPC", value=qdrant_prefer_grpc),
+                V1EnvVar(name="QDRANT_GRPC_PORT", value=qdrant_grpc_port)
             ],
             config_file="~/.kube/config",
             in_cluster=False,
@@ -221,7 +227,9 @@ with DAG("RAG_Query_DAG2", default_args=default_args, schedule=timedelta(hours=1
             ],
             env_vars=[
                 V1EnvVar(name="OLLAMA_HOST", value=ollama_url), 
-                V1EnvVar(name="QDRANT_URL", value=qdrant_url)
+                V1EnvVar(name="QDRANT_URL", value=qdrant_url),
+                V1EnvVar(name="QDRANT_PREFER_GRPC", value=qdrant_prefer_grpc),
+                V1EnvVar(name="QDRANT_GRPC_PORT", value=qdrant_grpc_port)
             ],
             config_file="~/.kube/config",
             in_cluster=False,
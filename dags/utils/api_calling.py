@@ -15,19 +15,32 @@ class APIConfig:
         api_port: int = 8000, 
         types: str = "similarity", 
         topk: int = 10,
+        structured: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        oversampling: Optional[float] = None,
+        latency_budget_ms: Optional[float] = None,
+        document_types: Optional[list] = None,
+        mmr_lambda: Optional[float] = None,
     ):
         def _call_api(**context):
             ti = context['ti']
             user_question = ti.xcom_pull(task_ids='generate_query_task', key='return_value')
-            keyword_list = str(ti.xcom_pull(task_ids='keyword_extraction_task', key='return_value')) if types=="keyword" else "[]"
+            keyword_list = str(ti.xcom_pull(task_ids='keyword_extraction_task', key='return_value')) if types in ("keyword", "fused", "bm25") else "[]"
             api_url = f"http://{api_host}:{api_port}/retrieve"
             payload = {
                 "types": types,
-                "document_types": self.document_types,
+                "document_types": document_types or self.document_types,
                 "topk": topk,
                 "embed_model": self.embed_model,
                 "user_question": user_question,
-                "keyword_list": keyword_list
+                "keyword_list": keyword_list,
+                "structured": structured,
+                "hnsw_ef": hnsw_ef,
+                "exact": exact,
+                "oversampling": oversampling,
+                "latency_budget_ms": latency_budget_ms,
+                "mmr_lambda": mmr_lambda
             }
             
             try:
@@ -42,24 +55,71 @@ class APIConfig:
                 raise
             
         return _call_api
-    
+
+    def call_multi_retrieval_api(
+        self,
+        api_host: str,
+        api_port: int = 8000,
+        searches: Optional[list] = None,
+    ):
+        def _call_api(**context):
+            ti = context['ti']
+            user_question = ti.xcom_pull(task_ids='generate_query_task', key='return_value')
+            search_specs = []
+            for search in searches or [{"types": "similarity", "topk": 10}]:
+                search_spec = dict(search)
+                if search_spec.get("types") in ("keyword", "fused", "bm25"):
+                    search_spec["keyword_list"] = str(ti.xcom_pull(task_ids='keyword_extraction_task', key='return_value'))
+                search_specs.append(search_spec)
+            api_url = f"http://{api_host}:{api_port}/retrieve/multi"
+            payload = {
+                "document_types": self.document_types,
+                "embed_model": self.embed_model,
+                "user_question": user_question,
+                "searches": search_specs
+            }
+
+            try:
+                socket.gethostbyname(api_host)
+                logging.info(f"Sending request to {api_url} with payload: {payload}")
+                response = requests.post(api_url, json=payload, timeout=300)
+                response.raise_for_status()
+                result = response.json()
+                # Keep the request order so searches of the same type do not overwrite each other
+                return [{"types": item["types"], "result": item["result"]} for item in result["result"]]
+            except Exception as e:
+                logging.error(f"Error calling multi retrieval API: {e}")
+                raise
+
+        return _call_api
+
     def call_rerank_api(
         self, 
         api_host: str, 
         api_port: int = 8001, 
         topk: int = 5,
+        cascade: bool = False,
+        cascade_topn: Optional[int] = None,
+        model: Optional[str] = None,
+        cutoff: Optional[str] = None,
+        min_k: int = 1,
     ):
         def _call_api(**context):
             ti = context['ti']
             user_question = ti.xcom_pull(task_ids='generate_query_task', key='return_value')
-            similarity_results = str(ti.xcom_pull(task_ids='similarity_retrieval_task', key='return_value')) if ti.xcom_pull(task_ids='similarity_retrieval_task', key='return_value') else "[]"
-            keyword_results = str(ti.xcom_pull(task_ids='keyword_retrieval_task', key='return_value')) if ti.xcom_pull(task_ids='keyword_retrieval_task', key='return_value') else "[]"
+            similarity_results = ti.xcom_pull(task_ids='similarity_retrieval_task', key='return_value') or []
+            keyword_results = ti.xcom_pull(task_ids='keyword_retrieval_task', key='return_value') or []
             api_url = f"http://{api_host}:{api_port}/rerank"
             payload = {
                 "topk": topk,
                 "user_question": user_question,
                 "similarity_results": similarity_results,
                 "keyword_results": keyword_results,
+                "cascade": cascade,
+                "cascade_topn": cascade_topn,
+                "model": model,
+                "cutoff": cutoff,
+                "min_k": min_k,
             }
             
             try:
@@ -69,12 +129,39 @@ class APIConfig:
                 response.raise_for_status()
                 result = response.json()
                 return result["result"]
+            except requests.HTTPError as e:
+                # A rejected request (4xx, e.g. a model outside RERANK_ALLOWED_MODELS) is a configuration error
+                if e.response is not None and e.response.status_code < 500:
+                    logging.error(f"Error calling rerank API: {e}")
+                    raise
+                logging.warning(f"Rerank API failed, passing the retrieval results on unranked: {e}")
+                return self.unranked_results([similarity_results, keyword_results], topk)
+            except requests.RequestException as e:
+                logging.warning(f"Rerank API unreachable, passing the retrieval results on unranked: {e}")
+                return self.unranked_results([similarity_results, keyword_results], topk)
             except Exception as e:
                 logging.error(f"Error calling rerank API: {e}")
                 raise
             
         return _call_api
     
+    @staticmethod
+    def unranked_results(result_lists: list, topk: int) -> list:
+        """
+        Deduplicate retrieval results in retrieval order, as the fallback when reranking fails.
+        
+        Args:
+            result_lists (list): The similarity and keyword results, each a list of text or structured hits.
+            topk (int): Number of results to keep.
+        
+        Returns:
+            results (list): The first topk unique results.
+        """
+        unique = {}
+        for result in (result for results in result_lists if isinstance(results, list) for result in results):
+            unique.setdefault(result["id"] if isinstance(result, dict) else result, result)
+        return list(unique.values())[:topk]
+    
     def call_llm_api(
         self, 
         api_host: str, 
@@ -88,7 +175,7 @@ class APIConfig:
         def _call_api(**context):
             ti = context['ti']
             user_question = ti.xcom_pull(task_ids='generate_query_task', key='return_value')
-            search_results = str(ti.xcom_pull(task_ids=search_results_types, key='return_value')) if search_results_types else None
+            search_results = ti.xcom_pull(task_ids=search_results_types, key='return_value') if search_results_types else None
             api_url = f"http://{api_host}:{api_port}/llm"
             payload = {
                 "user_question": user_question,
@@ -126,9 +213,9 @@ class APIConfig:
             ti = context['ti']
             user_question = ti.xcom_pull(task_ids='generate_query_task', key='return_value')
             llm_answer = ti.xcom_pull(task_ids='llm_task', key='return_value')
-            similarity_results = str(ti.xcom_pull(task_ids='similarity_retrieval_task', key='return_value')) if use_similarity else None
-            keyword_results = str(ti.xcom_pull(task_ids='keyword_retrieval_task', key='return_value')) if use_keyword else None
-            rerank_results = str(ti.xcom_pull(task_ids='reranking_task', key='return_value')) if use_rerank else None
+            similarity_results = ti.xcom_pull(task_ids='similarity_retrieval_task', key='return_value') if use_similarity else None
+            keyword_results = ti.xcom_pull(task_ids='keyword_retrieval_task', key='return_value') if use_keyword else None
+            rerank_results = ti.xcom_pull(task_ids='reranking_task', key='return_value') if use_rerank else None
             api_url = f"http://{api_host}:{api_port}/ragas"
             payload = {
                 "user_question": user_question,
@@ -0,0 +1,446 @@
+import os
+import re
+import json
+import math
+import fcntl
+import logging
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff]|[^\W_]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "were", "what",
+    "when", "where", "which", "who", "whom", "why", "with",
+}
+
+
+def tokenize(text: str) -> list:
+    """
+    Split text into lowercase BM25 terms.
+
+    Latin text is split on word boundaries and CJK text into single characters.
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        tokens (list): List of terms with stopwords removed.
+    """
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+class BM25Segment:
+    def __init__(self, segment_path: str):
+        """
+        Load an immutable index segment with memory-mapped postings.
+
+        Postings store the gaps between document numbers in the smallest unsigned
+        dtype that fits, so decoding a term is a single cumulative sum over a slice.
+
+        Args:
+            segment_path (str): Path of the segment directory.
+        """
+        self.segment_path = segment_path
+        with open(os.path.join(segment_path, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        with open(os.path.join(segment_path, "documents.json"), "r", encoding="utf-8") as f:
+            self.documents = json.load(f)
+        self.doc_gaps = np.load(os.path.join(segment_path, "doc_gaps.npy"), mmap_mode="r")
+        self.term_freqs = np.load(os.path.join(segment_path, "term_freqs.npy"), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(segment_path, "doc_lengths.npy"), mmap_mode="r")
+        self.length_norm = None
+        self.deleted = np.zeros(0, dtype=np.int64)
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.documents)
+
+    def document_frequency(self, term: str) -> int:
+        """
+        Get the number of documents in this segment containing the term.
+
+        Args:
+            term (str): The term to look up.
+
+        Returns:
+            df (int): Document frequency of the term.
+        """
+        return self.vocab[term][1] if term in self.vocab else 0
+
+    def postings(self, term: str) -> tuple:
+        """
+        Decode the postings of a term.
+
+        Args:
+            term (str): The term to look up.
+
+        Returns:
+            postings (tuple): Document numbers and term frequencies as NumPy arrays.
+        """
+        offset, count = self.vocab[term]
+        doc_numbers = np.cumsum(self.doc_gaps[offset:offset + count], dtype=np.int64)
+        return doc_numbers, self.term_freqs[offset:offset + count]
+
+    @staticmethod
+    def write(segment_path: str, documents: list) -> None:
+        """
+        Build a segment from documents and write it to disk.
+
+        Args:
+            segment_path (str): Path of the segment directory to create.
+            documents (list): List of dicts with "id", "document" and optional "file_name".
+        """
+        term_postings = {}
+        doc_lengths = np.zeros(len(documents), dtype=np.uint32)
+        for doc_number, document in enumerate(documents):
+            term_counts = Counter(tokenize(document["document"]))
+            doc_lengths[doc_number] = sum(term_counts.values())
+            for term, term_freq in term_counts.items():
+                term_postings.setdefault(term, []).append((doc_number, term_freq))
+
+        vocab = {}
+        doc_gaps = []
+        term_freqs = []
+        for term in sorted(term_postings):
+            postings = term_postings[term]
+            vocab[term] = [len(doc_gaps), len(postings)]
+            previous = 0
+            for doc_number, term_freq in postings:
+                doc_gaps.append(doc_number - previous)
+                term_freqs.append(term_freq)
+                previous = doc_number
+
+        doc_gaps = np.asarray(doc_gaps, dtype=np.uint32)
+        term_freqs = np.asarray(term_freqs, dtype=np.uint32)
+        gap_dtype = np.min_scalar_type(int(doc_gaps.max())) if doc_gaps.size else np.uint8
+        freq_dtype = np.min_scalar_type(int(term_freqs.max())) if term_freqs.size else np.uint8
+
+        os.makedirs(segment_path, exist_ok=True)
+        np.save(os.path.join(segment_path, "doc_gaps.npy"), doc_gaps.astype(gap_dtype))
+        np.save(os.path.join(segment_path, "term_freqs.npy"), term_freqs.astype(freq_dtype))
+        np.save(os.path.join(segment_path, "doc_lengths.npy"), doc_lengths)
+        with open(os.path.join(segment_path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        with open(os.path.join(segment_path, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False)
+
+
+class BM25Index:
+    def __init__(self, index_dir: str, collection_name: str, k1: float = 1.2, b: float = 0.75, max_segments: int = 8):
+        """
+        Initialize a segmented BM25 inverted index for one collection.
+
+        Every call to add_documents writes a new immutable segment and then swaps the
+        manifest, so the indexing pipeline can append files while the retrieval API
+        keeps serving the previous manifest. Documents whose point ID is added again are
+        recorded as deleted in the manifest and dropped at the next merge, so re-indexing
+        a file replaces its documents instead of counting them twice.
+
+        Args:
+            index_dir (str): Root directory of the BM25 indexes.
+            collection_name (str): Name of the collection the index mirrors.
+            k1 (float): BM25 term frequency saturation. Defaults to 1.2.
+            b (float): BM25 length normalization. Defaults to 0.75.
+            max_segments (int): Segments are merged once this many exist. Defaults to 8.
+        """
+        self.index_path = os.path.join(index_dir, collection_name)
+        self.manifest_path = os.path.join(self.index_path, "manifest.json")
+        self.lock_path = os.path.join(self.index_path, "write.lock")
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.manifest_mtime = None
+        self.segments = []
+        self.num_docs = 0
+        self.avg_doc_length = 0.0
+
+    def exists(self) -> bool:
+        """
+        Check if the index has been built.
+
+        Returns:
+            bool: True if a manifest exists, False otherwise.
+        """
+        return os.path.exists(self.manifest_path)
+
+    def read_manifest(self) -> dict:
+        """
+        Read the index manifest.
+
+        Returns:
+            manifest (dict): Segment names, deleted document numbers per segment and corpus statistics.
+        """
+        if not self.exists():
+            return {"segments": [], "next_segment": 0, "num_docs": 0, "total_length": 0}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest: dict) -> None:
+        """
+        Atomically replace the index manifest.
+
+        Args:
+            manifest (dict): Segment names and corpus statistics.
+        """
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def load(self) -> bool:
+        """
+        Load or reload the segments when the manifest has changed on disk.
+
+        Returns:
+            bool: True if the index is available, False otherwise.
+        """
+        if not self.exists():
+            return False
+        manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+        if manifest_mtime != self.manifest_mtime:
+            manifest = self.read_manifest()
+            self.segments = [BM25Segment(os.path.join(self.index_path, name)) for name in manifest["segments"]]
+            for name, segment in zip(manifest["segments"], self.segments):
+                segment.deleted = np.asarray(manifest.get("deleted", {}).get(name, []), dtype=np.int64)
+            self.num_docs = manifest["num_docs"]
+            self.avg_doc_length = manifest["total_length"] / manifest["num_docs"] if manifest["num_docs"] else 0.0
+            for segment in self.segments:
+                segment.length_norm = self.k1 * (1 - self.b + self.b * np.asarray(segment.doc_lengths, dtype=np.float32) / max(self.avg_doc_length, 1.0))
+            self.manifest_mtime = manifest_mtime
+            logging.info(f"Loaded BM25 index {self.index_path} with {len(self.segments)} segments and {self.num_docs} documents")
+        return True
+
+    @contextmanager
+    def writer_lock(self):
+        """
+        Hold an exclusive lock on the index, so concurrent embedding jobs do not both
+        build on the same manifest and lose one of the updates.
+        """
+        os.makedirs(self.index_path, exist_ok=True)
+        with open(self.lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def delete_ids(self, manifest: dict, point_ids: set) -> int:
+        """
+        Mark the live documents with the given point IDs as deleted. Caller holds the writer lock.
+
+        Args:
+            manifest (dict): Manifest to update in place.
+            point_ids (set): Point IDs, as strings.
+
+        Returns:
+            num_deleted (int): Number of documents marked as deleted.
+        """
+        deleted = manifest.setdefault("deleted", {})
+        num_deleted = 0
+        for name in manifest["segments"]:
+            segment_path = os.path.join(self.index_path, name)
+            with open(os.path.join(segment_path, "documents.json"), "r", encoding="utf-8") as f:
+                segment_documents = json.load(f)
+            segment_deleted = set(deleted.get(name, []))
+            doc_numbers = [
+                doc_number for doc_number, document in enumerate(segment_documents)
+                if str(document["id"]) in point_ids and doc_number not in segment_deleted
+            ]
+            if not doc_numbers:
+                continue
+            doc_lengths = np.load(os.path.join(segment_path, "doc_lengths.npy"), mmap_mode="r")
+            manifest["num_docs"] -= len(doc_numbers)
+            manifest["total_length"] -= int(np.sum(doc_lengths[doc_numbers], dtype=np.int64))
+            deleted[name] = sorted(segment_deleted.union(doc_numbers))
+            num_deleted += len(doc_numbers)
+        return num_deleted
+
+    def add_documents(self, documents: list) -> int:
+        """
+        Add documents to the index as a new segment, replacing earlier documents with the same point ID.
+
+        Args:
+            documents (list): List of dicts with "id", "document" and optional "file_name".
+
+        Returns:
+            num_docs (int): Number of documents in the index after the update.
+        """
+        try:
+            if not documents:
+                return self.read_manifest()["num_docs"]
+
+            # the last copy of a point ID within the batch wins, as in a Qdrant upsert
+            documents = list({str(document["id"]): document for document in documents}.values())
+            with self.writer_lock():
+                manifest = self.read_manifest()
+                num_replaced = self.delete_ids(manifest, {str(document["id"]) for document in documents})
+                segment_name = f"segment_{manifest['next_segment']:05d}"
+                BM25Segment.write(os.path.join(self.index_path, segment_name), documents)
+
+                manifest["segments"].append(segment_name)
+                manifest["next_segment"] += 1
+                manifest["num_docs"] += len(documents)
+                manifest["total_length"] += sum(len(tokenize(document["document"])) for document in documents)
+                self.write_manifest(manifest)
+                logging.info(f"Added {len(documents)} documents to BM25 index {self.index_path}, replacing {num_replaced}")
+
+                if len(manifest["segments"]) > self.max_segments:
+                    self.merge_segments()
+                return manifest["num_docs"]
+        except Exception as e:
+            logging.error(f"Error adding documents to BM25 index: {e}")
+            raise e
+
+    def merge_segments(self) -> None:
+        """
+        Merge all segments into one, dropping deleted documents, so queries touch fewer postings arrays.
+
+        The merged segments stay on disk, listed as retired in the manifest, until the
+        next merge, so a reader that read the previous manifest can still open them.
+        Caller holds the writer lock.
+        """
+        try:
+            manifest = self.read_manifest()
+            deleted = manifest.get("deleted", {})
+            documents = []
+            for name in manifest["segments"]:
+                with open(os.path.join(self.index_path, name, "documents.json"), "r", encoding="utf-8") as f:
+                    segment_deleted = set(deleted.get(name, []))
+                    documents.extend(document for doc_number, document in enumerate(json.load(f)) if doc_number not in segment_deleted)
+
+            segment_name = f"segment_{manifest['next_segment']:05d}"
+            BM25Segment.write(os.path.join(self.index_path, segment_name), documents)
+            old_segments = manifest["segments"]
+            retired_segments = manifest.get("retired_segments", [])
+            manifest["segments"] = [segment_name]
+            manifest["retired_segments"] = old_segments
+            manifest["deleted"] = {}
+            manifest["next_segment"] += 1
+            self.write_manifest(manifest)
+
+            # Segments retired by the previous merge have not been listed by a manifest since then
+            for name in retired_segments:
+                segment_path = os.path.join(self.index_path, name)
+                if not os.path.isdir(segment_path):
+                    continue
+                for file_name in os.listdir(segment_path):
+                    os.remove(os.path.join(segment_path, file_name))
+                os.rmdir(segment_path)
+            logging.info(f"Merged {len(old_segments)} BM25 segments into {segment_name}")
+        except Exception as e:
+            logging.error(f"Error merging BM25 segments: {e}")
+            raise e
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Score every document against the query with BM25.
+
+        Args:
+            query (str): Query text or space-separated keywords.
+            limit (int): Number of results to return. Defaults to 10.
+
+        Returns:
+            result (list): List of (score, document) tuples sorted by descending score.
+        """
+        if limit <= 0 or not self.load() or not self.num_docs:
+            return []
+
+        terms = set(tokenize(query))
+        idf = {}
+        term_postings = {}
+        for term in terms:
+            # deleted documents are skipped here, so they count neither for df nor for the scores
+            postings = []
+            for segment in self.segments:
+                if term not in segment.vocab:
+                    postings.append(None)
+                    continue
+                doc_numbers, term_freqs = segment.postings(term)
+                if segment.deleted.size:
+                    live = ~np.isin(doc_numbers, segment.deleted)
+                    doc_numbers, term_freqs = doc_numbers[live], term_freqs[live]
+                postings.append((doc_numbers, term_freqs))
+            df = sum(doc_numbers.size for doc_numbers, _ in filter(None, postings))
+            if df:
+                idf[term] = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+                term_postings[term] = postings
+        if not idf:
+            return []
+
+        segment_scores = []
+        for segment_index, segment in enumerate(self.segments):
+            scores = np.zeros(segment.num_docs, dtype=np.float32)
+            for term, term_idf in idf.items():
+                if term_postings[term][segment_index] is None:
+                    continue
+                doc_numbers, term_freqs = term_postings[term][segment_index]
+                term_freqs = np.asarray(term_freqs, dtype=np.float32)
+                scores[doc_numbers] += term_idf * term_freqs * (self.k1 + 1) / (term_freqs + segment.length_norm[doc_numbers])
+            segment_scores.append(scores)
+
+        scores = np.concatenate(segment_scores)
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        offsets = np.cumsum([0] + [segment.num_docs for segment in self.segments])
+        result = []
+        for candidate in candidates:
+            segment_index = int(np.searchsorted(offsets, candidate, side="right") - 1)
+            document = self.segments[segment_index].documents[int(candidate - offsets[segment_index])]
+            result.append((float(scores[candidate]), document))
+        return result
+
+
+def build_from_qdrant(qdrant_client: object, collection_name: str, index_dir: str, batch_size: int = 1000) -> int:
+    """
+    Build a BM25 index from the payloads of an existing Qdrant collection.
+
+    Args:
+        qdrant_client (object): The Qdrant client.
+        collection_name (str): Name of the Qdrant collection.
+        index_dir (str): Root directory of the BM25 indexes.
+        batch_size (int): Number of points fetched per scroll request. Defaults to 1000.
+
+    Returns:
+        num_docs (int): Number of documents in the index.
+    """
+    bm25_index = BM25Index(index_dir=index_dir, collection_name=collection_name)
+    if bm25_index.exists():
+        logging.warning(f"BM25 index for {collection_name} already exists, skipping build.")
+        return bm25_index.read_manifest()["num_docs"]
+    
+    documents = []
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for point in points:
+            if "document" in point.payload:
+                documents.append({"id": str(point.id), **point.payload})
+        if offset is None:
+            break
+    return bm25_index.add_documents(documents)
+
+
+if __name__ == "__main__":
+    from qdrant_factory import get_qdrant_client
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Build a BM25 index from a Qdrant collection')
+    parser.add_argument('--collection-name', type=str, required=True, help='Qdrant collection to index')
+    parser.add_argument('--index-dir', type=str, default=os.getenv("BM25_INDEX_DIR", "dags/data/bm25_index"),
+                      help='Root directory of the BM25 indexes')
+    args = parser.parse_args()
+
+    num_docs = build_from_qdrant(get_qdrant_client(), args.collection_name, args.index_dir)
+    logging.info(f"BM25 index for {args.collection_name} contains {num_docs} documents")
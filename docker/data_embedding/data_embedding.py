@@ -1,32 +1,46 @@
 from dotenv import load_dotenv
 load_dotenv(dotenv_path="dags/.env")
 
-import os
 import json
 import ollama
 import logging
-from uuid import uuid4
-from qdrant_client import QdrantClient, models
+from uuid import NAMESPACE_URL, uuid5
+from typing import Optional
+from qdrant_client import models
+from bm25_index import BM25Index
+from token_store import TokenStore, tokenizer_version
+from qdrant_factory import get_qdrant_client
 
 
 class Data_Embedding:
     def __init__(
         self, 
         embed_model: str = "imac/zpoint_large_embedding_zh",
-        data_context_path: str = "dags/data/data_context.json"):
+        data_context_path: str = "dags/data/data_context.json",
+        bm25_index_dir: Optional[str] = None,
+        token_store_dir: Optional[str] = None,
+        reranker_model: str = "BAAI/bge-reranker-v2-m3"):
         """
         Initialize the Data_Embedding class.
         
         Args:
             embed_model: Model name for ollama
             data_context_path: Path to the data context file
+            bm25_index_dir: Root directory of the BM25 indexes, None to skip BM25 indexing
+            token_store_dir: Root directory of the reranker token stores, None to skip pre-tokenization
+            reranker_model: Reranker whose tokenizer is used for the token store
         """
         self.data_context_path = data_context_path
+        self.bm25_index_dir = bm25_index_dir
+        self.token_store_dir = token_store_dir
+        self.reranker_model = reranker_model
+        self.tokenizer = None
+        self.pending_tokens = {}
         try:
             self.embed_model = embed_model
             self.data_context_path = data_context_path
             self.data_context = json.load(open(self.data_context_path, "r"))
-            self.qdrant_client = QdrantClient(url=os.getenv("QDRANT_URL"))
+            self.qdrant_client = get_qdrant_client()
         except Exception as e:
             logging.error(f"Error loading config or data context: {e}")
             self.data_context = {}
@@ -51,8 +65,10 @@ class Data_Embedding:
                 keep_alive="0s"
             )["embedding"]
             
+            # The ID is derived from the file and the text, so embedding a file again replaces
+            # its points in Qdrant, the BM25 index and the token store instead of adding copies
             ollama_vector = models.PointStruct(
-                id=str(uuid4()),
+                id=str(uuid5(NAMESPACE_URL, f"{file_name}\n{prompt}")),
                 vector=vector,
                 payload={"document": prompt, "file_name": file_name}
             )
@@ -131,6 +147,88 @@ class Data_Embedding:
             logging.error(f"Error inserting documents: {e}")
             return False
     
+    def update_bm25_index(self, ollama_vector: list, collection_name: str) -> bool:
+        """
+        Append inserted documents to the local BM25 index of a collection.
+        
+        Args:
+            ollama_vector: List of PointStruct objects that were inserted
+            collection_name: Name of the collection the index mirrors
+        
+        Returns:
+            bool: True if the index is updated successfully, False otherwise
+        """
+        if not self.bm25_index_dir:
+            return False
+        try:
+            bm25_index = BM25Index(index_dir=self.bm25_index_dir, collection_name=collection_name)
+            num_docs = bm25_index.add_documents([
+                {"id": str(point.id), **point.payload}
+                for point in ollama_vector
+            ])
+            logging.info(f"BM25 index for {collection_name} now contains {num_docs} documents.")
+            return True
+        except Exception as e:
+            logging.error(f"Error updating BM25 index: {e}")
+            return False
+    
+    def get_tokenizer(self) -> object:
+        """
+        Get the reranker tokenizer, loading it on first use.
+        
+        Returns:
+            tokenizer: The tokenizer of the reranker model
+        """
+        if self.tokenizer is None:
+            from transformers import AutoTokenizer
+            
+            self.tokenizer = AutoTokenizer.from_pretrained(self.reranker_model, cache_dir="dags/.cache")
+        return self.tokenizer
+    
+    def update_token_store(self, ollama_vector: list) -> bool:
+        """
+        Tokenize inserted documents with the reranker tokenizer, so the reranker only tokenizes the question.
+        
+        The token IDs are kept until write_token_store, which rewrites the store once for all files.
+        
+        Args:
+            ollama_vector: List of PointStruct objects that were inserted
+        
+        Returns:
+            bool: True if the documents are tokenized successfully, False otherwise
+        """
+        if not self.token_store_dir:
+            return False
+        try:
+            token_ids = self.get_tokenizer()(
+                [point.payload["document"] for point in ollama_vector],
+                add_special_tokens=False
+            )["input_ids"]
+            self.pending_tokens.update(zip((str(point.id) for point in ollama_vector), token_ids))
+            return True
+        except Exception as e:
+            logging.error(f"Error tokenizing documents for token store: {e}")
+            return False
+    
+    def write_token_store(self) -> bool:
+        """
+        Write the token IDs collected by update_token_store to the token store.
+        
+        Returns:
+            bool: True if the store is updated successfully, False otherwise
+        """
+        if not self.token_store_dir or not self.pending_tokens:
+            return False
+        try:
+            token_store = TokenStore(store_dir=self.token_store_dir, model_name=self.reranker_model, tokenizer_version=tokenizer_version())
+            num_passages = token_store.add(list(self.pending_tokens), list(self.pending_tokens.values()))
+            self.pending_tokens = {}
+            logging.info(f"Token store for {self.reranker_model} now contains {num_passages} passages.")
+            return True
+        except Exception as e:
+            logging.error(f"Error updating token store: {e}")
+            return False
+    
     def documents_embedding(self):
         """
         Generate embeddings for documents in the data context and insert them into Qdrant collections.
@@ -159,12 +257,18 @@ class Data_Embedding:
                     else:
                         collection_name = f"{file.split('.')[-1]}_{self.embed_model.split('/')[-1]}"
                         
-                    self.insert_documents(
+                    if self.insert_documents(
                         ollama_vector=ollama_vector,
                         collection_name=collection_name
-                    )
+                    ):
+                        self.update_bm25_index(
+                            ollama_vector=ollama_vector,
+                            collection_name=collection_name
+                        )
+                        self.update_token_store(ollama_vector=ollama_vector)
                     self.data_context.pop(file)
             
+            self.write_token_store()
             with open(self.data_context_path, "w", encoding="utf-8") as f:
                 json.dump(self.data_context, f, ensure_ascii=False, indent=4)
                     
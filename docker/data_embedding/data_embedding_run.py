@@ -13,6 +13,12 @@ def main():
                       help='Path to data context file')
     parser.add_argument('--embed-model', default='imac/zpoint_large_embedding_zh',
                       help='Embedding model to use')
+    parser.add_argument('--bm25-index-dir', default=os.getenv('BM25_INDEX_DIR', '/app/dags/data/bm25_index'),
+                      help='Root directory of the BM25 indexes, empty to skip BM25 indexing')
+    parser.add_argument('--token-store-dir', default=os.getenv('RERANK_TOKEN_STORE_DIR', ''),
+                      help='Root directory of the reranker token stores, empty to skip pre-tokenization')
+    parser.add_argument('--reranker-model', default='BAAI/bge-reranker-v2-m3',
+                      help='Reranker whose tokenizer is used for the token store')
     
     args = parser.parse_args()
     
@@ -22,10 +28,15 @@ def main():
         logging.info(f"Embedding model: {args.embed_model}")
         logging.info(f"Ollama URL: {os.getenv('OLLAMA_HOST')}")
         logging.info(f"Qdrant URL: {os.getenv('QDRANT_URL')}")
+        logging.info(f"BM25 index dir: {args.bm25_index_dir}")
+        logging.info(f"Token store dir: {args.token_store_dir}")
         
         data_embedding_obj = Data_Embedding(
             embed_model=args.embed_model,
-            data_context_path=args.data_context_path
+            data_context_path=args.data_context_path,
+            bm25_index_dir=args.bm25_index_dir or None,
+            token_store_dir=args.token_store_dir or None,
+            reranker_model=args.reranker_model
         )
         
         result = data_embedding_obj.documents_embedding()
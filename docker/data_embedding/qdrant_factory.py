@@ -0,0 +1,123 @@
+import os
+import httpx
+import logging
+from typing import Optional
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+# 共用的 Qdrant 連線設定，透過環境變數調整
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 60))
+QDRANT_GRPC_KEEPALIVE_MS = int(os.getenv("QDRANT_GRPC_KEEPALIVE_MS", 30000))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+
+_clients = {}
+
+
+def get_pool_limits(pool_size: Optional[int] = None) -> httpx.Limits:
+    """
+    Get the HTTP connection pool limits shared by REST clients.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections. Defaults to HTTP_POOL_SIZE.
+
+    Returns:
+        limits (httpx.Limits): Connection pool limits.
+    """
+    pool_size = pool_size or HTTP_POOL_SIZE
+    return httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+
+
+def get_grpc_options() -> dict:
+    """
+    Get the gRPC channel options used when gRPC transport is preferred.
+
+    Keepalive pings keep idle channels open between DAG runs, and the message
+    size limits are lifted so large upsert batches of 1024-dim vectors fit.
+
+    Returns:
+        grpc_options (dict): gRPC channel options.
+    """
+    return {
+        "grpc.keepalive_time_ms": QDRANT_GRPC_KEEPALIVE_MS,
+        "grpc.keepalive_timeout_ms": 10000,
+        "grpc.keepalive_permit_without_calls": 1,
+        "grpc.http2.max_pings_without_data": 0,
+        "grpc.max_send_message_length": -1,
+        "grpc.max_receive_message_length": -1,
+    }
+
+
+def get_client_options(url: Optional[str] = None, prefer_grpc: Optional[bool] = None) -> dict:
+    """
+    Build the keyword arguments shared by the sync and async Qdrant clients.
+
+    Args:
+        url (str): Qdrant URL. Defaults to the QDRANT_URL environment variable.
+        prefer_grpc (bool): Use gRPC transport. Defaults to QDRANT_PREFER_GRPC.
+
+    Returns:
+        client_options (dict): Keyword arguments for QdrantClient or AsyncQdrantClient.
+    """
+    prefer_grpc = QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    client_options = {
+        "url": url or os.getenv("QDRANT_URL"),
+        "timeout": QDRANT_TIMEOUT,
+        "prefer_grpc": prefer_grpc,
+    }
+    if prefer_grpc:
+        client_options["grpc_port"] = QDRANT_GRPC_PORT
+        client_options["grpc_options"] = get_grpc_options()
+    else:
+        client_options["limits"] = get_pool_limits()
+    return client_options
+
+
+def get_qdrant_client(url: Optional[str] = None, prefer_grpc: Optional[bool] = None) -> QdrantClient:
+    """
+    Get a shared Qdrant client for the given URL and transport.
+
+    Args:
+        url (str): Qdrant URL. Defaults to the QDRANT_URL environment variable.
+        prefer_grpc (bool): Use gRPC transport. Defaults to QDRANT_PREFER_GRPC.
+
+    Returns:
+        qdrant_client (QdrantClient): The Qdrant client.
+    """
+    client_options = get_client_options(url=url, prefer_grpc=prefer_grpc)
+    key = ("sync", client_options["url"], client_options["prefer_grpc"])
+    if key not in _clients:
+        logging.info(f"Creating Qdrant client for {client_options['url']} (prefer_grpc={client_options['prefer_grpc']})")
+        _clients[key] = QdrantClient(**client_options)
+    return _clients[key]
+
+
+def get_async_qdrant_client(url: Optional[str] = None, prefer_grpc: Optional[bool] = None) -> AsyncQdrantClient:
+    """
+    Get a shared async Qdrant client for the given URL and transport.
+
+    Args:
+        url (str): Qdrant URL. Defaults to the QDRANT_URL environment variable.
+        prefer_grpc (bool): Use gRPC transport. Defaults to QDRANT_PREFER_GRPC.
+
+    Returns:
+        qdrant_client (AsyncQdrantClient): The async Qdrant client.
+    """
+    client_options = get_client_options(url=url, prefer_grpc=prefer_grpc)
+    key = ("async", client_options["url"], client_options["prefer_grpc"])
+    if key not in _clients:
+        logging.info(f"Creating async Qdrant client for {client_options['url']} (prefer_grpc={client_options['prefer_grpc']})")
+        _clients[key] = AsyncQdrantClient(**client_options)
+    return _clients[key]
+
+
+def forget_client(client: object) -> None:
+    """
+    Drop a client from the shared cache after it has been closed.
+
+    Args:
+        client (object): The Qdrant client to drop.
+    """
+    for key, cached_client in list(_clients.items()):
+        if cached_client is client:
+            _clients.pop(key)
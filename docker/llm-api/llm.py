@@ -1,15 +1,25 @@
 import os
 import ast
 import logging
+import threading
+from collections import OrderedDict
+import httpx
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 
 import prompt_config as prompt_config
+from retrieval_hits import context_text
 
 
 class LLM:
+    _llm_models = OrderedDict()
+    _chains = OrderedDict()
+    _cache_lock = threading.Lock()
+    cache_size = int(os.getenv("LLM_CHAIN_CACHE_SIZE", "64"))
+    pool_size = int(os.getenv("OLLAMA_POOL_SIZE", "16"))
+    
     def __init__(
         self, 
         model: str = "gemma2:9b",
@@ -53,14 +63,42 @@ class LLM:
             logging.error(f"Error retrieving user question: {e}")
             return "What is the current number of electors currently in a Scottish Parliament constituency?"
     
+    @staticmethod
+    def cache_put(cache: OrderedDict, key: tuple, value: object) -> object:
+        """
+        Insert into a class-level LRU cache unless another request already did. Caller holds the lock.
+        
+        Args:
+            cache (OrderedDict): The cache.
+            key (tuple): Cache key.
+            value (object): Value to insert.
+        
+        Returns:
+            value (object): The cached value.
+        """
+        value = cache.setdefault(key, value)
+        cache.move_to_end(key)
+        while len(cache) > LLM.cache_size:
+            cache.popitem(last=False)
+        return value
+    
     def get_llm_model(self) -> object:
         """
-        Get the LLM model.
+        Get the LLM model, reusing the client built for the same model and options.
+        
+        Each cached ChatOllama keeps its own httpx connection pool to Ollama, so repeated
+        requests reuse open connections instead of connecting again.
         
         Returns:
             llm: The LLM model.
         """
         try:
+            key = (self.model, self.ollama_url, self.temperature, self.keep_alive, self.num_ctx)
+            with LLM._cache_lock:
+                if key in LLM._llm_models:
+                    LLM._llm_models.move_to_end(key)
+                    return LLM._llm_models[key]
+            
             logging.info(f"Getting LLM model: {self.model}")
             logging.info(f"Using OLLAMA URL: {self.ollama_url}")
             logging.info(f"Using temperature: {self.temperature}")
@@ -71,12 +109,108 @@ class LLM:
                 base_url=self.ollama_url,
                 temperature=self.temperature,
                 keep_alive=self.keep_alive,
-                num_ctx=self.num_ctx
+                num_ctx=self.num_ctx,
+                client_kwargs={
+                    "limits": httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                }
             )
-            return llm
+            with LLM._cache_lock:
+                return self.cache_put(LLM._llm_models, key, llm)
         except Exception as e:
             logging.error(f"Error getting LLM model: {e}")
             raise e
+    
+    def build_chain(self, types: str, llm: object) -> object:
+        """
+        Build the prompt template and LCEL chain of a task type.
+        
+        Args:
+            types (str): The type of task to perform.
+            llm (object): The LLM model.
+        
+        Returns:
+            llm_chain: The chain, or None for an unknown type.
+        """
+        if types in ("keyword", "general"):
+            if types == "keyword":
+                logging.info(f"Using keyword extraction")
+                PROMPT = self.prompt_config.KEYWORD
+            else:
+                logging.info(f"Using general ask")
+                PROMPT = self.prompt_config.GENERAL_ASK_SYS_PROMPT
+                
+            prompt_template = f"""{PROMPT}
+            
+The Question: {{user_question}}
+
+Response:"""
+            return (
+                {"user_question": RunnablePassthrough()}
+                | ChatPromptTemplate.from_template(prompt_template)
+                | llm
+                | StrOutputParser()
+            )
+        
+        if types == "rag":
+            logging.info(f"Using RAG")
+            PROMPT = self.prompt_config.RAG_DETAIL_SYS_PROMPT
+        elif types == "validation":
+            logging.info(f"Using validation")
+            PROMPT = self.prompt_config.VALIDATION
+        elif types == "summary":
+            logging.info(f"Using summary")
+            PROMPT = self.prompt_config.SUMMARY_1
+        else:
+            return None
+            
+        prompt_template = f"""{PROMPT}
+
+    Context: 
+    {{context}}
+
+    The Question: {{user_question}}
+
+    Response:"""
+        return (
+            {"context": RunnablePassthrough(), "user_question": RunnablePassthrough()}
+            | ChatPromptTemplate.from_template(prompt_template)
+            | llm
+            | StrOutputParser()
+        )
+    
+    def get_chain(self, types: str, llm: object) -> object:
+        """
+        Get the chain of a task type for an LLM model, building it on first use.
+        
+        Args:
+            types (str): The type of task to perform.
+            llm (object): The LLM model.
+        
+        Returns:
+            llm_chain: The chain, or None for an unknown type.
+        """
+        # A cached chain holds its model, so the model's id stays unique while the chain is cached
+        key = (id(llm), types)
+        with LLM._cache_lock:
+            if key in LLM._chains:
+                LLM._chains.move_to_end(key)
+                return LLM._chains[key]
+        
+        llm_chain = self.build_chain(types, llm)
+        if llm_chain is None:
+            return None
+        with LLM._cache_lock:
+            return self.cache_put(LLM._chains, key, llm_chain)
+    
+    @staticmethod
+    def cache_stats() -> dict:
+        """
+        Get cache statistics.
+        
+        Returns:
+            stats (dict): Number of cached models and chains.
+        """
+        return {"models": len(LLM._llm_models), "chains": len(LLM._chains)}
 
     def get_context(self, ti, types: str) -> list:
         """
@@ -104,7 +238,7 @@ class LLM:
                         context = ti.xcom_pull(task_ids='keyword_retrieval_task', key='return_value')
                         logging.info(f"Keyword context: {context}")
                 
-            return context if isinstance(context, list) else []
+            return [context_text(item) for item in context] if isinstance(context, list) else []
         except Exception as e:
             logging.error(f"Error retrieving context: {e}")
             return []
@@ -122,27 +256,11 @@ class LLM:
             llm_result (str): The result from the LLM chain.
         """
         try:
-            if types == "keyword":
-                logging.info(f"Using keyword extraction")
-                PROMPT = self.prompt_config.KEYWORD
-            elif types == "general":
-                logging.info(f"Using general ask")
-                PROMPT = self.prompt_config.GENERAL_ASK_SYS_PROMPT
-            else:
+            if types not in ("keyword", "general"):
                 logging.warning(f"Unknown type: {types}")
                 return ""
                 
-            prompt_template = f"""{PROMPT}
-            
-The Question: {{user_question}}
-
-Response:"""
-            llm_chain = (
-                {"user_question": RunnablePassthrough()}
-                | ChatPromptTemplate.from_template(prompt_template)
-                | llm
-                | StrOutputParser()
-            )
+            llm_chain = self.get_chain(types, llm)
             llm_result = llm_chain.invoke({"user_question": user_question})
             llm_result = ast.literal_eval(f'[{llm_result}]') if types == "keyword" else llm_result
             return llm_result
@@ -164,35 +282,12 @@ Response:"""
             llm_result (str): The result from the LLM chain.
         """
         try:
-            if types == "rag":
-                logging.info(f"Using RAG")
-                PROMPT = self.prompt_config.RAG_DETAIL_SYS_PROMPT
-            elif types == "validation":
-                logging.info(f"Using validation")
-                PROMPT = self.prompt_config.VALIDATION
-            elif types == "summary":
-                logging.info(f"Using summary")
-                PROMPT = self.prompt_config.SUMMARY_1
-            else:
+            if types not in ("rag", "validation", "summary"):
                 logging.warning(f"Unknown type: {types}")
                 return ""
                 
-            prompt_template = f"""{PROMPT}
+            llm_chain = self.get_chain(types, llm)
 
-    Context: 
-    {{context}}
-
-    The Question: {{user_question}}
-
-    Response:"""
-            
-            llm_chain = (
-                {"context": RunnablePassthrough(), "user_question": RunnablePassthrough()}
-                | ChatPromptTemplate.from_template(prompt_template)
-                | llm
-                | StrOutputParser()
-            )
-                       
             llm_result = llm_chain.invoke({"context": "".join(context) if context else "", "user_question": user_question})
             return llm_result
         except Exception as e:
@@ -1,7 +1,7 @@
 import os
 import logging
 import threading
-from typing import Optional
+from typing import Optional, Union
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from llm import LLM
@@ -24,7 +24,7 @@ class LLMRequest(BaseModel):
     num_ctx: int = 8192
     user_question: str
     search_results_types: Optional[str] = None
-    search_results: Optional[str] = None
+    search_results: Optional[Union[str, list]] = None
 
 class MockTi:
     def __init__(self, user_question: str, search_results_types: str=None, search_results: str = None):
@@ -37,6 +37,8 @@ class MockTi:
             return self.user_question or "What is the current number of electors currently in a Scottish Parliament constituency?"
         elif task_ids == self.search_results_types and key == 'return_value':
             try:
+                if isinstance(self.search_results, list):
+                    return self.search_results
                 import ast
                 search_results = ast.literal_eval(self.search_results)
                 logging.info(f"Parsed search results: {search_results}")
@@ -64,7 +66,7 @@ def inactivity_monitor():
 def root():
     """健康檢查接口"""
     update_last_used_time()
-    return {"status": "healthy", "service": "llm-api"}
+    return {"status": "healthy", "service": "llm-api", "cache": LLM.cache_stats()}
 
 @app.post("/llm")
 def llm(request: LLMRequest):
@@ -73,6 +75,7 @@ def llm(request: LLMRequest):
     
     try:
         logger.info(f"LLM object created with: {request}")
+        # ChatOllama client 與 chain 由 LLM 類別的 LRU 快取重用，大小由 LLM_CHAIN_CACHE_SIZE 設定
         llm_obj = LLM(
             model=request.model,
             temperature=request.temperature,
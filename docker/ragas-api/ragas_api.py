@@ -1,7 +1,7 @@
 import os
 import logging
 import threading
-from typing import Optional
+from typing import Optional, Union
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from ragas_evaluator import Ragas
@@ -19,9 +19,9 @@ INACTIVITY_TIMEOUT = 300
 class LLMRequest(BaseModel):
     user_question: str
     llm_answer: str
-    similarity_results: Optional[str] = None
-    keyword_results: Optional[str] = None
-    rerank_results: Optional[str] = None
+    similarity_results: Optional[Union[str, list]] = None
+    keyword_results: Optional[Union[str, list]] = None
+    rerank_results: Optional[Union[str, list]] = None
     use_similarity: bool = False
     use_keyword: bool = False
     use_rerank: bool = False
@@ -43,7 +43,7 @@ class MockTi:
         elif task_ids == 'similarity_retrieval_task' and key == 'return_value':
             try:
                 import ast
-                similarity_results = ast.literal_eval(self.similarity_results) if self.similarity_results else []
+                similarity_results = self.similarity_results if isinstance(self.similarity_results, list) else (ast.literal_eval(self.similarity_results) if self.similarity_results else [])
                 logging.info(f"Parsed search results: {similarity_results}")
                 return similarity_results if isinstance(similarity_results, list) else []
             except Exception as e:
@@ -52,7 +52,7 @@ class MockTi:
         elif task_ids == 'keyword_retrieval_task' and key == 'return_value':
             try:
                 import ast
-                keyword_results = ast.literal_eval(self.keyword_results) if self.keyword_results else []
+                keyword_results = self.keyword_results if isinstance(self.keyword_results, list) else (ast.literal_eval(self.keyword_results) if self.keyword_results else [])
                 logging.info(f"Parsed keyword results: {keyword_results}")
                 return keyword_results if isinstance(keyword_results, list) else []
             except Exception as e:
@@ -61,7 +61,7 @@ class MockTi:
         elif task_ids == 'reranking_task' and key == 'return_value':
             try:
                 import ast
-                rerank_results = ast.literal_eval(self.rerank_results) if self.rerank_results else []
+                rerank_results = self.rerank_results if isinstance(self.rerank_results, list) else (ast.literal_eval(self.rerank_results) if self.rerank_results else [])
                 logging.info(f"Parsed rerank results: {rerank_results}")
                 return rerank_results if isinstance(rerank_results, list) else []
             except Exception as e:
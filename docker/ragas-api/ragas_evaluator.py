@@ -11,6 +11,7 @@ from ragas.metrics import (
     # answer_correctness
 )
 from ragas.dataset_schema import EvaluationResult
+from retrieval_hits import context_text
 
 class Ragas:
     def __init__(self, qa_path: str = "dags/data/qa_pairs.json"):
@@ -102,6 +103,7 @@ class Ragas:
             else:
                 raise ValueError("Invalid type for reference answer.")
             # reference_answer = [[item] for item in reference_answer]
+            reference_answer = [context_text(item) for item in reference_answer or []]
             logging.info(f"Reference answer: {[reference_answer]}")
             return [reference_answer]
         except Exception as e:
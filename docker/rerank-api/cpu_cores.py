@@ -0,0 +1,42 @@
+import os
+
+
+def available_cores() -> int:
+    """
+    Count the CPU cores this container may use.
+
+    os.cpu_count() reports every core of the node, but a pod with a CPU limit only gets
+    its cgroup quota, so thread pools sized from it oversubscribe the limit and get throttled.
+
+    Returns:
+        cores (int): Env RERANK_CPU_CORES if set, else the smaller of the CPU affinity and the cgroup quota, at least 1.
+    """
+    configured = int(os.getenv("RERANK_CPU_CORES", "0") or 0)
+    if configured > 0:
+        return configured
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = cgroup_quota()
+    return max(1, min(cores, quota)) if quota else cores
+
+
+def cgroup_quota() -> int:
+    """
+    Read the CPU limit of the container from cgroup v2 or v1.
+
+    Returns:
+        quota (int): Quota divided by period, rounded up; None when there is no limit.
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "r") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "r") as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1") or int(period) <= 0:
+        return None
+    return max(1, -(-int(quota) // int(period)))
@@ -0,0 +1,58 @@
+import os
+import gc
+import logging
+from cpu_cores import available_cores
+
+# Pre-fork serving: the app and the reranker weights are loaded once in the master,
+# then workers are forked and share the weight pages copy-on-write.
+os.environ["RERANK_PREFORK"] = "true"
+
+workers = max(1, int(os.getenv("RERANK_WORKERS", "2")))
+cpu_cores = available_cores()
+# Split the cores between the workers so their intra-op thread pools do not oversubscribe the pod;
+# "0" (the deployment default) means unset, so it is replaced as well
+worker_threads = max(1, cpu_cores // workers)
+for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "RERANK_ONNX_THREADS"):
+    if os.getenv(name, "0").strip() in ("", "0"):
+        os.environ[name] = str(worker_threads)
+
+bind = f"0.0.0.0:{os.getenv('RERANK_PORT', '8001')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("RERANK_WORKER_TIMEOUT", "300"))
+graceful_timeout = 30
+
+
+def when_ready(server) -> None:
+    """
+    Load the default reranker in the master after the app is preloaded and before any worker is forked.
+
+    Only the weights are loaded; inference thread pools are created in the workers, which
+    warm up in their own startup event. The ONNX backend is skipped because ONNX Runtime
+    sessions do not survive a fork.
+    """
+    from rerank import Reranker
+
+    if os.getenv("RERANK_BACKEND", "torch").lower() == "onnx":
+        server.log.info("ONNX backend: every worker loads its own inference session")
+        return
+    try:
+        Reranker().get_reranker()
+        # Move the loaded objects out of the collector's reach so that collections in the
+        # workers do not write to, and thereby copy, the shared pages
+        gc.freeze()
+        server.log.info(f"Reranker weights loaded before forking {workers} workers with {worker_threads} threads each")
+    except Exception as e:
+        logging.error(f"Error preloading reranker model before fork: {e}")
+
+
+def post_fork(server, worker) -> None:
+    """
+    Limit the torch intra-op threads of each worker so the workers together use every core once.
+    """
+    try:
+        import torch
+        torch.set_num_threads(worker_threads)
+    except ImportError:
+        pass
+    server.log.info(f"Worker {worker.pid} uses {worker_threads} threads")
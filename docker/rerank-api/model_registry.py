@@ -0,0 +1,186 @@
+import os
+import gc
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ModelRegistry:
+    def __init__(self, loader, max_models: int = None, allowed_models: list = None, on_load=None, on_evict=None):
+        """
+        Initialize the ModelRegistry class.
+
+        Reranker models are loaded by name on first use and kept in an LRU of at most
+        max_models entries; the least recently used model is released once another
+        one has loaded, so trying a different model does not need a new image.
+
+        Args:
+            loader (callable): Function mapping a model name to a loaded reranker.
+            max_models (int): Maximum number of models kept in memory. Defaults to env RERANK_MAX_MODELS or 2.
+            allowed_models (list): Model names that may be loaded. Defaults to env RERANK_ALLOWED_MODELS; any model when empty.
+            on_load (callable): Called with the model name and model when a model is added, under the registry lock.
+            on_evict (callable): Called with the model name after a model is released, under the registry lock.
+        """
+        self.loader = loader
+        self.max_models = max(1, max_models or int(os.getenv("RERANK_MAX_MODELS", "2")))
+        if allowed_models is None:
+            allowed_models = [name.strip() for name in os.getenv("RERANK_ALLOWED_MODELS", "").split(",") if name.strip()]
+        self.allowed_models = set(allowed_models)
+        self.on_load = on_load
+        self.on_evict = on_evict
+        self.models = OrderedDict()
+        self.footprints = {}
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, model_name: str) -> object:
+        """
+        Get a model, loading it and then evicting the least recently used model if needed.
+
+        Loaded models are returned without waiting for loads of other models. A model is
+        loaded outside the registry lock and evicts others only once it has loaded, so a
+        failed load leaves the loaded models in place; memory briefly holds one extra model.
+
+        Args:
+            model_name (str): Name of the reranker model.
+
+        Returns:
+            model: The loaded reranker model.
+        """
+        if self.allowed_models and model_name not in self.allowed_models:
+            raise ValueError(f"Reranker model {model_name} is not allowed; choose one of {sorted(self.allowed_models)}")
+        with self.lock:
+            if model_name in self.models:
+                self.models.move_to_end(model_name)
+                return self.models[model_name]
+            # Requests arriving during a load wait for it instead of loading a second copy
+            loading = self.loading.get(model_name)
+            if loading is None:
+                self.loading[model_name] = Future()
+        if loading is not None:
+            return loading.result()
+        return self.load(model_name)
+
+    def load(self, model_name: str) -> object:
+        """
+        Load a model and publish it to the requests waiting for it.
+
+        Args:
+            model_name (str): Name of the reranker model, registered in self.loading by the caller.
+
+        Returns:
+            model: The loaded reranker model.
+        """
+        loading = self.loading[model_name]
+        try:
+            rss_before = self.rss_bytes()
+            start_time = time.perf_counter()
+            model = self.loader(model_name)
+            rss_after = self.rss_bytes()
+            footprint = {
+                "memory_mb": self.memory_mb(model),
+                "rss_delta_mb": round((rss_after - rss_before) / 2 ** 20, 1) if rss_before is not None else None,
+                "load_seconds": round(time.perf_counter() - start_time, 2),
+            }
+        except Exception as e:
+            logging.error(f"Error loading reranker model {model_name}: {e}")
+            with self.lock:
+                self.loading.pop(model_name, None)
+            loading.set_exception(e)
+            raise e
+
+        with self.lock:
+            while len(self.models) >= self.max_models:
+                self.evict(next(iter(self.models)))
+            if self.on_load is not None:
+                self.on_load(model_name, model)
+            self.models[model_name] = model
+            self.footprints[model_name] = footprint
+            self.loads += 1
+            self.loading.pop(model_name, None)
+        loading.set_result(model)
+        logging.info(f"Loaded reranker model {model_name}: {footprint}")
+        return model
+
+    def evict(self, model_name: str) -> None:
+        """
+        Release a model. Caller holds the lock.
+
+        Args:
+            model_name (str): Name of the reranker model.
+        """
+        model = self.models.pop(model_name)
+        self.footprints.pop(model_name, None)
+        if hasattr(model, "stop_self_pool"):
+            try:
+                model.stop_self_pool()
+            except Exception as e:
+                logging.error(f"Error stopping reranker pool of {model_name}: {e}")
+        if self.on_evict is not None:
+            self.on_evict(model_name)
+        del model
+        gc.collect()
+        if "torch" in sys.modules and sys.modules["torch"].cuda.is_available():
+            sys.modules["torch"].cuda.empty_cache()
+        self.evictions += 1
+        logging.info(f"Evicted reranker model {model_name}")
+
+    def clear(self) -> None:
+        """
+        Release every loaded model.
+        """
+        with self.lock:
+            while self.models:
+                self.evict(next(iter(self.models)))
+
+    @staticmethod
+    def memory_mb(model: object) -> float:
+        """
+        Estimate the memory held by a model's weights.
+
+        Args:
+            model (object): A FlagReranker or OnnxReranker.
+
+        Returns:
+            memory_mb (float): Size of the parameters and buffers, or of the ONNX file; None if unknown.
+        """
+        torch_model = getattr(model, "model", None)
+        if hasattr(torch_model, "parameters"):
+            tensors = list(torch_model.parameters()) + list(torch_model.buffers())
+            return round(sum(tensor.numel() * tensor.element_size() for tensor in tensors) / 2 ** 20, 1)
+        if hasattr(model, "quantized_path") and os.path.exists(model.quantized_path):
+            return round(os.path.getsize(model.quantized_path) / 2 ** 20, 1)
+        return None
+
+    @staticmethod
+    def rss_bytes() -> int:
+        """
+        Get the resident set size of this process.
+
+        Returns:
+            rss (int): Resident memory in bytes, or None where /proc is not available.
+        """
+        try:
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return None
+
+    def stats(self) -> dict:
+        """
+        Get registry statistics.
+
+        Returns:
+            stats (dict): Loaded models from least to most recently used with their footprint, loads and evictions.
+        """
+        return {
+            "max_models": self.max_models,
+            "models": {model_name: self.footprints.get(model_name) for model_name in self.models},
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
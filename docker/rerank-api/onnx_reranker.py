@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import numpy as np
+from cpu_cores import available_cores
+
+
+class OnnxReranker:
+    def __init__(self, model_name: str, cache_dir: str = "dags/.cache", onnx_dir: str = None,
+                 num_threads: int = None, max_length: int = 512, batch_size: int = 32):
+        """
+        Initialize the OnnxReranker class.
+
+        The cross-encoder is exported to ONNX and quantized to int8 ahead of serving, with
+        `python onnx_reranker.py --export-only` in the image build, and served by ONNX Runtime
+        on CPU. compute_score mirrors FlagReranker.
+
+        Args:
+            model_name (str): Hugging Face name of the cross-encoder.
+            cache_dir (str): Hugging Face cache directory. Defaults to "dags/.cache".
+            onnx_dir (str): Directory of the exported model. Defaults to <RERANK_ONNX_DIR or cache_dir/onnx>/<model>.
+            num_threads (int): ONNX Runtime intra-op threads. Defaults to env RERANK_ONNX_THREADS or the cores of the container.
+            max_length (int): Maximum tokens per pair. Defaults to 512.
+            batch_size (int): Pairs per inference call. Defaults to 32.
+        """
+        from transformers import AutoTokenizer
+        import onnxruntime as ort
+
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.onnx_dir = onnx_dir or self.default_onnx_dir(model_name, cache_dir)
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.quantized_path = os.path.join(self.onnx_dir, "model.int8.onnx")
+        # Exporting takes minutes and several GB of disk, so it never runs on the request path
+        if not os.path.exists(self.quantized_path):
+            raise FileNotFoundError(
+                f"No ONNX export of {model_name} at {self.quantized_path}; "
+                f"build it with `python onnx_reranker.py --export-only --model-name {model_name}`"
+            )
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.onnx_dir)
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = num_threads or int(os.getenv("RERANK_ONNX_THREADS", "0")) or available_cores()
+        session_options.inter_op_num_threads = 1
+        session_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.quantized_path, session_options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        logging.info(f"Loaded ONNX int8 reranker from {self.quantized_path} with {session_options.intra_op_num_threads} threads")
+
+    @staticmethod
+    def default_onnx_dir(model_name: str, cache_dir: str = "dags/.cache") -> str:
+        """
+        Get the directory of a model's ONNX export.
+
+        Args:
+            model_name (str): Hugging Face name of the cross-encoder.
+            cache_dir (str): Hugging Face cache directory. Defaults to "dags/.cache".
+
+        Returns:
+            onnx_dir (str): <RERANK_ONNX_DIR or cache_dir/onnx>/<model>, so the main and cascade models do not collide.
+        """
+        return os.path.join(os.getenv("RERANK_ONNX_DIR") or os.path.join(cache_dir, "onnx"), model_name.replace("/", "--"))
+
+    @staticmethod
+    def export(model_name: str, cache_dir: str = "dags/.cache", onnx_dir: str = None) -> str:
+        """
+        Export the cross-encoder to ONNX and quantize its weights to int8.
+
+        The float export is written to a temporary directory and deleted after quantization,
+        so only the int8 model and the tokenizer are left in onnx_dir.
+
+        Args:
+            model_name (str): Hugging Face name of the cross-encoder.
+            cache_dir (str): Hugging Face cache directory. Defaults to "dags/.cache".
+            onnx_dir (str): Output directory. Defaults to OnnxReranker.default_onnx_dir.
+
+        Returns:
+            quantized_path (str): Path of the int8 model.
+        """
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        onnx_dir = onnx_dir or OnnxReranker.default_onnx_dir(model_name, cache_dir)
+        quantized_path = os.path.join(onnx_dir, "model.int8.onnx")
+        logging.info(f"Exporting {model_name} to ONNX in {onnx_dir}...")
+        os.makedirs(onnx_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=cache_dir).eval()
+        tokenizer.save_pretrained(onnx_dir)
+
+        sample = tokenizer([["query", "passage"]], padding=True, truncation=True, return_tensors="pt")
+        # models over 2 GB are exported with external weight files, so the whole directory is removed
+        with tempfile.TemporaryDirectory(dir=onnx_dir) as float_dir:
+            float_path = os.path.join(float_dir, "model.onnx")
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    (sample["input_ids"], sample["attention_mask"]),
+                    float_path,
+                    input_names=["input_ids", "attention_mask"],
+                    output_names=["logits"],
+                    dynamic_axes={
+                        "input_ids": {0: "batch", 1: "sequence"},
+                        "attention_mask": {0: "batch", 1: "sequence"},
+                        "logits": {0: "batch"},
+                    },
+                    opset_version=17,
+                )
+            del model
+            temp_path = os.path.join(float_dir, "model.int8.onnx")
+            quantize_dynamic(float_path, temp_path, weight_type=QuantType.QInt8)
+            os.replace(temp_path, quantized_path)
+        logging.info(f"Quantized ONNX reranker written to {quantized_path}")
+        return quantized_path
+
+    def encode_pairs(self, sentence_pairs: list, max_length: int) -> list:
+        """
+        Tokenize [question, passage] pairs the way FlagReranker does.
+
+        The question is capped at three quarters of max_length and only the passage is
+        truncated to fit, so a long passage cannot push the question out of the pair.
+
+        Args:
+            sentence_pairs (list): List of [question, passage] pairs.
+            max_length (int): Maximum tokens per pair.
+
+        Returns:
+            features (list): One encoding per pair.
+        """
+        question_ids = {}
+        features = []
+        for question, passage in sentence_pairs:
+            if question not in question_ids:
+                question_ids[question] = self.tokenizer(question, add_special_tokens=False, truncation=True, max_length=max_length * 3 // 4)["input_ids"]
+            passage_ids = self.tokenizer(passage, add_special_tokens=False, truncation=True, max_length=max_length)["input_ids"]
+            features.append(self.tokenizer.prepare_for_model(
+                question_ids[question],
+                passage_ids,
+                truncation="only_second",
+                max_length=max_length
+            ))
+        return features
+
+    def compute_score(self, sentence_pairs: list, batch_size: int = None, max_length: int = None, normalize: bool = False) -> list:
+        """
+        Score [question, passage] pairs.
+
+        Args:
+            sentence_pairs (list): List of [question, passage] pairs.
+            batch_size (int): Pairs per inference call. Defaults to the instance batch size.
+            max_length (int): Maximum tokens per pair. Defaults to the instance max length.
+            normalize (bool): Map the logits to [0, 1] with a sigmoid, like FlagReranker. Defaults to False.
+
+        Returns:
+            scores (list): One score per pair, in the same order.
+        """
+        features = self.encode_pairs(sentence_pairs, max_length or self.max_length)
+        return self.compute_score_from_features(features, batch_size=batch_size, normalize=normalize)
+
+    def compute_score_from_features(self, features: list, batch_size: int = None, normalize: bool = False) -> list:
+        """
+        Score pairs that are already tokenized, such as questions joined with pre-tokenized passages.
+
+        Args:
+            features (list): One dict per pair with the "input_ids" of the joined question and passage.
+            batch_size (int): Pairs per inference call. Defaults to the instance batch size.
+            normalize (bool): Map the logits to [0, 1] with a sigmoid, like FlagReranker. Defaults to False.
+
+        Returns:
+            scores (list): One score per pair, in the same order.
+        """
+        batch_size = batch_size or self.batch_size
+        scores = []
+        for offset in range(0, len(features), batch_size):
+            inputs = self.tokenizer.pad(features[offset:offset + batch_size], padding=True, return_tensors="np")
+            logits = self.session.run(["logits"], {name: value.astype(np.int64) for name, value in inputs.items() if name in self.input_names})[0]
+            scores.extend(logits[:, 0].astype(np.float32).tolist())
+        if normalize:
+            scores = (1 / (1 + np.exp(-np.asarray(scores, dtype=np.float32)))).tolist()
+        return scores
+
+
+def check_parity(model_name: str, sentence_pairs: list, cache_dir: str = "dags/.cache", tolerance: float = 0.05) -> dict:
+    """
+    Compare the ONNX int8 backend with the PyTorch FlagReranker on the same pairs.
+
+    Args:
+        model_name (str): Hugging Face name of the cross-encoder.
+        sentence_pairs (list): List of [question, passage] pairs.
+        cache_dir (str): Hugging Face cache directory. Defaults to "dags/.cache".
+        tolerance (float): Maximum allowed absolute difference of normalized scores. Defaults to 0.05.
+
+    Returns:
+        report (dict): Score differences, top-1 agreement, timings and whether the check passed.
+    """
+    from FlagEmbedding import FlagReranker
+
+    torch_reranker = FlagReranker(model_name, use_fp16=False, cache_dir=cache_dir)
+    if not os.path.exists(os.path.join(OnnxReranker.default_onnx_dir(model_name, cache_dir), "model.int8.onnx")):
+        OnnxReranker.export(model_name, cache_dir)
+    onnx_reranker = OnnxReranker(model_name, cache_dir=cache_dir)
+
+    start_time = time.perf_counter()
+    torch_scores = np.atleast_1d(np.asarray(torch_reranker.compute_score(sentence_pairs, normalize=True), dtype=np.float32))
+    torch_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    onnx_scores = np.asarray(onnx_reranker.compute_score(sentence_pairs, normalize=True), dtype=np.float32)
+    onnx_seconds = time.perf_counter() - start_time
+
+    # top-1 agreement per question, since reranking only needs the order to match
+    groups = {}
+    for index, pair in enumerate(sentence_pairs):
+        groups.setdefault(pair[0], []).append(index)
+    top1_agreement = np.mean([
+        indexes[int(np.argmax(torch_scores[indexes]))] == indexes[int(np.argmax(onnx_scores[indexes]))]
+        for indexes in groups.values()
+    ])
+    differences = np.abs(torch_scores - onnx_scores)
+    return {
+        "pairs": len(sentence_pairs),
+        "max_abs_diff": round(float(differences.max()), 5),
+        "mean_abs_diff": round(float(differences.mean()), 5),
+        "top1_agreement": round(float(top1_agreement), 4),
+        "torch_pairs_per_second": round(len(sentence_pairs) / torch_seconds, 2),
+        "onnx_pairs_per_second": round(len(sentence_pairs) / onnx_seconds, 2),
+        "passed": bool(differences.max() <= tolerance),
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Export the reranker to ONNX int8 and check score parity with PyTorch')
+    parser.add_argument('--model-name', type=str, default="BAAI/bge-reranker-v2-m3", help='Cross-encoder to export')
+    parser.add_argument('--cache-dir', type=str, default="dags/.cache", help='Hugging Face cache directory')
+    parser.add_argument('--qa-path', type=str, default="dags/data/qa_pairs.json", help='Question/answer pairs used for the parity check')
+    parser.add_argument('--num-questions', type=int, default=50, help='Number of questions in the parity check')
+    parser.add_argument('--tolerance', type=float, default=0.05, help='Maximum absolute difference of normalized scores')
+    parser.add_argument('--export-only', action='store_true', help='Only export and quantize the model')
+    args = parser.parse_args()
+
+    if args.export_only:
+        OnnxReranker.export(args.model_name, cache_dir=args.cache_dir)
+        sys.exit(0)
+
+    with open(args.qa_path, 'r', encoding='utf-8') as f:
+        qa_pairs = list(json.load(f).items())[:args.num_questions]
+    answers = [answer for _, answer in qa_pairs]
+    # every question against its own answer and the next four, so the order of each group can be compared
+    sentence_pairs = [
+        [question, answers[(index + shift) % len(answers)]]
+        for index, (question, _) in enumerate(qa_pairs)
+        for shift in range(5)
+    ]
+    report = check_parity(args.model_name, sentence_pairs, args.cache_dir, args.tolerance)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["passed"] else 1)
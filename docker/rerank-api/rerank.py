@@ -1,9 +1,43 @@
+import os
+import time
 import atexit
 import logging
+import threading
+from rerank_batcher import BatcherClosedError, RerankBatcher
+from cpu_cores import available_cores
+from model_registry import ModelRegistry
+from score_cache import ScoreCache
+from token_store import TokenStore, tokenizer_version
+from retrieval_hits import context_text
 
 
 class Reranker:
-    _reranker = None
+    _registry = None
+    _batchers = {}
+    _score_cache = None
+    _token_stores = {}
+    _ready = False
+    _load_lock = threading.Lock()
+    model_name = os.getenv("RERANK_MODEL", "BAAI/bge-reranker-v2-m3")
+    max_length = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+    backend = os.getenv("RERANK_BACKEND", "torch").lower()
+    cascade_model_name = os.getenv("RERANK_CASCADE_MODEL", "BAAI/bge-reranker-base")
+    cascade_topn = int(os.getenv("RERANK_CASCADE_TOPN", "10"))
+    token_store_dir = os.getenv("RERANK_TOKEN_STORE_DIR", "")
+    cutoff_defaults = {
+        "threshold": float(os.getenv("RERANK_CUTOFF_THRESHOLD", "0.1")),
+        "gap": float(os.getenv("RERANK_CUTOFF_GAP", "0.3")),
+        "mass": float(os.getenv("RERANK_CUTOFF_MASS", "0.9")),
+    }
+    
+    def __init__(self, model_name: str = None):
+        """
+        Initialize the Reranker class.
+        
+        Args:
+            model_name (str): Reranker model to score with. Defaults to env RERANK_MODEL or BAAI/bge-reranker-v2-m3.
+        """
+        self.model_name = model_name or Reranker.model_name
     
     @staticmethod
     def get_user_question(ti: object) -> str:
@@ -39,7 +73,11 @@ class Reranker:
                 logging.info(f"Keyword context: {keyword_context}")
                 context_list.extend(keyword_context)
             
-            return list(set(context_list))
+            # Structured hits are deduplicated by point ID, plain text by content
+            unique_context = {}
+            for context in context_list:
+                unique_context.setdefault(context["id"] if isinstance(context, dict) else context, context)
+            return list(unique_context.values())
         except Exception as e:
             logging.error(f"Error retrieving context: {e}")
             return []
@@ -51,62 +89,499 @@ class Reranker:
         Cleanup the reranker model.
         """
         # Add explicit cleanup if available
-        if Reranker._reranker and hasattr(Reranker._reranker, 'stop_self_pool'):
+        if Reranker._registry is not None:
             try:
-                Reranker._reranker.stop_self_pool()
-                Reranker._reranker = None
-                logging.info("Reranker model cleaned up.")
+                Reranker._registry.clear()
+                Reranker._ready = False
+                logging.info("Reranker models cleaned up.")
             except Exception as e:
                 logging.error(f"Error during cleanup: {e}")
     
-    def get_reranker(self) -> object:
+    @staticmethod
+    def load_model(model_name: str) -> object:
         """
-        Get the reranker model.
+        Load a reranker model with the configured backend.
+        
+        Args:
+            model_name (str): Name of the reranker model.
         
         Returns:
             reranker: The reranker model.
         """
-        if Reranker._reranker is None:
+        try:
+            logging.info(f"Loading reranker model {model_name}...")
+            # RERANK_BACKEND=onnx serves an int8-quantized ONNX export on CPU instead of PyTorch
+            if Reranker.backend == "onnx":
+                from onnx_reranker import OnnxReranker
+                # gunicorn_conf sets RERANK_ONNX_THREADS to each pre-forked worker's share of the cores
+                num_threads = int(os.getenv("RERANK_ONNX_THREADS", "0")) or available_cores()
+                return OnnxReranker(model_name, cache_dir="dags/.cache", num_threads=num_threads)
             from FlagEmbedding import FlagReranker
+            return FlagReranker(model_name, use_fp16=True, cache_dir="dags/.cache")
+        except Exception as e:
+            print(f"Error loading reranker model: {e}")
+            raise e
+    
+    @staticmethod
+    def attach_batcher(model_name: str, reranker: object) -> None:
+        """
+        Create the batcher of a newly loaded model.
+        
+        The registry calls this under its lock, as it calls release_model on eviction, so a
+        batcher exists exactly while its model is in the registry and never pins evicted weights.
+        
+        Args:
+            model_name (str): Name of the loaded reranker model.
+            reranker (object): The loaded reranker model.
+        """
+        scorer = Reranker(model_name=model_name)
+        Reranker._batchers[model_name] = RerankBatcher(lambda sentence_pairs: scorer.score_pairs(reranker, sentence_pairs))
+    
+    @staticmethod
+    def release_model(model_name: str) -> None:
+        """
+        Stop the batcher of an evicted model so it no longer holds the weights.
+        
+        Args:
+            model_name (str): Name of the evicted reranker model.
+        """
+        batcher = Reranker._batchers.pop(model_name, None)
+        if batcher is not None:
+            batcher.close()
+    
+    @staticmethod
+    def get_registry() -> ModelRegistry:
+        """
+        Get the registry that loads reranker models by name and keeps the most recently used ones.
+        
+        Returns:
+            registry (ModelRegistry): The model registry.
+        """
+        with Reranker._load_lock:
+            if Reranker._registry is None:
+                Reranker._registry = ModelRegistry(loader=Reranker.load_model, on_load=Reranker.attach_batcher, on_evict=Reranker.release_model)
+                atexit.register(Reranker.cleanup_reranker)
+        return Reranker._registry
+    
+    def get_reranker(self) -> object:
+        """
+        Get the reranker model, marking the service ready once the default model has loaded.
+        
+        Returns:
+            reranker: The reranker model.
+        """
+        reranker = self.get_registry().get(self.model_name)
+        if self.model_name == Reranker.model_name:
+            Reranker._ready = True
+        return reranker
+    
+    def warmup(self) -> None:
+        """
+        Load the reranker model and run one inference so the first request does not pay for it.
+        """
+        start_time = time.perf_counter()
+        reranker = self.get_reranker()
+        reranker.compute_score([["What is the capital of France?", "Paris is the capital of France."]], normalize=True)
+        logging.info(f"Reranker model {self.model_name} warmed up in {time.perf_counter() - start_time:.2f} seconds.")
+    
+    @staticmethod
+    def is_ready() -> bool:
+        """
+        Check if the default reranker model is loaded.
+        
+        Returns:
+            bool: True once the default model has been loaded by warmup or by a request, False otherwise.
+        """
+        return Reranker._ready
+    
+    def get_batcher(self) -> RerankBatcher:
+        """
+        Get the batcher that merges sentence pairs from concurrent requests into shared forward passes.
+        
+        Batchers are created and closed by the registry callbacks, so this only loads the model when needed.
+        
+        Returns:
+            batcher (RerankBatcher): The rerank batcher.
+        """
+        batcher = Reranker._batchers.get(self.model_name)
+        if batcher is None:
+            self.get_reranker()
+            batcher = Reranker._batchers.get(self.model_name)
+            if batcher is None:
+                # evicted again right after loading; score_with_batcher retries
+                raise BatcherClosedError(f"Reranker model {self.model_name} was evicted")
+        return batcher
+    
+    def get_token_store(self) -> TokenStore:
+        """
+        Get the store of passage token IDs written by the indexing pipeline.
+        
+        Returns:
+            token_store (TokenStore): The token store, or None when RERANK_TOKEN_STORE_DIR is not set.
+        """
+        if self.model_name not in Reranker._token_stores and self.token_store_dir:
+            Reranker._token_stores[self.model_name] = TokenStore(store_dir=self.token_store_dir, model_name=self.model_name, tokenizer_version=tokenizer_version())
+        return Reranker._token_stores.get(self.model_name)
+    
+    def get_token_ids(self, context: list) -> list:
+        """
+        Look up the pre-tokenized passages of structured hits.
+        
+        Args:
+            context (list): List of context, as text or structured hits.
+        
+        Returns:
+            token_ids (list): Token IDs per context item, None where the passage must be tokenized; None when no store is configured.
+        """
+        token_store = self.get_token_store()
+        if token_store is None or not any(isinstance(j, dict) for j in context):
+            return None
+        try:
+            return token_store.get_many([j.get("id") if isinstance(j, dict) else None for j in context])
+        except Exception as e:
+            logging.error(f"Error reading token store: {e}")
+            return None
+    
+    def encode_pairs(self, tokenizer: object, sentence_pairs: list) -> list:
+        """
+        Join the question and passage token IDs of each pair, tokenizing every distinct question once.
+        
+        Args:
+            tokenizer (object): Tokenizer of the reranker model.
+            sentence_pairs (list): List of [question, passage] pairs; a passage is text or a list of token IDs.
+        
+        Returns:
+            features (list): One encoding per pair, truncated to max_length on the passage side.
+        """
+        question_ids = {}
+        features = []
+        for question, passage in sentence_pairs:
+            if question not in question_ids:
+                question_ids[question] = tokenizer(question, add_special_tokens=False)["input_ids"][:self.max_length * 3 // 4]
+            passage_ids = passage if isinstance(passage, list) else tokenizer(passage, add_special_tokens=False)["input_ids"]
+            features.append(tokenizer.prepare_for_model(
+                question_ids[question],
+                passage_ids,
+                truncation="only_second",
+                max_length=self.max_length
+            ))
+        return features
+    
+    def score_pairs(self, reranker: object, sentence_pairs: list) -> list:
+        """
+        Score one bucket of pairs, skipping passage tokenization for pre-tokenized passages.
+        
+        Args:
+            reranker (object): The reranker model.
+            sentence_pairs (list): List of [question, passage] pairs; a passage is text or a list of token IDs.
+        
+        Returns:
+            scores (list): One normalized score per pair, in the same order.
+        """
+        if all(isinstance(passage, str) for _, passage in sentence_pairs):
+            return reranker.compute_score(
+                sentence_pairs,
+                batch_size=len(sentence_pairs),
+                max_length=self.max_length,
+                normalize=True
+            )
+        
+        features = self.encode_pairs(reranker.tokenizer, sentence_pairs)
+        if hasattr(reranker, "compute_score_from_features"):
+            return reranker.compute_score_from_features(features, batch_size=len(features), normalize=True)
+        
+        import torch
+        inputs = reranker.tokenizer.pad(features, padding=True, return_tensors="pt")
+        device = next(reranker.model.parameters()).device
+        with torch.no_grad():
+            logits = reranker.model(**{name: value.to(device) for name, value in inputs.items()}, return_dict=True).logits
+        return torch.sigmoid(logits.view(-1).float()).cpu().tolist()
+    
+    def get_score_cache(self) -> ScoreCache:
+        """
+        Get the cache of cross-encoder scores.
+        
+        Returns:
+            score_cache (ScoreCache): The score cache.
+        """
+        if Reranker._score_cache is None:
+            Reranker._score_cache = ScoreCache()
+        return Reranker._score_cache
+    
+    def compute_scores(self, user_question: str, context: list, token_ids: list = None) -> list:
+        """
+        Score passages against the question, sending only uncached pairs to the model.
+        
+        Args:
+            user_question (str): The user's question.
+            context (list): List of passage texts.
+            token_ids (list): Optional pre-tokenized passages, None where a passage must be tokenized.
+        
+        Returns:
+            scores (list): One score per passage, in the same order.
+        """
+        return self.compute_scores_many([user_question], [context], [token_ids])[0]
+    
+    def compute_scores_many(self, user_questions: list, contexts: list, token_ids: list = None) -> list:
+        """
+        Score the passages of several questions, packing all uncached pairs into one batcher call.
+        
+        Args:
+            user_questions (list): The questions.
+            contexts (list): List of passage texts per question.
+            token_ids (list): Optional pre-tokenized passages per question, None where a passage must be tokenized.
+        
+        Returns:
+            scores (list): One list of scores per question, in the same order as the passages.
+        """
+        score_cache = self.get_score_cache()
+        token_ids = token_ids or [None] * len(contexts)
+        keys = []
+        missing = {}
+        for user_question, context, ids in zip(user_questions, contexts, token_ids):
+            question_keys = [score_cache.make_key(self.model_name, user_question, j, self.backend, self.max_length) for j in context]
+            keys.append(question_keys)
+            for key, j, passage_ids in zip(question_keys, context, ids or [None] * len(context)):
+                missing.setdefault(key, [user_question, j if passage_ids is None else passage_ids])
+        scores = score_cache.get_many(list(missing))
+        
+        missing = [(key, pair) for key, pair in missing.items() if key not in scores]
+        if missing:
+            logging.info(f"Scoring {len(missing)} of {sum(len(j) for j in contexts)} pairs; the rest are cached")
+            new_scores = dict(zip([key for key, _ in missing], self.score_with_batcher([pair for _, pair in missing])))
+            score_cache.put_many(new_scores)
+            scores.update(new_scores)
+        return [[scores[key] for key in question_keys] for question_keys in keys]
+    
+    def score_with_batcher(self, sentence_pairs: list, attempts: int = 3) -> list:
+        """
+        Score pairs with the model's batcher, moving to a new batcher if the model was evicted meanwhile.
+        
+        Evicting a model closes its batcher after the pairs already queued are scored, so a
+        request that picked up the batcher just before the eviction reloads the model instead
+        of failing.
+        
+        Args:
+            sentence_pairs (list): List of [question, passage] pairs.
+            attempts (int): Number of batchers tried before giving up. Defaults to 3.
+        
+        Returns:
+            scores (list): One score per pair, in the same order.
+        """
+        for attempt in range(1, attempts + 1):
             try:
-                Reranker._reranker = FlagReranker('BAAI/bge-reranker-v2-m3', use_fp16=True, cache_dir="dags/.cache")
-                atexit.register(self.cleanup_reranker)
-                logging.info("Loading reranker model...")
-            except Exception as e:
-                print(f"Error loading reranker model: {e}")
-                raise e
-            
-        return Reranker._reranker
+                return self.get_batcher().compute_score(sentence_pairs)
+            except BatcherClosedError:
+                if attempt == attempts:
+                    raise
+                logging.warning(f"Batcher of {self.model_name} was closed by an eviction; retrying ({attempt}/{attempts})")
     
-    def rerank_context(self, user_question: str, context: list, topk: int = 5) -> list:
+    def get_cascade_reranker(self) -> object:
+        """
+        Get the small cross-encoder used as the first stage of cascade reranking.
+        
+        Returns:
+            reranker: The first-stage reranker model.
+        """
+        return self.get_registry().get(self.cascade_model_name)
+    
+    def prefilter_context(self, user_question: str, context: list, topn: int = None, threshold: float = None) -> list:
+        """
+        Prune the candidates with a cheap first stage before the large cross-encoder.
+        
+        Retrieval scores are only comparable within one retrieval type: cosine for similarity,
+        expert and keyword search, unbounded BM25 scores, and rank-based fused scores. Structured
+        hits that all carry the same "types" are ranked by that score, which costs nothing;
+        any other mix, plain text, or a threshold is scored by the small cascade cross-encoder.
+        
+        Args:
+            user_question (str): The user's question.
+            context (list): List of context, as text or structured hits.
+            topn (int): Number of candidates kept for the second stage. Defaults to env RERANK_CASCADE_TOPN or 10.
+            threshold (float): Drop candidates whose normalized cascade cross-encoder score, in [0, 1], is below this value.
+        
+        Returns:
+            context (list): The kept candidates, best first.
+        """
+        topn = topn or self.cascade_topn
+        score_types = {j.get("types") if isinstance(j, dict) and isinstance(j.get("score"), (int, float)) else None for j in context}
+        if threshold is None and len(score_types) == 1 and None not in score_types:
+            scores = [j["score"] for j in context]
+        else:
+            sentence_pairs = [[user_question, context_text(j)] for j in context]
+            scores = self.get_cascade_reranker().compute_score(sentence_pairs, max_length=self.max_length, normalize=True)
+            scores = scores if isinstance(scores, list) else [scores]
+        
+        ranked = sorted(zip(context, scores), key=lambda x: x[1], reverse=True)
+        kept = [j for j, score in ranked if threshold is None or score >= threshold][:topn]
+        logging.info(f"Cascade first stage kept {len(kept)} of {len(context)} candidates")
+        return kept
+    
+    def adaptive_cutoff(self, scores: list, topk: int, cutoff: str, cutoff_value: float = None, min_k: int = 1) -> int:
+        """
+        Decide how many of the sorted results to keep, so weak contexts do not inflate the LLM prompt.
+        
+        Args:
+            scores (list): Normalized scores sorted in descending order.
+            topk (int): Maximum number of results to keep.
+            cutoff (str): "threshold" keeps scores of at least cutoff_value, "gap" cuts at the largest drop
+                between neighbours if it is at least cutoff_value, "mass" keeps the shortest prefix holding
+                cutoff_value of the total score.
+            cutoff_value (float): Parameter of the rule. Defaults to env RERANK_CUTOFF_THRESHOLD, RERANK_CUTOFF_GAP or RERANK_CUTOFF_MASS.
+            min_k (int): Minimum number of results to keep. Defaults to 1.
+        
+        Returns:
+            num_kept (int): Number of results to keep.
+        """
+        if cutoff not in self.cutoff_defaults:
+            raise ValueError(f"Unknown cutoff rule {cutoff}; choose one of {sorted(self.cutoff_defaults)}")
+        cutoff_value = self.cutoff_defaults[cutoff] if cutoff_value is None else cutoff_value
+        scores = scores[:topk]
+        if cutoff == "threshold":
+            num_kept = sum(1 for score in scores if score >= cutoff_value)
+        elif cutoff == "gap":
+            gaps = [scores[i] - scores[i + 1] for i in range(len(scores) - 1)]
+            largest = max(range(len(gaps)), key=lambda i: gaps[i]) if gaps else None
+            num_kept = largest + 1 if largest is not None and gaps[largest] >= cutoff_value else len(scores)
+        else:
+            total = sum(scores)
+            num_kept, cumulative = 0, 0.0
+            while num_kept < len(scores) and (total <= 0 or cumulative < cutoff_value * total):
+                cumulative += scores[num_kept]
+                num_kept += 1
+        return max(min(min_k, len(scores)), min(num_kept, topk))
+    
+    def rerank_context(self, user_question: str, context: list, topk: int = 5, cascade: bool = False,
+                       cascade_topn: int = None, cascade_threshold: float = None, cutoff: str = None,
+                       cutoff_value: float = None, min_k: int = 1, with_scores: bool = False) -> list:
         """
         Rerank the context based on the user question using a reranker model.
         
         Args:
             user_question (str): The user's question.
-            context (list): List of context to be reranked.
+            context (list): List of context to be reranked, as text or structured hits.
             topk (int): Number of top results to return. Defaults to 5.
+            cascade (bool): Prune the candidates with a cheap first stage before the reranker model. Defaults to False.
+            cascade_topn (int): Number of candidates kept by the first stage.
+            cascade_threshold (float): Minimum normalized cascade cross-encoder score, in [0, 1], of a kept candidate.
+            cutoff (str): Adaptive cut-off rule, "threshold", "gap" or "mass"; None always returns topk results.
+            cutoff_value (float): Parameter of the cut-off rule.
+            min_k (int): Minimum number of results kept by the cut-off rule. Defaults to 1.
+            with_scores (bool): Return dicts with the context, its score and whether it was kept. Defaults to False.
             
         Returns:
             sorted_result (list): A list of sorted context based on relevance to the user question.
         """
         try:
-            reranker = self.get_reranker()
+            context, token_ids = self.prepare_context(user_question, context, topk, cascade, cascade_topn, cascade_threshold)
             logging.info("Reranking context...")
-            sentence_pairs = [[user_question, j] for j in context]
-            scores = reranker.compute_score(sentence_pairs, normalize=True)
-            sorted_result = [point for point, _ in sorted(zip(context, scores), key=lambda x: x[1], reverse=True)][:topk]
-            return sorted_result
+            scores = self.compute_scores(user_question, context, token_ids)
+            return self.rank_context(context, scores, topk, cutoff, cutoff_value, min_k, with_scores)
         except Exception as e:
             logging.error(f"Error during reranking: {e}")
-            return context            
+            raise e
     
-    def rerank(self, topk: int = 5, **kwargs) -> list:
+    def prepare_context(self, user_question: str, context: list, topk: int = 5, cascade: bool = False,
+                        cascade_topn: int = None, cascade_threshold: float = None) -> tuple:
+        """
+        Apply the cascade first stage and look up pre-tokenized passages before scoring.
+        
+        Args:
+            user_question (str): The user's question.
+            context (list): List of context, as text or structured hits.
+            topk (int): Number of top results to return. Defaults to 5.
+            cascade (bool): Prune the candidates with a cheap first stage. Defaults to False.
+            cascade_topn (int): Number of candidates kept by the first stage.
+            cascade_threshold (float): Minimum normalized cascade cross-encoder score, in [0, 1], of a kept candidate.
+        
+        Returns:
+            prepared (tuple): The passage texts and their token IDs (None when not stored).
+        """
+        if cascade:
+            context = self.prefilter_context(user_question, context, max(cascade_topn or self.cascade_topn, topk), cascade_threshold)
+        token_ids = self.get_token_ids(context)
+        return [context_text(j) for j in context], token_ids
+    
+    def rank_context(self, context: list, scores: list, topk: int = 5, cutoff: str = None,
+                     cutoff_value: float = None, min_k: int = 1, with_scores: bool = False) -> list:
+        """
+        Sort scored passages and keep the top results.
+        
+        Args:
+            context (list): List of passage texts.
+            scores (list): One score per passage.
+            topk (int): Number of top results to return. Defaults to 5.
+            cutoff (str): Adaptive cut-off rule, "threshold", "gap" or "mass"; None always returns topk results.
+            cutoff_value (float): Parameter of the cut-off rule.
+            min_k (int): Minimum number of results kept by the cut-off rule. Defaults to 1.
+            with_scores (bool): Return dicts with the context, its score and whether it was kept. Defaults to False.
+        
+        Returns:
+            sorted_result (list): A list of sorted context based on relevance to the user question.
+        """
+        ranked = sorted(zip(context, scores), key=lambda x: x[1], reverse=True)[:topk]
+        num_kept = len(ranked)
+        if cutoff:
+            num_kept = self.adaptive_cutoff([score for _, score in ranked], topk, cutoff, cutoff_value, min_k)
+            logging.info(f"Adaptive {cutoff} cut-off kept {num_kept} of {len(ranked)} results")
+        if with_scores:
+            return [{"context": point, "score": float(score), "kept": rank < num_kept} for rank, (point, score) in enumerate(ranked)]
+        return [point for point, _ in ranked][:num_kept]
+    
+    def rerank_batch(self, groups: list, topk: int = 5, cascade: bool = False, cascade_topn: int = None,
+                     cascade_threshold: float = None, cutoff: str = None, cutoff_value: float = None,
+                     min_k: int = 1, with_scores: bool = False) -> list:
+        """
+        Rerank the candidates of many questions at once, scoring the pairs of all questions in shared batches.
+        
+        Args:
+            groups (list): Dicts with "user_question", "context" and an optional per-question "topk".
+            topk (int): Number of top results per question when a group has no topk. Defaults to 5.
+            cascade (bool): Prune the candidates with a cheap first stage before the reranker model. Defaults to False.
+            cascade_topn (int): Number of candidates kept by the first stage.
+            cascade_threshold (float): Minimum normalized cascade cross-encoder score, in [0, 1], of a kept candidate.
+            cutoff (str): Adaptive cut-off rule, "threshold", "gap" or "mass"; None always returns topk results.
+            cutoff_value (float): Parameter of the cut-off rule.
+            min_k (int): Minimum number of results kept by the cut-off rule. Defaults to 1.
+            with_scores (bool): Return dicts with the context, its score and whether it was kept. Defaults to False.
+        
+        Returns:
+            sorted_results (list): One sorted result list per group, in the same order.
+        """
+        try:
+            topks = [group.get("topk") or topk for group in groups]
+            prepared = [
+                self.prepare_context(group["user_question"], group["context"], group_topk, cascade, cascade_topn, cascade_threshold)
+                for group, group_topk in zip(groups, topks)
+            ]
+            logging.info(f"Reranking {sum(len(context) for context, _ in prepared)} passages for {len(groups)} questions...")
+            scores = self.compute_scores_many(
+                [group["user_question"] for group in groups],
+                [context for context, _ in prepared],
+                [token_ids for _, token_ids in prepared]
+            )
+            return [
+                self.rank_context(context, question_scores, group_topk, cutoff, cutoff_value, min_k, with_scores)
+                for (context, _), question_scores, group_topk in zip(prepared, scores, topks)
+            ]
+        except Exception as e:
+            logging.error(f"Error during batch reranking: {e}")
+            raise e
+    
+    def rerank(self, topk: int = 5, cascade: bool = False, cascade_topn: int = None, cascade_threshold: float = None,
+               cutoff: str = None, cutoff_value: float = None, min_k: int = 1, with_scores: bool = False, **kwargs) -> list:
         """
         Rerank the context based on the user question using a reranker model.
         
         Args:
             topk (int): Number of top results to return. Defaults to 5.
+            cascade (bool): Prune the candidates with a cheap first stage before the reranker model. Defaults to False.
+            cascade_topn (int): Number of candidates kept by the first stage.
+            cascade_threshold (float): Minimum normalized cascade cross-encoder score, in [0, 1], of a kept candidate.
+            cutoff (str): Adaptive cut-off rule, "threshold", "gap" or "mass"; None always returns topk results.
+            cutoff_value (float): Parameter of the cut-off rule.
+            min_k (int): Minimum number of results kept by the cut-off rule. Defaults to 1.
+            with_scores (bool): Return dicts with the context, its score and whether it was kept. Defaults to False.
             **kwargs: Additional arguments.
         
         Returns:
@@ -122,7 +597,14 @@ class Reranker:
                 sorted_result = self.rerank_context(
                     user_question=user_question, 
                     context=context, 
-                    topk=topk
+                    topk=topk,
+                    cascade=cascade,
+                    cascade_topn=cascade_topn,
+                    cascade_threshold=cascade_threshold,
+                    cutoff=cutoff,
+                    cutoff_value=cutoff_value,
+                    min_k=min_k,
+                    with_scores=with_scores
                 )
                 logging.info(f"Reranking result: {sorted_result}")
             else:
@@ -131,6 +613,7 @@ class Reranker:
             
             return sorted_result
         except Exception as e:
-            logging.error(f"Error retrieving user question: {e}")
-            return []
+            # Failures surface to the caller, which decides whether to fall back to unranked results
+            logging.error(f"Error during reranking: {e}")
+            raise e
         
\ No newline at end of file
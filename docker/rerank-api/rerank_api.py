@@ -1,7 +1,9 @@
 import os
+import signal
 import logging
 import threading
-from typing import Optional
+import multiprocessing
+from typing import List, Literal, Optional, Union
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from rerank import Reranker
@@ -13,14 +15,44 @@ logger = logging.getLogger("rerank-api")
 
 app = FastAPI(title="Rerank API", description="API for rerank tasks")
 
-last_used_time = time.time()
+# 以共享記憶體保存最後使用時間，pre-fork 模式下所有 worker 共用同一個值
+last_used_time = multiprocessing.Value('d', time.time(), lock=False)
 INACTIVITY_TIMEOUT = 300
+PREFORK = os.getenv("RERANK_PREFORK", "false").lower() == "true"
+PRELOAD = os.getenv("RERANK_PRELOAD", "true").lower() == "true"
+PRELOAD_RETRIES = max(1, int(os.getenv("RERANK_PRELOAD_RETRIES", "5")))
+# 預載重試用盡後設定，讓存活檢查失敗而由 Kubernetes 重啟 Pod
+preload_failed = threading.Event()
 
 class RerankRequest(BaseModel):
     topk: int = 5
+    model: Optional[str] = None
     user_question: str
-    similarity_results: Optional[str] = None
-    keyword_results: Optional[str] = None
+    similarity_results: Optional[Union[str, list]] = None
+    keyword_results: Optional[Union[str, list]] = None
+    cascade: bool = False
+    cascade_topn: Optional[int] = None
+    cascade_threshold: Optional[float] = None
+    cutoff: Optional[Literal["threshold", "gap", "mass"]] = None
+    cutoff_value: Optional[float] = None
+    min_k: int = 1
+
+class RerankGroup(BaseModel):
+    user_question: str
+    similarity_results: Optional[Union[str, list]] = None
+    keyword_results: Optional[Union[str, list]] = None
+    topk: Optional[int] = None
+
+class RerankBatchRequest(BaseModel):
+    groups: List[RerankGroup]
+    topk: int = 5
+    model: Optional[str] = None
+    cascade: bool = False
+    cascade_topn: Optional[int] = None
+    cascade_threshold: Optional[float] = None
+    cutoff: Optional[Literal["threshold", "gap", "mass"]] = None
+    cutoff_value: Optional[float] = None
+    min_k: int = 1
 
 class MockTi:
     def __init__(self, user_question: str, similarity_results: str = None, keyword_results: str = None):
@@ -37,6 +69,9 @@ class MockTi:
                     logging.info("No similarity results provided.")
                     return []
                 
+                if isinstance(self.similarity_results, list):
+                    return self.similarity_results
+                
                 import ast
                 results = ast.literal_eval(self.similarity_results) if self.similarity_results else []
                 logging.info(f"Parsed similarity results: {results}")
@@ -50,6 +85,9 @@ class MockTi:
                     logging.info("No keyword results provided.")
                     return []
                 
+                if isinstance(self.keyword_results, list):
+                    return self.keyword_results
+                
                 import ast
                 results = ast.literal_eval(self.keyword_results) if self.keyword_results else []
                 logging.info(f"Parsed keyword results: {results}")
@@ -61,23 +99,50 @@ class MockTi:
 
 def update_last_used_time():
     """更新最後使用時間"""
-    global last_used_time
-    last_used_time = time.time()
+    last_used_time.value = time.time()
 
 def inactivity_monitor():
     """監控不活躍時間的函數"""
-    global last_used_time
     while True:
         time.sleep(60)  # 每分鐘檢查一次
-        if time.time() - last_used_time > INACTIVITY_TIMEOUT:
+        if time.time() - last_used_time.value > INACTIVITY_TIMEOUT:
             logger.info(f"No activity for {INACTIVITY_TIMEOUT} seconds, shutting down...")
+            if PREFORK:
+                # 由 master 關閉所有 worker，避免單一 worker 結束後又被重新 fork
+                os.kill(os.getppid(), signal.SIGTERM)
             os._exit(0)
 
+def preload_reranker():
+    """在背景載入模型並暖機，完成後 /ready 才會通過；失敗時以指數退避重試"""
+    for attempt in range(1, PRELOAD_RETRIES + 1):
+        try:
+            Reranker().warmup()
+            return
+        except Exception as e:
+            logger.error(f"Error preloading reranker model (attempt {attempt}/{PRELOAD_RETRIES}): {e}")
+        if attempt < PRELOAD_RETRIES:
+            time.sleep(min(60, 5 * 2 ** (attempt - 1)))
+    # 期間若已有請求成功載入模型，就不必重啟
+    if not Reranker.is_ready():
+        preload_failed.set()
+
 @app.get("/")
 def root():
-    """健康檢查接口"""
+    """健康檢查接口，預載重試用盡且模型仍未載入時回傳 503"""
     update_last_used_time()
-    return {"status": "healthy", "service": "rerank-api"}
+    if preload_failed.is_set() and not Reranker.is_ready():
+        raise HTTPException(status_code=503, detail="Reranker model failed to load")
+    batcher_stats = {model_name: batcher.stats() for model_name, batcher in list(Reranker._batchers.items())}
+    cache_stats = Reranker._score_cache.stats() if Reranker._score_cache else None
+    model_stats = Reranker._registry.stats() if Reranker._registry else None
+    return {"status": "healthy", "service": "rerank-api", "models": model_stats, "batcher": batcher_stats, "score_cache": cache_stats}
+
+@app.get("/ready")
+def ready():
+    """就緒檢查接口，預載模型完成前回傳 503；未預載時模型由第一個請求載入，因此直接就緒"""
+    if PRELOAD and not Reranker.is_ready():
+        raise HTTPException(status_code=503, detail="Reranker model is still loading")
+    return {"status": "ready", "service": "rerank-api", "model": Reranker.model_name}
 
 @app.post("/rerank")
 def rerank(request: RerankRequest):
@@ -86,30 +151,104 @@ def rerank(request: RerankRequest):
     
     try:
         logger.info(f"Rerank object created with: {request}")
-        rerank_obj = Reranker()
+        rerank_obj = Reranker(model_name=request.model)
+        # 先載入模型，名稱不在允許清單時直接回傳 400
+        rerank_obj.get_reranker()
         
         mock_ti = MockTi(
             user_question=request.user_question,
             similarity_results=request.similarity_results,
             keyword_results=request.keyword_results
         )
+        context = rerank_obj.get_context(mock_ti)
         
-        result = rerank_obj.rerank(
+        # 直接呼叫 rerank_context，評分失敗時回傳 500，而不是未排序的內容
+        scored = rerank_obj.rerank_context(
+            user_question=rerank_obj.get_user_question(mock_ti),
+            context=context,
             topk=request.topk,
-            ti=mock_ti
-        )
+            cascade=request.cascade,
+            cascade_topn=request.cascade_topn,
+            cascade_threshold=request.cascade_threshold,
+            cutoff=request.cutoff,
+            cutoff_value=request.cutoff_value,
+            min_k=request.min_k,
+            with_scores=True
+        ) if context else []
         
-        return {"status": "success", "result": result}
+        # result 只保留通過截斷的內容，scores 另外列出前 topk 筆的分數與是否被截斷
+        return {"status": "success", "result": [item["context"] for item in scored if item["kept"]], "scores": scored}
+    except ValueError as e:
+        logger.error(f"Invalid rerank model: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error during rerank: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/rerank/batch")
+def rerank_batch(request: RerankBatchRequest):
+    """一次重排多個問題的接口，所有問題的句對合併成批次送入模型"""
+    update_last_used_time()
+    
+    try:
+        logger.info(f"Batch rerank object created for {len(request.groups)} questions")
+        rerank_obj = Reranker(model_name=request.model)
+        # 先載入模型，名稱不在允許清單時直接回傳 400
+        rerank_obj.get_reranker()
+        
+        # 沿用單一問題的解析與去重邏輯
+        groups = []
+        for group in request.groups:
+            mock_ti = MockTi(
+                user_question=group.user_question,
+                similarity_results=group.similarity_results,
+                keyword_results=group.keyword_results
+            )
+            groups.append({
+                "user_question": rerank_obj.get_user_question(mock_ti),
+                "context": rerank_obj.get_context(mock_ti),
+                "topk": group.topk
+            })
+        
+        results = rerank_obj.rerank_batch(
+            groups=groups,
+            topk=request.topk,
+            cascade=request.cascade,
+            cascade_topn=request.cascade_topn,
+            cascade_threshold=request.cascade_threshold,
+            cutoff=request.cutoff,
+            cutoff_value=request.cutoff_value,
+            min_k=request.min_k,
+            with_scores=True
+        )
+        
+        return {
+            "status": "success",
+            "results": [
+                {
+                    "user_question": group["user_question"],
+                    "result": [item["context"] for item in scored if item["kept"]],
+                    "scores": scored
+                }
+                for group, scored in zip(groups, results)
+            ]
+        }
+    except ValueError as e:
+        logger.error(f"Invalid rerank model: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error during batch rerank: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.on_event("startup")
 def startup_event():
     """啟動時的事件處理"""
     logger.info("Rerank API starting up...")
     monitor_thread = threading.Thread(target=inactivity_monitor, daemon=True)
     monitor_thread.start()
+    if PRELOAD:
+        preload_thread = threading.Thread(target=preload_reranker, daemon=True)
+        preload_thread.start()
 
 if __name__ == "__main__":
     uvicorn.run("rerank_api:app", host="0.0.0.0", port=8001, reload=False)
\ No newline at end of file
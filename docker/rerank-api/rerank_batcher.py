@@ -0,0 +1,179 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+
+class BatcherClosedError(RuntimeError):
+    """Raised when pairs are submitted to a batcher that was closed because its model was evicted."""
+
+
+class RerankBatcher:
+    def __init__(self, score_fn, max_batch_pairs: int = None, max_wait_ms: float = None, bucket_size: int = None):
+        """
+        Initialize the RerankBatcher class.
+
+        Sentence pairs from concurrent requests are merged into shared forward passes by a
+        single worker thread, and the scores are split back to each waiting request.
+        Merged pairs are sorted by length and scored in buckets of similar length, so short
+        pairs are not padded to the longest passage of the batch.
+
+        Args:
+            score_fn (callable): Function mapping a list of [question, passage] pairs to a list of scores.
+            max_batch_pairs (int): Stop collecting once this many pairs are queued. Defaults to env RERANK_MAX_BATCH_PAIRS or 128.
+            max_wait_ms (float): Maximum time the first request waits for others. Defaults to env RERANK_MAX_WAIT_MS or 10.
+            bucket_size (int): Pairs per forward pass after length sorting. Defaults to env RERANK_BUCKET_SIZE or 16.
+        """
+        self.score_fn = score_fn
+        self.max_batch_pairs = max(1, max_batch_pairs or int(os.getenv("RERANK_MAX_BATCH_PAIRS", "128")))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("RERANK_MAX_WAIT_MS", "10"))) / 1000
+        self.bucket_size = max(1, bucket_size or int(os.getenv("RERANK_BUCKET_SIZE", "16")))
+        self.requests = queue.Queue()
+        self.worker = None
+        self.closed = False
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.pairs = 0
+        self.merged_requests = 0
+
+    def compute_score(self, sentence_pairs: list) -> list:
+        """
+        Score sentence pairs in the next shared forward pass.
+
+        Args:
+            sentence_pairs (list): List of [question, passage] pairs.
+
+        Returns:
+            scores (list): One score per pair, in the same order.
+        """
+        if not sentence_pairs:
+            return []
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise BatcherClosedError("Rerank batcher is closed")
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self.run, name="rerank-batcher", daemon=True)
+                self.worker.start()
+            self.requests.put((sentence_pairs, future))
+        return future.result()
+    
+    def close(self) -> None:
+        """
+        Stop the worker once the requests already queued have been scored, releasing the model it holds.
+        """
+        with self.lock:
+            self.closed = True
+            self.requests.put(None)
+
+    def collect(self) -> list:
+        """
+        Block for the first request, then collect more until the batch is full or the wait expires.
+
+        Returns:
+            batch (list): (sentence_pairs, future) tuples; None once the batcher is closed and drained.
+        """
+        request = self.requests.get()
+        if request is None:
+            return None
+        batch = [request]
+        num_pairs = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while num_pairs < self.max_batch_pairs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # the close marker is the last item queued; score what was collected first
+                self.requests.put(None)
+                break
+            batch.append(request)
+            num_pairs += len(request[0])
+        return batch
+
+    def run(self) -> None:
+        """
+        Worker loop: score each collected batch with one call and split the scores back.
+        """
+        while True:
+            batch = self.collect()
+            if batch is None:
+                return
+            sentence_pairs = [pair for pairs, _ in batch for pair in pairs]
+            try:
+                scores = self.score_in_buckets(sentence_pairs)
+                logging.info(f"Scored {len(sentence_pairs)} pairs from {len(batch)} requests in one batch")
+                offset = 0
+                for pairs, future in batch:
+                    future.set_result(scores[offset:offset + len(pairs)])
+                    offset += len(pairs)
+                self.batches += 1
+                self.pairs += len(sentence_pairs)
+                self.merged_requests += len(batch)
+            except Exception as e:
+                logging.error(f"Error scoring rerank batch: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    @staticmethod
+    def estimate_tokens(text: object) -> int:
+        """
+        Estimate the token count of a text, or count pre-tokenized IDs.
+
+        About four UTF-8 bytes per token holds for English subwords and for CJK characters,
+        which take three bytes and are mostly a token each, so texts and stored token IDs
+        are sorted on one scale.
+
+        Args:
+            text (object): Text, or a list of token IDs.
+
+        Returns:
+            num_tokens (int): Number of tokens.
+        """
+        if isinstance(text, list):
+            return len(text)
+        return len(text.encode("utf-8")) // 4 + 1
+
+    def score_in_buckets(self, sentence_pairs: list) -> list:
+        """
+        Score pairs longest-first in buckets of similar token length and restore the original order.
+
+        Args:
+            sentence_pairs (list): List of [question, passage] pairs; a passage is text or a list of token IDs.
+
+        Returns:
+            scores (list): One score per pair, in the original order.
+        """
+        lengths = [self.estimate_tokens(question) + self.estimate_tokens(passage) for question, passage in sentence_pairs]
+        order = sorted(range(len(sentence_pairs)), key=lambda index: -lengths[index])
+        scores = [0.0] * len(sentence_pairs)
+        for offset in range(0, len(order), self.bucket_size):
+            bucket = order[offset:offset + self.bucket_size]
+            bucket_scores = self.score_fn([sentence_pairs[index] for index in bucket])
+            # FlagReranker returns a bare float when it scores a single pair
+            bucket_scores = bucket_scores.tolist() if hasattr(bucket_scores, "tolist") else bucket_scores
+            bucket_scores = list(bucket_scores) if isinstance(bucket_scores, (list, tuple)) else [bucket_scores]
+            for index, score in zip(bucket, bucket_scores):
+                scores[index] = score
+        return scores
+
+    def stats(self) -> dict:
+        """
+        Get batching statistics.
+
+        Returns:
+            stats (dict): Number of batches, scored pairs and requests, and the average batch size.
+        """
+        return {
+            "batches": self.batches,
+            "pairs": self.pairs,
+            "requests": self.merged_requests,
+            "average_batch_pairs": round(self.pairs / self.batches, 2) if self.batches else 0,
+        }
@@ -0,0 +1,17 @@
+def context_text(context: object) -> str:
+    """
+    Get the passage text of a plain or structured retrieval result.
+
+    Structured hits carry the passage in payload["document"], or in payload["answer"]
+    for expert collections.
+
+    Args:
+        context (object): A text passage or a dict with "id", "score", "types" and "payload".
+
+    Returns:
+        text (str): The passage text.
+    """
+    if isinstance(context, dict):
+        payload = context.get("payload") or {}
+        return str(payload.get("document", payload.get("answer", "")))
+    return str(context)
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+class ScoreCache:
+    def __init__(self, max_entries: int = None, cache_dir: str = None):
+        """
+        Initialize the ScoreCache class.
+
+        Cross-encoder scores are kept in a bounded in-memory LRU, backed by an optional
+        SQLite file so they survive restarts and can be shared between workers.
+
+        Args:
+            max_entries (int): Capacity of the in-memory LRU. Defaults to env RERANK_CACHE_SIZE or 100000.
+            cache_dir (str): Directory of the on-disk tier. Defaults to env RERANK_CACHE_DIR; disabled when empty.
+        """
+        self.max_entries = max_entries or int(os.getenv("RERANK_CACHE_SIZE", "100000"))
+        self.cache_dir = cache_dir if cache_dir is not None else os.getenv("RERANK_CACHE_DIR", "")
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.connection = None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.connection = sqlite3.connect(os.path.join(self.cache_dir, "rerank_scores.sqlite3"), check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL NOT NULL)")
+            self.connection.commit()
+            logging.info(f"Rerank score cache persisted in {self.cache_dir}")
+
+    @staticmethod
+    def make_key(model_name: str, question: str, passage: str, backend: str = "torch", max_length: int = 512) -> str:
+        """
+        Build the cache key of a (question, passage) pair.
+
+        The backend and max_length are part of the key because the on-disk tier outlives
+        restarts: an int8 ONNX model or a different truncation scores the same pair differently.
+
+        Args:
+            model_name (str): Name of the reranker model.
+            question (str): The user's question.
+            passage (str): The passage text.
+            backend (str): Inference backend, "torch" or "onnx". Defaults to "torch".
+            max_length (int): Maximum tokens per pair. Defaults to 512.
+
+        Returns:
+            key (str): Model name, backend and max_length plus the SHA-1 hashes of the question and the passage.
+        """
+        question_hash = hashlib.sha1(question.encode("utf-8")).hexdigest()
+        passage_hash = hashlib.sha1(passage.encode("utf-8")).hexdigest()
+        return f"{model_name}:{backend}:{max_length}:{question_hash}:{passage_hash}"
+
+    def get_many(self, keys: list) -> dict:
+        """
+        Look up scores, promoting disk hits into the in-memory LRU.
+
+        Args:
+            keys (list): Cache keys.
+
+        Returns:
+            scores (dict): Cached scores keyed by cache key; missing keys are absent.
+        """
+        scores = {}
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    scores[key] = self.entries[key]
+            self.hits += len(scores)
+
+            missing = [key for key in dict.fromkeys(keys) if key not in scores]
+            if missing and self.connection is not None:
+                for offset in range(0, len(missing), 500):
+                    chunk = missing[offset:offset + 500]
+                    rows = self.connection.execute(
+                        f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    for key, score in rows:
+                        scores[key] = score
+                        self.store(key, score)
+                    self.disk_hits += len(rows)
+            self.misses += len([key for key in missing if key not in scores])
+        return scores
+
+    def put_many(self, scores: dict) -> None:
+        """
+        Store scores in the in-memory LRU and the on-disk tier.
+
+        Args:
+            scores (dict): Scores keyed by cache key.
+        """
+        if not scores:
+            return
+        with self.lock:
+            for key, score in scores.items():
+                self.store(key, score)
+            if self.connection is not None:
+                self.connection.executemany("INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)", list(scores.items()))
+                self.connection.commit()
+
+    def store(self, key: str, score: float) -> None:
+        """
+        Insert a score into the in-memory LRU, evicting the least recently used entries. Caller holds the lock.
+
+        Args:
+            key (str): Cache key.
+            score (float): Cross-encoder score.
+        """
+        self.entries[key] = score
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            stats (dict): Entry count, memory hits, disk hits and misses.
+        """
+        return {"entries": len(self.entries), "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
@@ -0,0 +1,212 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from model_registry import ModelRegistry
+from rerank import Reranker
+from rerank_batcher import BatcherClosedError, RerankBatcher
+
+
+class FakeReranker:
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def compute_score(self, sentence_pairs: list, **kwargs) -> list:
+        return [float(len(passage)) for _, passage in sentence_pairs]
+
+
+class FakeLoader:
+    def __init__(self, fail: set = None, gates: dict = None):
+        self.fail = fail or set()
+        self.gates = gates or {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, model_name: str) -> FakeReranker:
+        with self.lock:
+            self.calls.append(model_name)
+        if model_name in self.gates:
+            self.gates[model_name].wait(timeout=5)
+        if model_name in self.fail:
+            raise RuntimeError(f"cannot load {model_name}")
+        return FakeReranker(model_name)
+
+
+@pytest.fixture
+def reranker_state():
+    saved = (Reranker._registry, dict(Reranker._batchers), Reranker._score_cache, Reranker._ready)
+    Reranker._batchers.clear()
+    Reranker._score_cache = None
+    yield
+    for batcher in Reranker._batchers.values():
+        batcher.close()
+    Reranker._registry, batchers, Reranker._score_cache, Reranker._ready = saved
+    Reranker._batchers.clear()
+    Reranker._batchers.update(batchers)
+
+
+def test_loaded_model_is_reused():
+    loader = FakeLoader()
+    registry = ModelRegistry(loader, max_models=2, allowed_models=[])
+
+    assert registry.get("a") is registry.get("a")
+    assert loader.calls == ["a"]
+
+
+def test_least_recently_used_model_is_evicted():
+    evicted = []
+    registry = ModelRegistry(FakeLoader(), max_models=2, allowed_models=[], on_evict=evicted.append)
+
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+
+    assert evicted == ["b"]
+    assert list(registry.stats()["models"]) == ["a", "c"]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_failed_load_keeps_loaded_models():
+    evicted = []
+    loader = FakeLoader(fail={"broken"})
+    registry = ModelRegistry(loader, max_models=1, allowed_models=[], on_evict=evicted.append)
+    model = registry.get("a")
+
+    with pytest.raises(RuntimeError):
+        registry.get("broken")
+
+    assert evicted == []
+    assert registry.get("a") is model
+    assert registry.loading == {}
+    # the failure is not cached, so the next request tries again
+    with pytest.raises(RuntimeError):
+        registry.get("broken")
+    assert loader.calls.count("broken") == 2
+
+
+def test_disallowed_model_is_rejected():
+    loader = FakeLoader()
+    registry = ModelRegistry(loader, allowed_models=["a"])
+
+    with pytest.raises(ValueError):
+        registry.get("b")
+    assert loader.calls == []
+
+
+def test_concurrent_requests_share_one_load():
+    gate = threading.Event()
+    loader = FakeLoader(gates={"a": gate})
+    registry = ModelRegistry(loader, max_models=2, allowed_models=[])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(registry.get, "a") for _ in range(8)]
+        gate.set()
+        models = [future.result(timeout=5) for future in futures]
+
+    assert loader.calls == ["a"]
+    assert all(model is models[0] for model in models)
+
+
+def test_concurrent_requests_share_a_failed_load():
+    gate = threading.Event()
+    loader = FakeLoader(fail={"a"}, gates={"a": gate})
+    registry = ModelRegistry(loader, max_models=2, allowed_models=[])
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(registry.get, "a") for _ in range(4)]
+        gate.set()
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+
+    assert loader.calls == ["a"]
+
+
+def test_loaded_model_does_not_wait_for_another_load():
+    gate = threading.Event()
+    registry = ModelRegistry(FakeLoader(gates={"slow": gate}), max_models=2, allowed_models=[])
+    model = registry.get("a")
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        slow = pool.submit(registry.get, "slow")
+        assert registry.get("a") is model
+        assert not slow.done()
+        gate.set()
+        slow.result(timeout=5)
+
+
+def test_closed_batcher_scores_queued_pairs_and_rejects_new_ones():
+    release = threading.Event()
+
+    def score_fn(sentence_pairs):
+        release.wait(timeout=5)
+        return [1.0] * len(sentence_pairs)
+
+    batcher = RerankBatcher(score_fn, max_wait_ms=0)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        queued = pool.submit(batcher.compute_score, [["q", "p"]])
+        while batcher.worker is None:
+            pass
+        batcher.close()
+        release.set()
+        assert queued.result(timeout=5) == [1.0]
+
+    with pytest.raises(BatcherClosedError):
+        batcher.compute_score([["q", "p"]])
+
+
+def reranker_registry(loader: FakeLoader, max_models: int = 1) -> ModelRegistry:
+    return ModelRegistry(loader, max_models=max_models, allowed_models=[], on_load=Reranker.attach_batcher, on_evict=Reranker.release_model)
+
+
+def test_eviction_during_request_retries_with_a_new_batcher(reranker_state, monkeypatch):
+    Reranker._registry = reranker_registry(FakeLoader())
+    reranker = Reranker(model_name="a")
+    stale = reranker.get_batcher()
+    # another model is loaded between picking up the batcher and scoring with it
+    Reranker(model_name="b").get_reranker()
+    assert stale.closed
+
+    batchers = iter([stale])
+    get_batcher = Reranker.get_batcher
+    monkeypatch.setattr(Reranker, "get_batcher", lambda self: next(batchers, None) or get_batcher(self))
+
+    assert reranker.compute_scores("q", ["ab", "abc"]) == [2.0, 3.0]
+    assert list(Reranker._registry.stats()["models"]) == ["a"]
+
+
+def test_rerank_context_raises_instead_of_returning_unranked_context(reranker_state):
+    Reranker._registry = reranker_registry(FakeLoader(fail={"a"}))
+
+    with pytest.raises(RuntimeError):
+        Reranker(model_name="a").rerank_context("q", ["p1", "p2"])
+
+
+def test_batchers_exist_only_for_models_in_the_registry(reranker_state):
+    Reranker._registry = reranker_registry(FakeLoader(), max_models=2)
+    batchers = {name: Reranker(model_name=name).get_batcher() for name in ("a", "b")}
+    Reranker(model_name="c").get_reranker()
+
+    assert set(Reranker._batchers) == {"b", "c"}
+    assert batchers["a"].closed and not batchers["b"].closed
+
+
+def test_eviction_between_load_and_batcher_lookup_does_not_pin_the_model(reranker_state, monkeypatch):
+    Reranker._registry = reranker_registry(FakeLoader())
+    reranker = Reranker(model_name="a")
+    get_reranker = Reranker.get_reranker
+    evictions = iter([True])
+
+    def get_reranker_then_evict(self):
+        model = get_reranker(self)
+        # a concurrent request loads another model before this one picks up its batcher
+        if self.model_name == "a" and next(evictions, False):
+            Reranker(model_name="b").get_reranker()
+        return model
+
+    monkeypatch.setattr(Reranker, "get_reranker", get_reranker_then_evict)
+
+    assert reranker.compute_scores("q", ["ab"]) == [2.0]
+    assert set(Reranker._batchers) == set(Reranker._registry.stats()["models"]) == {"a"}
@@ -0,0 +1,12 @@
+from score_cache import ScoreCache
+
+
+def test_scores_persisted_by_another_backend_or_truncation_are_not_served(tmp_path):
+    torch_key = ScoreCache.make_key("model", "q", "p", "torch", 512)
+    ScoreCache(cache_dir=str(tmp_path)).put_many({torch_key: 0.9})
+
+    # a restart after switching the backend or the max length reads the same SQLite file
+    restarted = ScoreCache(cache_dir=str(tmp_path))
+    assert restarted.get_many([torch_key]) == {torch_key: 0.9}
+    assert restarted.get_many([ScoreCache.make_key("model", "q", "p", "onnx", 512)]) == {}
+    assert restarted.get_many([ScoreCache.make_key("model", "q", "p", "torch", 256)]) == {}
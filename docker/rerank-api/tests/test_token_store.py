@@ -0,0 +1,31 @@
+from token_store import TokenStore
+
+
+def test_store_written_by_other_tokenizer_versions_is_not_used(tmp_path):
+    TokenStore(str(tmp_path), "BAAI/model", tokenizer_version="transformers==1").add(["a"], [[1, 2]])
+
+    assert TokenStore(str(tmp_path), "BAAI/model", tokenizer_version="transformers==1").get_many(["a"]) == [[1, 2]]
+    assert TokenStore(str(tmp_path), "BAAI/model", tokenizer_version="transformers==2").get_many(["a"]) == [None]
+
+
+def test_rewrite_with_new_tokenizer_versions_drops_old_passages(tmp_path):
+    TokenStore(str(tmp_path), "BAAI/model", tokenizer_version="transformers==1").add(["a"], [[1, 2]])
+    TokenStore(str(tmp_path), "BAAI/model", tokenizer_version="transformers==2").add(["b"], [[3]])
+
+    assert TokenStore(str(tmp_path), "BAAI/model", tokenizer_version="transformers==2").get_many(["a", "b"]) == [None, [3]]
+
+
+def test_manifest_is_read_again_only_after_a_write(tmp_path, monkeypatch):
+    writer = TokenStore(str(tmp_path), "BAAI/model")
+    reader = TokenStore(str(tmp_path), "BAAI/model")
+    writer.add(["a"], [[1]])
+    reads = []
+    read_manifest = TokenStore.read_manifest
+    monkeypatch.setattr(TokenStore, "read_manifest", lambda self: reads.append(self) or read_manifest(self))
+
+    for _ in range(3):
+        assert reader.get_many(["a"]) == [[1]]
+    assert len(reads) == 1
+
+    writer.add(["a"], [[2]])
+    assert reader.get_many(["a"]) == [[2]]
@@ -0,0 +1,175 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+
+
+def tokenizer_version() -> str:
+    """
+    Describe the tokenizer libraries, whose versions decide which token IDs a text gets.
+
+    Returns:
+        version (str): transformers and tokenizers versions, or None when transformers is not installed.
+    """
+    try:
+        import tokenizers
+        import transformers
+    except ImportError:
+        return None
+    return f"transformers=={transformers.__version__};tokenizers=={tokenizers.__version__}"
+
+
+class TokenStore:
+    def __init__(self, store_dir: str, model_name: str, tokenizer_version: str = None):
+        """
+        Initialize the TokenStore class.
+
+        The reranker token IDs of every indexed passage are stored back to back in one
+        memory-mapped array, with an offsets array and the point IDs marking where each
+        passage starts, so the reranker only has to tokenize the question. Every write
+        goes to a new version directory and then swaps the manifest, so a reader always
+        loads the three files of one version.
+
+        Args:
+            store_dir (str): Root directory of the token stores.
+            model_name (str): Name of the reranker whose tokenizer produced the IDs.
+            tokenizer_version (str): Version of the tokenizer libraries in this process, from tokenizer_version();
+                a store written by other versions is not used. None accepts any store.
+        """
+        self.store_path = os.path.join(store_dir, model_name.replace("/", "--"))
+        self.manifest_path = os.path.join(self.store_path, "manifest.json")
+        self.model_name = model_name
+        self.tokenizer_version = tokenizer_version
+        # tokens, offsets and rows of the loaded version, swapped as one tuple for concurrent readers
+        self.snapshot = None
+        self.manifest_mtime = None
+
+    def exists(self) -> bool:
+        """
+        Check if the store has been built.
+
+        Returns:
+            bool: True if a manifest exists, False otherwise.
+        """
+        return os.path.exists(self.manifest_path)
+
+    def read_manifest(self) -> dict:
+        """
+        Read the store manifest.
+
+        Returns:
+            manifest (dict): The current version directory, the next version number, the retired version
+                and the tokenizer version that wrote it.
+        """
+        if not self.exists():
+            return {"version": None, "next_version": 0, "retired": None, "tokenizer_version": None}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest: dict) -> None:
+        """
+        Atomically replace the store manifest.
+
+        Args:
+            manifest (dict): The current version directory, the next version number and the retired version.
+        """
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def load(self) -> bool:
+        """
+        Memory-map the token arrays, reloading them when the manifest has changed on disk.
+
+        Returns:
+            bool: True if the store is loaded, False if it does not exist or was written by other tokenizer versions.
+        """
+        if not self.exists():
+            return False
+        manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+        if manifest_mtime != self.manifest_mtime:
+            manifest = self.read_manifest()
+            if self.tokenizer_version and manifest.get("tokenizer_version") != self.tokenizer_version:
+                logging.error(
+                    f"Token store for {self.model_name} was written with {manifest.get('tokenizer_version')}, "
+                    f"not {self.tokenizer_version}; passages will be tokenized at query time"
+                )
+                self.snapshot = None
+            else:
+                version_path = os.path.join(self.store_path, manifest["version"])
+                tokens = np.load(os.path.join(version_path, "tokens.npy"), mmap_mode="r")
+                offsets = np.load(os.path.join(version_path, "offsets.npy"), mmap_mode="r")
+                with open(os.path.join(version_path, "point_ids.json"), "r", encoding="utf-8") as f:
+                    rows = {point_id: row for row, point_id in enumerate(json.load(f))}
+                self.snapshot = (tokens, offsets, rows)
+                logging.info(f"Loaded {len(rows)} pre-tokenized passages for {self.model_name} from {manifest['version']}")
+            self.manifest_mtime = manifest_mtime
+        return self.snapshot is not None
+
+    def get_many(self, point_ids: list) -> list:
+        """
+        Look up the token IDs of passages.
+
+        Args:
+            point_ids (list): Point IDs of the passages.
+
+        Returns:
+            token_ids (list): A list of token IDs per point, or None when the point is not stored.
+        """
+        if not self.load():
+            return [None] * len(point_ids)
+        tokens, offsets, rows = self.snapshot
+        token_ids = []
+        for point_id in point_ids:
+            row = rows.get(str(point_id))
+            token_ids.append(None if row is None else tokens[offsets[row]:offsets[row + 1]].tolist())
+        return token_ids
+
+    def add(self, point_ids: list, token_ids: list) -> int:
+        """
+        Append passages to the store, replacing the stored IDs of points that already exist.
+
+        Passages written by other tokenizer versions are dropped rather than carried over.
+
+        Args:
+            point_ids (list): Point IDs of the passages.
+            token_ids (list): Token IDs of each passage, without special tokens.
+
+        Returns:
+            num_passages (int): Number of passages in the store.
+        """
+        passages = {}
+        if self.load():
+            tokens, offsets, rows = self.snapshot
+            for point_id, row in rows.items():
+                passages[point_id] = tokens[offsets[row]:offsets[row + 1]]
+        for point_id, ids in zip(point_ids, token_ids):
+            passages[str(point_id)] = np.asarray(ids, dtype=np.uint32)
+
+        lengths = np.fromiter((len(ids) for ids in passages.values()), dtype=np.int64, count=len(passages))
+        offsets = np.zeros(len(passages) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        tokens = np.concatenate(list(passages.values())).astype(np.uint32) if passages else np.zeros(0, dtype=np.uint32)
+
+        manifest = self.read_manifest()
+        # The version retired by the previous write is deleted now rather than then,
+        # so a reader that had just read the old manifest could still open its files
+        if manifest["retired"]:
+            shutil.rmtree(os.path.join(self.store_path, manifest["retired"]), ignore_errors=True)
+        version = f"v{manifest['next_version']}"
+        version_path = os.path.join(self.store_path, version)
+        os.makedirs(version_path, exist_ok=True)
+        np.save(os.path.join(version_path, "tokens.npy"), tokens)
+        np.save(os.path.join(version_path, "offsets.npy"), offsets)
+        with open(os.path.join(version_path, "point_ids.json"), "w", encoding="utf-8") as f:
+            json.dump(list(passages), f)
+        self.write_manifest({
+            "version": version,
+            "next_version": manifest["next_version"] + 1,
+            "retired": manifest["version"],
+            "tokenizer_version": self.tokenizer_version,
+        })
+        logging.info(f"Wrote {len(passages)} pre-tokenized passages ({len(tokens)} tokens) for {self.model_name} as {version}")
+        return len(passages)
@@ -0,0 +1,84 @@
+import time
+import logging
+
+
+class AdaptiveEf:
+    def __init__(self, levels: tuple = (16, 32, 64, 128, 256, 512), alpha: float = 0.2, headroom: float = 0.5, reprobe_s: float = 60.0):
+        """
+        Initialize the AdaptiveEf class.
+
+        Tracks an exponentially weighted average of observed search latency for each
+        (collection, hnsw_ef) pair and picks the largest ef expected to fit a latency budget.
+
+        Args:
+            levels (tuple): Candidate hnsw_ef values in increasing order.
+            alpha (float): Weight of the newest latency sample in the running average. Defaults to 0.2.
+            headroom (float): An untried level is probed only while the level below it uses at most this
+                fraction of the budget. Defaults to 0.5.
+            reprobe_s (float): A level that went over budget is tried again once its latest sample is this
+                many seconds old, so a transient latency spike does not lower hnsw_ef for good. Defaults to 60.
+        """
+        self.levels = levels
+        self.alpha = alpha
+        self.headroom = headroom
+        self.reprobe_s = reprobe_s
+        self.latencies = {}
+        self.updated = {}
+        self.reprobing = set()
+
+    def choose(self, key: str, budget_ms: float) -> int:
+        """
+        Choose hnsw_ef for a search under a latency budget.
+
+        Args:
+            key (str): Tuning key, usually the collection name plus the search type.
+            budget_ms (float): Latency budget of the Qdrant search in milliseconds.
+
+        Returns:
+            hnsw_ef (int): The largest level whose observed latency fits the budget.
+        """
+        chosen = self.levels[0]
+        now = time.monotonic()
+        for index, hnsw_ef in enumerate(self.levels):
+            observed = self.latencies.get((key, hnsw_ef))
+            if observed is None:
+                previous = self.latencies.get((key, self.levels[index - 1])) if index else None
+                if previous is not None and previous <= budget_ms * self.headroom:
+                    chosen = hnsw_ef
+                break
+            if observed > budget_ms:
+                if now - self.updated[(key, hnsw_ef)] >= self.reprobe_s:
+                    # One search re-probes the stale level; its sample replaces the average instead of being blended in
+                    self.updated[(key, hnsw_ef)] = now
+                    self.reprobing.add((key, hnsw_ef))
+                    chosen = hnsw_ef
+                break
+            chosen = hnsw_ef
+        logging.info(f"Chose hnsw_ef={chosen} for {key} under a {budget_ms} ms budget")
+        return chosen
+
+    def record(self, key: str, hnsw_ef: int, latency_ms: float) -> None:
+        """
+        Record the latency of a search run with the given hnsw_ef.
+
+        Args:
+            key (str): Tuning key, usually the collection name plus the search type.
+            hnsw_ef (int): hnsw_ef used by the search.
+            latency_ms (float): Observed latency in milliseconds.
+        """
+        observed = self.latencies.get((key, hnsw_ef))
+        if observed is None or (key, hnsw_ef) in self.reprobing:
+            self.reprobing.discard((key, hnsw_ef))
+            self.latencies[(key, hnsw_ef)] = latency_ms
+        else:
+            self.latencies[(key, hnsw_ef)] = (1 - self.alpha) * observed + self.alpha * latency_ms
+        self.updated[(key, hnsw_ef)] = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        Get the observed latencies.
+
+        Returns:
+            stats (dict): Average latency in milliseconds keyed by "key@hnsw_ef".
+        """
+        return {f"{key}@{hnsw_ef}": round(latency_ms, 3) for (key, hnsw_ef), latency_ms in self.latencies.items()}
@@ -0,0 +1,73 @@
+import os
+import asyncio
+import logging
+
+
+class EmbeddingBatcher:
+    def __init__(self, embed_batch, max_batch_size: int = None, window_ms: float = None):
+        """
+        Initialize the EmbeddingBatcher class.
+
+        Query embeddings requested within a short window are collected and sent to
+        the embedding model as one batched call; each caller gets its own vector back.
+
+        Args:
+            embed_batch (callable): Coroutine function mapping a list of texts to a list of vectors.
+            max_batch_size (int): Flush as soon as this many texts are queued. Defaults to env EMBED_BATCH_SIZE or 32.
+            window_ms (float): Maximum time the first queued text waits for others. Defaults to env EMBED_BATCH_WINDOW_MS or 5.
+        """
+        self.embed_batch = embed_batch
+        self.max_batch_size = max(1, max_batch_size or int(os.getenv("EMBED_BATCH_SIZE", "32")))
+        self.window = (window_ms if window_ms is not None else float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))) / 1000
+        self.pending = []
+        self.flush_handle = None
+
+    async def embed(self, prompt: str) -> list:
+        """
+        Queue a text for the next batched embedding call.
+
+        Args:
+            prompt (str): Text to embed.
+
+        Returns:
+            query_vector (list): Embedding vector of the text.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((prompt, future))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """
+        Send every queued text as one batch.
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self.run_batch(batch))
+
+    async def run_batch(self, batch: list) -> None:
+        """
+        Embed a batch and hand the vectors back to the waiting callers.
+
+        Args:
+            batch (list): (text, future) pairs; identical texts are embedded once.
+        """
+        prompts = list(dict.fromkeys(prompt for prompt, _ in batch))
+        try:
+            vectors = dict(zip(prompts, await self.embed_batch(prompts)))
+            logging.info(f"Embedded {len(prompts)} unique texts for {len(batch)} queued requests")
+            for prompt, future in batch:
+                if not future.done():
+                    future.set_result(vectors[prompt])
+        except Exception as e:
+            logging.error(f"Error generating batched embeddings: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
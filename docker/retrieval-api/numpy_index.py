@@ -0,0 +1,190 @@
+import os
+import json
+import logging
+import argparse
+import numpy as np
+from bm25_index import tokenize
+
+
+class NumpyVectorIndex:
+    def __init__(self, index_dir: str, collection_name: str, dtype: str = "float32"):
+        """
+        Initialize the NumpyVectorIndex class.
+
+        Corpus vectors are stored L2-normalized in a memory-mapped matrix, so cosine
+        similarity for a batch of queries is a single matmul followed by argpartition.
+
+        Args:
+            index_dir (str): Root directory of the vector indexes.
+            collection_name (str): Name of the collection the index mirrors.
+            dtype (str): Storage dtype of the vectors, "float32" or "float16". Defaults to "float32".
+        """
+        self.index_path = os.path.join(index_dir, collection_name)
+        self.collection_name = collection_name
+        self.dtype = np.dtype(dtype)
+        self.vectors = None
+        self.documents = None
+        self.document_terms = None
+        self.loaded_mtime = None
+
+    def exists(self) -> bool:
+        """
+        Check if the index has been built.
+
+        Returns:
+            bool: True if the vector matrix and documents exist, False otherwise.
+        """
+        return os.path.exists(os.path.join(self.index_path, "documents.json"))
+
+    def load(self) -> bool:
+        """
+        Memory-map the vector matrix, reloading it if the index was rebuilt.
+
+        Returns:
+            bool: True if the index is loaded, False if it does not exist.
+        """
+        if not self.exists():
+            return False
+        mtime = os.path.getmtime(os.path.join(self.index_path, "documents.json"))
+        if self.loaded_mtime != mtime:
+            self.vectors = np.load(os.path.join(self.index_path, "vectors.npy"), mmap_mode="r")
+            with open(os.path.join(self.index_path, "documents.json"), "r", encoding="utf-8") as f:
+                self.documents = json.load(f)
+            self.document_terms = None
+            self.loaded_mtime = mtime
+            logging.info(f"Loaded {len(self.documents)} {self.vectors.dtype} vectors for {self.collection_name}")
+        return True
+
+    def keyword_mask(self, keywords: list) -> np.ndarray:
+        """
+        Select the documents whose text contains every keyword, like a Qdrant MatchText filter.
+
+        MatchText on a full-text index is tokenized and case-insensitive, so the text is
+        split with the BM25 tokenizer and a keyword matches when all of its terms are terms
+        of the document, rather than when it is a raw substring.
+
+        Args:
+            keywords (list): List of keywords to search for.
+
+        Returns:
+            mask (np.ndarray): Boolean array over the loaded documents.
+        """
+        if self.document_terms is None:
+            self.document_terms = [frozenset(tokenize(document.get("document", ""))) for document in self.documents]
+        keyword_terms = set()
+        for keyword in keywords:
+            keyword_terms.update(tokenize(keyword))
+        return np.fromiter(
+            (keyword_terms <= terms for terms in self.document_terms),
+            dtype=bool,
+            count=len(self.document_terms)
+        )
+
+    def write(self, vectors: list, documents: list) -> int:
+        """
+        Write the index, replacing any previous one.
+
+        Args:
+            vectors (list): Corpus vectors, one per document.
+            documents (list): Documents as dicts with "id" and the payload fields.
+
+        Returns:
+            num_docs (int): Number of documents in the index.
+        """
+        os.makedirs(self.index_path, exist_ok=True)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        np.save(os.path.join(self.index_path, "vectors.npy"), matrix.astype(self.dtype))
+
+        # documents.json is written last and replaced atomically; it marks the index as complete
+        temp_path = os.path.join(self.index_path, "documents.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(self.index_path, "documents.json"))
+        logging.info(f"Wrote {len(documents)} {self.dtype} vectors for {self.collection_name}")
+        return len(documents)
+
+    def search(self, query_vectors: list, limit: int = 10, mask: np.ndarray = None) -> list:
+        """
+        Find the exact top-k documents by cosine similarity for a batch of queries.
+
+        Args:
+            query_vectors (list): One query vector, or a list of query vectors.
+            limit (int): Number of results per query. Defaults to 10.
+            mask (np.ndarray): Optional boolean array restricting the search to some documents.
+
+        Returns:
+            results (list): For each query, a list of (score, row) tuples ordered by descending score.
+        """
+        if not self.load() or limit <= 0:
+            return [[] for _ in np.atleast_2d(query_vectors)]
+
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        rows = np.flatnonzero(mask) if mask is not None else None
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if len(vectors) == 0:
+            return [[] for _ in queries]
+
+        scores = queries @ np.asarray(vectors, dtype=np.float32).T
+        limit = min(limit, scores.shape[1])
+        top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        if rows is not None:
+            top = rows[top]
+        return [
+            [(float(score), int(row)) for score, row in zip(query_scores, query_rows)]
+            for query_scores, query_rows in zip(top_scores, top)
+        ]
+
+
+def build_from_qdrant(qdrant_client: object, collection_name: str, index_dir: str, dtype: str = "float32", batch_size: int = 1000) -> int:
+    """
+    Build a NumPy vector index from the vectors and payloads of an existing Qdrant collection.
+
+    Args:
+        qdrant_client (object): The Qdrant client.
+        collection_name (str): Name of the Qdrant collection.
+        index_dir (str): Root directory of the vector indexes.
+        dtype (str): Storage dtype of the vectors. Defaults to "float32".
+        batch_size (int): Number of points fetched per scroll request. Defaults to 1000.
+
+    Returns:
+        num_docs (int): Number of documents in the index.
+    """
+    vectors = []
+    documents = []
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        for point in points:
+            vectors.append(point.vector)
+            documents.append({"id": str(point.id), **(point.payload or {})})
+        if offset is None:
+            break
+    return NumpyVectorIndex(index_dir=index_dir, collection_name=collection_name, dtype=dtype).write(vectors, documents)
+
+
+if __name__ == "__main__":
+    from qdrant_factory import get_qdrant_client
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Export a Qdrant collection to a NumPy brute-force vector index')
+    parser.add_argument('--collection-name', type=str, required=True, help='Qdrant collection to export')
+    parser.add_argument('--index-dir', type=str, default=os.getenv("NUMPY_INDEX_DIR", "dags/data/numpy_index"),
+                      help='Root directory of the vector indexes')
+    parser.add_argument('--dtype', type=str, default=os.getenv("NUMPY_INDEX_DTYPE", "float32"), choices=["float32", "float16"],
+                      help='Storage dtype of the vectors')
+    args = parser.parse_args()
+
+    num_docs = build_from_qdrant(get_qdrant_client(), args.collection_name, args.index_dir, args.dtype)
+    logging.info(f"Vector index for {args.collection_name} contains {num_docs} documents")
@@ -1,11 +1,24 @@
 import os
 import ast
+import time
+import asyncio
+import httpx
 import ollama
 import logging
-from qdrant_client import QdrantClient, models
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.hybrid.fusion import reciprocal_rank_fusion
+from adaptive_ef import AdaptiveEf
+from bm25_index import BM25Index
+from embedding_batcher import EmbeddingBatcher
+from numpy_index import NumpyVectorIndex
+from qdrant_factory import forget_client, get_async_qdrant_client, get_pool_limits, get_qdrant_client
 
 
 class Retrieval:
+    search_types = ("similarity", "expert", "keyword", "fused", "bm25")
+    
     def __init__(
         self, 
         embed_model: str = "imac/zpoint_large_embedding_zh"
@@ -19,7 +32,10 @@ class Retrieval:
         """
         try:
             self.embed_model = embed_model
-            self.qdrant_client = QdrantClient(url=os.getenv("QDRANT_URL"))
+            self.qdrant_client = get_qdrant_client()
+            self.bm25_index_dir = os.getenv("BM25_INDEX_DIR", "dags/data/bm25_index")
+            self.bm25_indexes = {}
+            self.ef_tuner = AdaptiveEf()
         except Exception as e:
             logging.error(f"Error initializing Retrieval class: {e}")
             raise e
@@ -81,34 +97,51 @@ class Retrieval:
             logging.error(f"Error generating embedding: {e}")
             raise e  
         
-    def similarity_search(self, collection_name: str, prompt: str, limit: int = 5) -> list:
+    def search(self, collection_name: str, types: str, prompt: str, keywords: list = None, limit: int = 5, with_payload: object = True, search_params: models.SearchParams = None, with_vectors: bool = False) -> list:
         """
-        Perform similarity search in Qdrant.
+        Embed a prompt and run one similarity, keyword or fused search.
         
         Args:
             collection_name (str): Name of the Qdrant collection.
+            types (str): The type of search ("similarity", "keyword" or "fused").
             prompt (str): Text prompt to generate embedding.
+            keywords (list): List of keywords for keyword and fused search.
             limit (int): Number of results to return. Defaults to 5.
+            with_payload (object): Payload selector passed to Qdrant. Defaults to True.
+            search_params (models.SearchParams): HNSW search parameters. Defaults to Qdrant's defaults.
+            with_vectors (bool): Also return the stored vectors of the hits. Defaults to False.
         
         Returns:
             result (list): List of search results.
         """
         try:
+            plan = self.search_plan(types, collection_name, limit, prompt, keywords, with_payload, search_params, with_vectors=with_vectors)
             query_vector = self.ollama_embedding(
                 prompt=prompt
             )
-            result = self.qdrant_client.search(
-                collection_name=collection_name,
-                query_vector=query_vector,
-                limit=limit,
-                score_threshold=0
-            )
-            return result
+            return self.search_plans(collection_name, [plan], query_vector)[0]
         except Exception as e:
-            logging.error(f"Error during similarity search: {e}")
+            logging.error(f"Error during {types} search: {e}")
             raise e
+    
+    def similarity_search(self, collection_name: str, prompt: str, limit: int = 5, with_payload: object = True, search_params: models.SearchParams = None, with_vectors: bool = False) -> list:
+        """
+        Perform similarity search in Qdrant.
+        
+        Args:
+            collection_name (str): Name of the Qdrant collection.
+            prompt (str): Text prompt to generate embedding.
+            limit (int): Number of results to return. Defaults to 5.
+            with_payload (object): Payload selector passed to Qdrant. Defaults to True.
+            search_params (models.SearchParams): HNSW search parameters. Defaults to Qdrant's defaults.
+            with_vectors (bool): Also return the stored vectors of the hits. Defaults to False.
+        
+        Returns:
+            result (list): List of search results, awaitable on the async classes.
+        """
+        return self.search(collection_name, "similarity", prompt, None, limit, with_payload, search_params, with_vectors)
 
-    def keyword_search(self, collection_name: str, prompt: str, keywords: list, limit: int = 5) -> list:
+    def keyword_search(self, collection_name: str, prompt: str, keywords: list, limit: int = 5, with_payload: object = True, search_params: models.SearchParams = None, with_vectors: bool = False) -> list:
         """
         Perform keyword search in Qdrant.
         
@@ -117,103 +150,1214 @@ class Retrieval:
             prompt (str): Text prompt to generate embedding.
             keywords (list): List of keywords to search for.
             limit (int): Number of results to return. Defaults to 5.
+            with_payload (object): Payload selector passed to Qdrant. Defaults to True.
+            search_params (models.SearchParams): HNSW search parameters. Defaults to Qdrant's defaults.
+            with_vectors (bool): Also return the stored vectors of the hits. Defaults to False.
         
         Returns:
-            result (list): List of search results.
+            result (list): List of search results, awaitable on the async classes.
+        """
+        return self.search(collection_name, "keyword", prompt, keywords, limit, with_payload, search_params, with_vectors)
+        
+    def bm25_search(self, collection_name: str, query: str, limit: int = 5) -> list:
+        """
+        Perform BM25 keyword search against the local inverted index of a collection.
+        
+        Args:
+            collection_name (str): Name of the Qdrant collection the index mirrors.
+            query (str): Query text or space-separated keywords.
+            limit (int): Number of results to return. Defaults to 5.
+        
+        Returns:
+            result (list): List of scored points built from the indexed payloads.
         """
         try:
-            condition = []
-            query_vector = self.ollama_embedding(
-                prompt=prompt
-            )
-            for keyword in keywords:
-                condition.append(
-                    models.FieldCondition(
-                        key="document",
-                        match=models.MatchText(text=keyword),
-                    )
+            if collection_name not in self.bm25_indexes:
+                self.bm25_indexes[collection_name] = BM25Index(index_dir=self.bm25_index_dir, collection_name=collection_name)
+            bm25_index = self.bm25_indexes[collection_name]
+            if not bm25_index.exists():
+                logging.warning(f"BM25 index for {collection_name} does not exist in {self.bm25_index_dir}.")
+                return []
+            
+            return [
+                models.ScoredPoint(
+                    id=document["id"],
+                    version=0,
+                    score=score,
+                    payload={key: value for key, value in document.items() if key != "id"},
                 )
-            result = self.qdrant_client.search(
-                collection_name=collection_name,
-                query_vector=query_vector,
-                limit=limit,
+                for score, document in bm25_index.search(query, limit=limit)
+            ]
+        except Exception as e:
+            logging.error(f"Error during BM25 search: {e}")
+            raise e
+        
+    def fused_search(self, collection_name: str, prompt: str, keywords: list, limit: int = 5, with_payload: object = True, search_params: models.SearchParams = None, with_vectors: bool = False) -> list:
+        """
+        Perform hybrid search, fusing the similarity ranking and the BM25 ranking of the keywords with reciprocal rank fusion.
+        
+        Args:
+            collection_name (str): Name of the Qdrant collection.
+            prompt (str): Text prompt to generate embedding.
+            keywords (list): List of keywords for the BM25 ranking; the prompt is used when empty.
+            limit (int): Number of results to return. Defaults to 5.
+            with_payload (object): Payload selector passed to Qdrant. Defaults to True.
+            search_params (models.SearchParams): HNSW search parameters. Defaults to Qdrant's defaults.
+            with_vectors (bool): Also return the stored vectors of the hits. Defaults to False.
+        
+        Returns:
+            result (list): List of search results ranked by fused score, awaitable on the async classes.
+        """
+        return self.search(collection_name, "fused", prompt, keywords, limit, with_payload, search_params, with_vectors)
+        
+    def get_collection_name(self, types: str, document_types: str) -> str:
+        """
+        Get the Qdrant collection name for a retrieval type.
+        
+        Args:
+            types (str): The type of retrieval.
+            document_types (str): The type of documents to retrieve.
+        
+        Returns:
+            collection_name (str): Name of the Qdrant collection.
+        """
+        embed_model_name = self.embed_model.split('/')[-1]
+        return f"{document_types}_{types}_{embed_model_name}" if types == "expert" else f"{document_types}_{embed_model_name}"
+    
+    @staticmethod
+    def parse_keyword_list(keyword_list: object) -> list:
+        """
+        Normalize a keyword list passed as a list or its string representation.
+        
+        Args:
+            keyword_list (object): Keyword list, string representation of a list, or None.
+        
+        Returns:
+            keyword_list (list): List of keywords.
+        """
+        if isinstance(keyword_list, list):
+            return keyword_list
+        elif isinstance(keyword_list, str):
+            try:
+                keyword_list = ast.literal_eval(keyword_list)
+                if not isinstance(keyword_list, list):
+                    keyword_list = [keyword_list]
+            except:
+                keyword_list = [keyword_list]
+            return keyword_list
+        return []
+    
+    @staticmethod
+    def keyword_filter(keywords: list) -> models.Filter:
+        """
+        Build a Qdrant filter requiring every keyword to match the document text.
+        
+        Args:
+            keywords (list): List of keywords to search for.
+        
+        Returns:
+            query_filter (models.Filter): Filter with one text match condition per keyword.
+        """
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="document",
+                    match=models.MatchText(text=keyword),
+                )
+                for keyword in keywords
+            ]
+        )
+    
+    def bm25_leg(self, plan: dict) -> list:
+        """
+        Rank the BM25 candidates of a fused plan.
+        
+        Fusion needs a ranking that is independent of the dense one; a keyword-filtered
+        dense query only returns a subset of the dense ranking, so the lexical leg is
+        taken from the BM25 index of the collection instead.
+        
+        Args:
+            plan (dict): Plan returned by search_plan.
+        
+        Returns:
+            point_ids (list): Point IDs ranked by BM25 score; empty for other plans or when the collection has no BM25 index.
+        """
+        if plan["types"] != "fused":
+            return []
+        return [
+            int(point.id) if str(point.id).isdigit() else point.id
+            for point in self.bm25_plan_search(plan)
+        ]
+    
+    @staticmethod
+    def fuse_legs(plan: dict, legs: list, bm25_ids: list) -> list:
+        """
+        Fuse the dense ranking of a fused plan with its BM25 ranking by reciprocal rank fusion.
+        
+        Args:
+            plan (dict): Plan returned by search_plan.
+            legs (list): Dense results, followed for fused plans by the stored points of the BM25 candidates.
+            bm25_ids (list): Point IDs returned by bm25_leg.
+        
+        Returns:
+            result (list): The dense results of other plans, or the fused results with RRF scores.
+        """
+        if plan["types"] != "fused":
+            return legs[0]
+        rankings = [legs[0]]
+        if len(legs) > 1:
+            bm25_points = {str(point.id): point for point in legs[1]}
+            rankings.append([bm25_points[str(point_id)] for point_id in bm25_ids if str(point_id) in bm25_points])
+        return reciprocal_rank_fusion(rankings, limit=plan["limit"])
+    
+    @staticmethod
+    def get_tuning_key(collection_name: str, types: str) -> str:
+        """
+        Get the key under which search latencies of a retrieval type are tracked.
+        
+        Args:
+            collection_name (str): Name of the Qdrant collection.
+            types (str): The type of retrieval.
+        
+        Returns:
+            tuning_key (str): Collection name plus the search type.
+        """
+        return f"{collection_name}:{'similarity' if types == 'expert' else types}"
+    
+    def get_search_params(self, tuning_key: str, hnsw_ef: int = None, exact: bool = False, oversampling: float = None, latency_budget_ms: float = None) -> models.SearchParams:
+        """
+        Build the Qdrant search parameters requested by a caller.
+        
+        An explicit hnsw_ef wins over the latency budget; with only a budget, hnsw_ef is
+        chosen from the latencies observed so far for the same collection and search type.
+        
+        Args:
+            tuning_key (str): Key returned by get_tuning_key.
+            hnsw_ef (int): Size of the HNSW candidate list. Higher is slower but more accurate.
+            exact (bool): Run an exact full scan instead of HNSW. Defaults to False.
+            oversampling (float): Oversampling factor for quantized collections, rescored with the original vectors.
+            latency_budget_ms (float): Latency budget of the Qdrant search in milliseconds.
+        
+        Returns:
+            search_params (models.SearchParams): Search parameters, or None to use Qdrant's defaults.
+        """
+        if hnsw_ef is None and latency_budget_ms and not exact:
+            hnsw_ef = self.ef_tuner.choose(tuning_key, latency_budget_ms)
+        if hnsw_ef is None and not exact and oversampling is None:
+            return None
+        
+        return models.SearchParams(
+            hnsw_ef=hnsw_ef,
+            exact=exact,
+            quantization=models.QuantizationSearchParams(rescore=True, oversampling=oversampling) if oversampling else None,
+        )
+    
+    def record_search_latency(self, tuning_key: str, search_params: models.SearchParams, start_time: float, batch_size: int = 1) -> None:
+        """
+        Record the latency of an HNSW search for adaptive hnsw_ef selection.
+        
+        Args:
+            tuning_key (str): Key returned by get_tuning_key.
+            search_params (models.SearchParams): Search parameters the search ran with.
+            start_time (float): time.perf_counter() value taken before the search.
+            batch_size (int): Number of searches sent in the same round trip; each is charged an equal share. Defaults to 1.
+        """
+        if search_params is not None and search_params.hnsw_ef and not search_params.exact:
+            self.ef_tuner.record(tuning_key, search_params.hnsw_ef, (time.perf_counter() - start_time) * 1000 / max(batch_size, 1))
+    
+    @staticmethod
+    def mmr_select(result: list, k: int, lambda_mult: float = 0.5) -> list:
+        """
+        Select a diverse subset of search results with maximal marginal relevance.
+        
+        Relevance is the search score divided by the best candidate score, so cosine and
+        fused (RRF) scores share one scale; redundancy is the highest cosine similarity to
+        an already selected candidate.
+        
+        Args:
+            result (list): Scored points returned with their vectors.
+            k (int): Number of results to select.
+            lambda_mult (float): 1.0 ranks by relevance only, 0.0 by diversity only. Defaults to 0.5.
+        
+        Returns:
+            result (list): The selected points in selection order.
+        """
+        if len(result) <= 1 or k <= 0:
+            return result[:k]
+        
+        vectors = np.asarray([point.vector for point in result], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = vectors @ vectors.T
+        scores = np.asarray([point.score for point in result], dtype=np.float32)
+        relevance = scores / max(float(scores.max()), 1e-12)
+        
+        selected = [int(np.argmax(relevance))]
+        max_similarity = similarity[selected[0]].copy()
+        for _ in range(min(k, len(result)) - 1):
+            mmr = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+            mmr[selected] = -np.inf
+            index = int(np.argmax(mmr))
+            selected.append(index)
+            np.maximum(max_similarity, similarity[index], out=max_similarity)
+        return [result[index] for index in selected]
+    
+    @staticmethod
+    def extract_payload(result: list, types: str) -> list:
+        """
+        Extract the text payload from search results.
+        
+        Args:
+            result (list): List of scored points returned by Qdrant.
+            types (str): The type of retrieval.
+        
+        Returns:
+            search_result (list): A list of retrieved documents.
+        """
+        key_to_extract = "answer" if types == "expert" else "document"
+        return [f"""{point.payload[key_to_extract]}""" for point in result]
+    
+    @staticmethod
+    def get_payload_fields(types: str, payload_fields: list = None) -> list:
+        """
+        Get the payload fields Qdrant should return for a retrieval type.
+        
+        Args:
+            types (str): The type of retrieval.
+            payload_fields (list): Extra payload fields requested by the caller.
+        
+        Returns:
+            payload_fields (list): The text field of the retrieval type followed by the extra fields.
+        """
+        key_to_extract = "answer" if types == "expert" else "document"
+        return [key_to_extract] + [field for field in payload_fields or [] if field != key_to_extract]
+    
+    @classmethod
+    def format_results(cls, result: list, types: str, structured: bool = False, payload_fields: list = None) -> list:
+        """
+        Format search results as text or as structured hits.
+        
+        Args:
+            result (list): List of scored points.
+            types (str): The type of retrieval.
+            structured (bool): Return id, score and payload for each hit. Defaults to False.
+            payload_fields (list): Payload fields kept in structured hits.
+        
+        Returns:
+            search_result (list): A list of documents, or of dicts with "id", "score", "types" and "payload".
+        """
+        if not structured:
+            return cls.extract_payload(result, types)
+        
+        payload_fields = payload_fields or cls.get_payload_fields(types)
+        return [
+            {
+                "id": str(point.id),
+                "score": point.score,
+                # the score scale depends on the retrieval type, so consumers can tell comparable scores apart
+                "types": types,
+                "payload": {field: point.payload[field] for field in payload_fields if field in (point.payload or {})},
+            }
+            for point in result
+        ]
+    
+    @classmethod
+    def merge_collection_results(cls, collection_results: dict, types: str, topk: int = 10, structured: bool = False) -> list:
+        """
+        Merge structured hits from several collections into one global top-k.
+        
+        Cosine scores of the dense types come from the same embedding model and fused scores
+        are rank-based, so both are merged on their raw values. BM25 scores depend on each
+        collection's term statistics, so BM25 hits are merged by reciprocal rank instead,
+        with the 1 / (2 + rank) score qdrant_client's reciprocal_rank_fusion uses. Hits with
+        the same passage text are merged into the best-scoring one, with its collection.
+        
+        Args:
+            collection_results (dict): Structured hits of each collection, keyed by collection name.
+            types (str): The type of retrieval.
+            topk (int): Number of merged results to return. Defaults to 10.
+            structured (bool): Return the structured hits instead of text. Defaults to False.
+        
+        Returns:
+            search_result (list): A list of documents, or of dicts with "id", "score", "raw_score", "types", "collection" and "payload".
+        """
+        merged = []
+        for collection_name, hits in collection_results.items():
+            for rank, hit in enumerate(hits or []):
+                merged.append({
+                    **hit,
+                    "score": 1 / (2 + rank) if types == "bm25" else hit["score"],
+                    "raw_score": hit["score"],
+                    "collection": collection_name,
+                })
+        merged.sort(key=lambda hit: hit["score"], reverse=True)
+        
+        # A document indexed in several collections is kept once, as its best-scoring copy
+        key_to_extract = cls.get_payload_fields(types)[0]
+        unique = {}
+        for hit in merged:
+            text = (hit.get("payload") or {}).get(key_to_extract)
+            unique.setdefault(text if text is not None else (hit["collection"], hit["id"]), hit)
+        merged = list(unique.values())[:topk]
+        
+        if structured:
+            return merged
+        return [hit["payload"].get(key_to_extract) for hit in merged]
+    
+    def search_plan(self, types: str, collection_name: str, limit: int, query: str, keyword_list: list = None, payload_fields: object = True,
+                    search_params: models.SearchParams = None, structured: bool = False, with_vectors: bool = False) -> dict:
+        """
+        Describe one search independently of the backend that runs it.
+        
+        Args:
+            types (str): The type of retrieval.
+            collection_name (str): Name of the Qdrant collection.
+            limit (int): Number of results to return.
+            query (str): The user's question; BM25 searches it when no keywords are given.
+            keyword_list (list): List of keywords for keyword, fused and BM25 search.
+            payload_fields (object): Payload selector passed to Qdrant. Defaults to True.
+            search_params (models.SearchParams): HNSW search parameters. Defaults to Qdrant's defaults.
+            structured (bool): Format the results as structured hits. Defaults to False.
+            with_vectors (bool): Also return the stored vectors of the hits. Defaults to False.
+        
+        Returns:
+            plan (dict): The search arguments plus the key its latency is tracked under.
+        """
+        return {
+            "types": types,
+            "collection_name": collection_name,
+            "limit": limit,
+            "query": query,
+            "keyword_list": keyword_list or [],
+            "payload_fields": payload_fields,
+            "search_params": search_params,
+            "tuning_key": self.get_tuning_key(collection_name, types),
+            "structured": structured,
+            "with_vectors": with_vectors,
+        }
+    
+    def build_query_requests(self, plan: dict, query_vector: list, bm25_ids: list) -> list:
+        """
+        Build the Qdrant queries of a search plan.
+        
+        Args:
+            plan (dict): Plan returned by search_plan.
+            query_vector (list): Embedding vector of the user question.
+            bm25_ids (list): Point IDs returned by bm25_leg.
+        
+        Returns:
+            requests (list): The dense query, followed for fused plans by an exact query fetching the BM25 candidates.
+        """
+        requests = [
+            models.QueryRequest(
+                query=query_vector,
+                filter=self.keyword_filter(plan["keyword_list"]) if plan["types"] == "keyword" else None,
+                params=plan["search_params"],
+                limit=plan["limit"],
                 score_threshold=0,
-                query_filter=models.Filter(
-                    must=condition
-                ),
+                with_payload=plan["payload_fields"],
+                with_vector=plan["with_vectors"],
+            )
+        ]
+        if bm25_ids:
+            requests.append(
+                models.QueryRequest(
+                    query=query_vector,
+                    filter=models.Filter(must=[models.HasIdCondition(has_id=bm25_ids)]),
+                    params=models.SearchParams(exact=True),
+                    limit=len(bm25_ids),
+                    with_payload=plan["payload_fields"],
+                    with_vector=plan["with_vectors"],
+                )
+            )
+        return requests
+    
+    def search_plans(self, collection_name: str, plans: list, query_vector: list) -> list:
+        """
+        Run the plans of one collection in a single Qdrant round trip.
+        
+        Args:
+            collection_name (str): Name of the Qdrant collection.
+            plans (list): Plans returned by search_plan.
+            query_vector (list): Embedding vector of the user question.
+        
+        Returns:
+            results (list): List of scored points for each plan.
+        """
+        bm25_ids = [self.bm25_leg(plan) for plan in plans]
+        requests = [self.build_query_requests(plan, query_vector, ids) for plan, ids in zip(plans, bm25_ids)]
+        start_time = time.perf_counter()
+        responses = self.qdrant_client.query_batch_points(
+            collection_name=collection_name,
+            requests=[request for plan_requests in requests for request in plan_requests]
+        )
+        for plan in plans:
+            self.record_search_latency(plan["tuning_key"], plan["search_params"], start_time, len(plans))
+        responses = iter(responses)
+        return [
+            self.fuse_legs(plan, [next(responses).points for _ in plan_requests], ids)
+            for plan, plan_requests, ids in zip(plans, requests, bm25_ids)
+        ]
+    
+    def bm25_plan_search(self, plan: dict) -> list:
+        """
+        Run the BM25 search of a plan, falling back to the question when no keywords are given.
+        
+        Args:
+            plan (dict): Plan returned by search_plan.
+        
+        Returns:
+            result (list): List of scored points.
+        """
+        return self.bm25_search(plan["collection_name"], " ".join(plan["keyword_list"]) or plan["query"], limit=plan["limit"])
+    
+    def format_plan_results(self, plan: dict, result: list) -> list:
+        """
+        Format the results of a plan as text or as structured hits.
+        
+        Args:
+            plan (dict): Plan returned by search_plan.
+            result (list): List of scored points.
+        
+        Returns:
+            search_result (list): A list of documents, or of structured hits.
+        """
+        return self.format_results(result, plan["types"], plan["structured"], plan["payload_fields"])
+    
+    def collection_checker(self) -> object:
+        """
+        List the existing collections once for a batch of searches.
+        
+        Returns:
+            collection_exists (callable): Maps a collection name to True if it exists.
+        """
+        return {collection.name for collection in self.qdrant_client.get_collections().collections}.__contains__
+    
+    def plan_searches(self, user_question: str, searches: list, document_types: str, collection_exists: object) -> list:
+        """
+        Turn multi-search specs into search plans.
+        
+        Args:
+            user_question (str): The user's question.
+            searches (list): List of search specs, each a dict with "types", "topk" and optional "keyword_list", "structured", "payload_fields",
+                "hnsw_ef", "exact", "oversampling" and "latency_budget_ms".
+            document_types (str): The type of documents to retrieve.
+            collection_exists (callable): Returned by collection_checker.
+        
+        Returns:
+            plans (list): A plan for each spec, or None for unknown types and missing collections.
+        """
+        plans = []
+        for search in searches:
+            types = search.get("types", "similarity")
+            if types not in self.search_types:
+                logging.warning(f"Unknown retrieval type: {types}")
+                plans.append(None)
+                continue
+            
+            collection_name = self.get_collection_name(types, document_types)
+            if types != "bm25" and not collection_exists(collection_name):
+                logging.warning(f"Collection {collection_name} does not exist. Please check the collection name.")
+                plans.append(None)
+                continue
+            
+            structured = search.get("structured", False)
+            search_params = None
+            if types != "bm25":
+                search_params = self.get_search_params(
+                    self.get_tuning_key(collection_name, types),
+                    hnsw_ef=search.get("hnsw_ef"),
+                    exact=search.get("exact", False),
+                    oversampling=search.get("oversampling"),
+                    latency_budget_ms=search.get("latency_budget_ms")
+                )
+            plans.append(self.search_plan(
+                types,
+                collection_name,
+                search.get("topk", 10),
+                user_question,
+                self.parse_keyword_list(search.get("keyword_list")),
+                self.get_payload_fields(types, search.get("payload_fields") if structured else None),
+                search_params,
+                structured
+            ))
+        return plans
+    
+    def run_bm25_plans(self, plans: list) -> list:
+        """
+        Run the BM25 plans, which need no query embedding.
+        
+        Args:
+            plans (list): Plans returned by plan_searches.
+        
+        Returns:
+            search_results (list): The results of the BM25 plans, and an empty list for every other plan.
+        """
+        return [
+            self.format_plan_results(plan, self.bm25_plan_search(plan)) if plan is not None and plan["types"] == "bm25" else []
+            for plan in plans
+        ]
+    
+    @staticmethod
+    def group_plans(plans: list) -> dict:
+        """
+        Group the plans that need a query embedding by collection.
+        
+        Args:
+            plans (list): Plans returned by plan_searches.
+        
+        Returns:
+            batches (dict): Indexes of the plans of each collection, keyed by collection name.
+        """
+        batches = {}
+        for index, plan in enumerate(plans):
+            if plan is not None and plan["types"] != "bm25":
+                batches.setdefault(plan["collection_name"], []).append(index)
+        return batches
+    
+    def plan_retrieval(self, types: str, document_types: str, topk: int, structured: bool, payload_fields: list, hnsw_ef: int, exact: bool,
+                       oversampling: float, latency_budget_ms: float, mmr_lambda: float, mmr_fetch_k: int, ti: object) -> tuple:
+        """
+        Read the question and keywords from XCom and plan a single retrieval.
+        
+        Args:
+            See retrieval.
+        
+        Returns:
+            user_question (str): The user's question.
+            plan (dict): Plan returned by search_plan.
+        """
+        if types not in self.search_types:
+            raise ValueError(f"Unknown retrieval type: {types}")
+        user_question = self.get_user_question(ti)
+        logging.info(f"Retrieving information for question: {user_question}")
+        logging.info(f"Using {types} search")
+        
+        collection_name = self.get_collection_name(types, document_types)
+        keyword_list = []
+        if types in ("keyword", "fused", "bm25"):
+            keyword_list = ti.xcom_pull(task_ids='keyword_extraction_task', key='return_value')
+            logging.info(f"Keyword list: {keyword_list}")
+            keyword_list = self.parse_keyword_list(keyword_list)
+        
+        search_params = None
+        use_mmr = False
+        if types != "bm25":
+            search_params = self.get_search_params(
+                self.get_tuning_key(collection_name, types),
+                hnsw_ef=hnsw_ef,
+                exact=exact,
+                oversampling=oversampling,
+                latency_budget_ms=latency_budget_ms
             )
-            return result
+            use_mmr = mmr_lambda is not None
+        
+        return user_question, self.search_plan(
+            types,
+            collection_name,
+            max(mmr_fetch_k or 4 * topk, topk) if use_mmr else topk,
+            user_question,
+            keyword_list,
+            self.get_payload_fields(types, payload_fields if structured else None),
+            search_params,
+            structured,
+            with_vectors=use_mmr
+        )
+    
+    def finish_retrieval(self, plan: dict, result: list, topk: int, mmr_lambda: float = None) -> list:
+        """
+        Apply MMR if the plan fetched extra candidates for it, then format the results.
+        
+        Args:
+            plan (dict): Plan returned by plan_retrieval.
+            result (list): List of scored points.
+            topk (int): Number of results to keep.
+            mmr_lambda (float): Lambda of the MMR selection.
+        
+        Returns:
+            search_result (list): A list of retrieved documents, or of structured hits.
+        """
+        if plan["with_vectors"]:
+            logging.info(f"Selecting {topk} of {len(result)} candidates with MMR (lambda={mmr_lambda})")
+            result = self.mmr_select(result, topk, mmr_lambda)
+        return self.format_plan_results(plan, result)
+    
+    def multi_search(self, user_question: str, searches: list, document_types: str = "squad") -> list:
+        """
+        Embed the user question once and run several searches through Qdrant's batch query API.
+        
+        Searches targeting the same collection are sent in a single batch request,
+        so expert, similarity and keyword search cost one embedding call and at most
+        one Qdrant round trip per collection.
+        
+        Args:
+            user_question (str): The user's question.
+            searches (list): List of search specs, each a dict with "types", "topk" and optional "keyword_list", "structured", "payload_fields",
+                "hnsw_ef", "exact", "oversampling" and "latency_budget_ms".
+            document_types (str): The type of documents to retrieve. Defaults to "squad".
+        
+        Returns:
+            search_results (list): A list of retrieved documents for each search spec, in request order.
+        """
+        try:
+            logging.info(f"Running {len(searches)} searches for question: {user_question}")
+            plans = self.plan_searches(user_question, searches, document_types, self.collection_checker())
+            search_results = self.run_bm25_plans(plans)
+            batches = self.group_plans(plans)
+            query_vector = self.ollama_embedding(prompt=user_question) if batches else None
+            for collection_name, indexes in batches.items():
+                logging.info(f"Sending {len(indexes)} batched queries to {collection_name}")
+                results = self.search_plans(collection_name, [plans[index] for index in indexes], query_vector)
+                for index, result in zip(indexes, results):
+                    search_results[index] = self.format_plan_results(plans[index], result)
+            
+            return search_results
         except Exception as e:
-            logging.error(f"Error during keyword search: {e}")
+            logging.error(f"Error during multi search: {e}")
             raise e
         
-    def retrieval(self, types: str = "similarity", document_types: str = "squad", topk: int = 10, **kwargs) -> list:
+    def multi_collection_retrieval(self, types: str = "similarity", document_types: list = None, topk: int = 10, structured: bool = False, payload_fields: list = None, **kwargs) -> list:
+        """
+        Run the same retrieval against several document collections concurrently and merge the hits.
+        
+        Args:
+            types (str): The type of retrieval ("similarity", "expert", "keyword", "fused" or "bm25"). Defaults to "similarity".
+            document_types (list): The document types to search, e.g. ["squad", "pdf"].
+            topk (int): Number of merged results to return; each collection also returns up to topk. Defaults to 10.
+            structured (bool): Return id, merge score, raw score, source collection and payload for each hit. Defaults to False.
+            payload_fields (list): Extra payload fields returned in structured mode.
+            **kwargs: Additional arguments passed to retrieval, including ti.
+        
+        Returns:
+            search_result (list): The merged global top-k, each hit tagged with its source collection in structured mode.
+        """
+        try:
+            document_types = list(dict.fromkeys(document_types or ["squad"]))
+            logging.info(f"Fanning out {types} retrieval to {document_types}")
+            with ThreadPoolExecutor(max_workers=len(document_types)) as executor:
+                futures = {
+                    self.get_collection_name(types, document_type): executor.submit(
+                        self.retrieval, types, document_type, topk, True, payload_fields, **kwargs
+                    )
+                    for document_type in document_types
+                }
+                collection_results = {collection_name: future.result() for collection_name, future in futures.items()}
+            
+            return self.merge_collection_results(collection_results, types, topk, structured)
+        except Exception as e:
+            logging.error(f"Error during multi-collection retrieval: {e}")
+            raise e
+        
+        
+    def retrieval(self, types: str = "similarity", document_types: str = "squad", topk: int = 10, structured: bool = False, payload_fields: list = None,
+                  hnsw_ef: int = None, exact: bool = False, oversampling: float = None, latency_budget_ms: float = None,
+                  mmr_lambda: float = None, mmr_fetch_k: int = None, **kwargs) -> list:
         """
         Retrieve relevant documents from Qdrant based on the user question.
         
         Args:
-            types (str): The type of retrieval. Defaults to "similarity".
+            types (str): The type of retrieval ("similarity", "expert", "keyword", "fused" or "bm25"). Defaults to "similarity".
             document_types (str): The type of documents to retrieve. Defaults to "squad".
             topk (int): Number of top results to retrieve. Defaults to 10.
+            structured (bool): Return id, score and payload for each hit instead of text. Defaults to False.
+            payload_fields (list): Extra payload fields returned in structured mode.
+            hnsw_ef (int): Size of the HNSW candidate list. Defaults to Qdrant's collection setting.
+            exact (bool): Run an exact full scan instead of HNSW. Defaults to False.
+            oversampling (float): Oversampling factor for quantized collections.
+            latency_budget_ms (float): Pick hnsw_ef adaptively so the Qdrant search fits this budget.
+            mmr_lambda (float): Diversify the results with maximal marginal relevance using this lambda. Defaults to no MMR.
+            mmr_fetch_k (int): Number of candidates MMR selects from. Defaults to 4 * topk.
             **kwargs: Additional arguments.
             
         Returns:
-            search_result (list): A list of retrieved documents.
+            search_result (list): A list of retrieved documents, or of structured hits.
         """
         try:
-            ti = kwargs['ti']
-            user_question = self.get_user_question(ti)
-            logging.info(f"Retrieving information for question: {user_question}")
-            search_result = []
-            
-            collection_name = f"""{document_types}_{types}_{self.embed_model.split('/')[-1]}""" if types == "expert" else f"""{document_types}_{self.embed_model.split('/')[-1]}"""
-            if not self.collection_exists(collection_name):
-                logging.warning(f"Collection {collection_name} does not exist. Please check the collection name.")
+            user_question, plan = self.plan_retrieval(
+                types, document_types, topk, structured, payload_fields, hnsw_ef, exact, oversampling, latency_budget_ms, mmr_lambda, mmr_fetch_k, kwargs['ti']
+            )
+            if types == "bm25":
+                result = self.bm25_plan_search(plan)
+            elif not self.collection_exists(plan["collection_name"]):
+                logging.warning(f"Collection {plan['collection_name']} does not exist. Please check the collection name.")
                 return []
-            
-            if types == "similarity":
-                logging.info(f"Using similarity search")
-                result = self.similarity_search(
-                    collection_name=f"""{document_types}_{self.embed_model.split('/')[-1]}""",
-                    prompt=user_question,
-                    limit=topk
-                )
-            elif types == "expert":
-                logging.info(f"Using expert search")
-                result = self.similarity_search(
-                    collection_name=f"""{document_types}_{types}_{self.embed_model.split('/')[-1]}""",
-                    prompt=user_question,
-                    limit=topk
-                )
-            elif types == "keyword":
-                logging.info(f"Using keyword search")
-                keyword_list = ti.xcom_pull(task_ids='keyword_extraction_task', key='return_value')
-                logging.info(f"Keyword list: {keyword_list}")
-                
-                if isinstance(keyword_list, list):
-                    keyword_list = keyword_list
-                elif isinstance(keyword_list, str):
-                    try:
-                        keyword_list = ast.literal_eval(keyword_list)
-                        if not isinstance(keyword_list, list):
-                            keyword_list = [keyword_list]
-                    except:
-                        keyword_list = [keyword_list]
-                else:
-                    keyword_list = []
-                    
-                result = self.keyword_search(
-                    collection_name=f"""{document_types}_{self.embed_model.split('/')[-1]}""",
-                    prompt=user_question,
-                    keywords=keyword_list,
-                    limit=topk
+            else:
+                query_vector = self.ollama_embedding(
+                    prompt=user_question
                 )
+                result = self.search_plans(plan["collection_name"], [plan], query_vector)[0]
             
-            key_to_extract = "answer" if types == "expert" else "document"
-            for index in range(len(result)):
-                search_result.append(f"""{result[index].payload[key_to_extract]}""")
+            return self.finish_retrieval(plan, result, topk, mmr_lambda)
+        except Exception as e:
+            logging.error(f"Error during retrieval: {e}")
+            raise e
+
+
+class AsyncRetrieval(Retrieval):
+    _qdrant_client = None
+    _ollama_client = None
+    _ollama_transport = None
+    
+    def __init__(
+        self, 
+        embed_model: str = "imac/zpoint_large_embedding_zh"
+    ):
+        """
+        Initialize the AsyncRetrieval class.
+        
+        The Qdrant and Ollama clients are shared by every instance, so all
+        embedding models reuse the same HTTP connection pools. Request building,
+        type dispatch and result formatting are inherited from Retrieval; only the
+        methods doing I/O are awaited here.
+        
+        Args:
+            embed_model (str): The embedding model to be used. Defaults to "imac/zpoint_large_embedding_zh".
+        """
+        try:
+            self.embed_model = embed_model
+            self.qdrant_client = self.get_qdrant_client()
+            self.ollama_client = self.get_ollama_client()
+            self.embedding_batcher = EmbeddingBatcher(self.ollama_embed_batch)
+            self.bm25_index_dir = os.getenv("BM25_INDEX_DIR", "dags/data/bm25_index")
+            self.bm25_indexes = {}
+            self.ef_tuner = AdaptiveEf()
+        except Exception as e:
+            logging.error(f"Error initializing AsyncRetrieval class: {e}")
+            raise e
+    
+    @classmethod
+    def get_qdrant_client(cls) -> AsyncQdrantClient:
+        """
+        Get the shared async Qdrant client.
+        
+        Returns:
+            qdrant_client (AsyncQdrantClient): The async Qdrant client.
+        """
+        if AsyncRetrieval._qdrant_client is None:
+            AsyncRetrieval._qdrant_client = get_async_qdrant_client()
+            logging.info("Async Qdrant client created.")
+        return AsyncRetrieval._qdrant_client
+    
+    @classmethod
+    def get_ollama_client(cls) -> ollama.AsyncClient:
+        """
+        Get the shared async Ollama client.
+        
+        The connection pool is an httpx transport owned by this class, so it can be
+        closed through httpx's public API.
+        
+        Returns:
+            ollama_client (ollama.AsyncClient): The async Ollama client.
+        """
+        if AsyncRetrieval._ollama_client is None:
+            AsyncRetrieval._ollama_transport = httpx.AsyncHTTPTransport(limits=get_pool_limits())
+            AsyncRetrieval._ollama_client = ollama.AsyncClient(transport=AsyncRetrieval._ollama_transport)
+            logging.info("Async Ollama client created.")
+        return AsyncRetrieval._ollama_client
+    
+    @staticmethod
+    async def close_clients() -> None:
+        """
+        Close the shared async clients and their connection pools.
+        """
+        if AsyncRetrieval._qdrant_client is not None:
+            await AsyncRetrieval._qdrant_client.close()
+            forget_client(AsyncRetrieval._qdrant_client)
+            AsyncRetrieval._qdrant_client = None
+        if AsyncRetrieval._ollama_transport is not None:
+            await AsyncRetrieval._ollama_transport.aclose()
+            AsyncRetrieval._ollama_transport = None
+        AsyncRetrieval._ollama_client = None
+        logging.info("Async clients closed.")
+    
+    async def collection_exists(self, collection_name: str) -> bool:
+        """
+        Check if the collection exists in Qdrant.
+        
+        Args:
+            collection_name: Name of the collection to check
+        
+        Returns:
+            bool: True if collection exists, False otherwise
+        """
+        try:
+            if not await self.qdrant_client.collection_exists(collection_name):
+                logging.warning(f"Collection {collection_name} does not exist.")
+                return False
+            else:
+                logging.info(f"Collection {collection_name} exists.")
+                return True
+        except Exception as e:
+            logging.error(f"Error checking collection existence: {e}")
+            return False
+    
+    async def collection_checker(self) -> object:
+        """
+        List the existing collections once for a batch of searches.
+        
+        Returns:
+            collection_exists (callable): Maps a collection name to True if it exists.
+        """
+        collections_response = await self.qdrant_client.get_collections()
+        return {collection.name for collection in collections_response.collections}.__contains__
+    
+    async def ollama_embedding(self, prompt: str) -> list:
+        """
+        Generate embedding using ollama without blocking the event loop.
+        
+        Concurrent requests are micro-batched into one ollama embed call.
+        
+        Args:
+            prompt (str): Text prompt to generate embedding.
+        
+        Returns:
+            query_vector (list): Embedding vector generated by ollama.
+        """
+        try:
+            return await self.embedding_batcher.embed(prompt)
+        except Exception as e:
+            logging.error(f"Error generating embedding: {e}")
+            raise e
+    
+    async def ollama_embed_batch(self, prompts: list) -> list:
+        """
+        Generate embeddings for several texts with a single ollama call.
+        
+        Args:
+            prompts (list): Text prompts to generate embeddings.
+        
+        Returns:
+            query_vectors (list): Embedding vectors in the same order as the prompts.
+        """
+        response = await self.ollama_client.embed(
+            model=self.embed_model,
+            input=prompts,
+            options={"device": "cpu"},
+            keep_alive="0s",
+        )
+        return response["embeddings"]
+    
+    async def search(self, collection_name: str, types: str, prompt: str, keywords: list = None, limit: int = 5, with_payload: object = True, search_params: models.SearchParams = None, with_vectors: bool = False) -> list:
+        """
+        Embed a prompt and run one similarity, keyword or fused search; see Retrieval.search.
+        """
+        try:
+            plan = self.search_plan(types, collection_name, limit, prompt, keywords, with_payload, search_params, with_vectors=with_vectors)
+            query_vector = await self.ollama_embedding(
+                prompt=prompt
+            )
+            return (await self.search_plans(collection_name, [plan], query_vector))[0]
+        except Exception as e:
+            logging.error(f"Error during {types} search: {e}")
+            raise e
+    
+    async def search_plans(self, collection_name: str, plans: list, query_vector: list) -> list:
+        """
+        Run the plans of one collection in a single Qdrant round trip; see Retrieval.search_plans.
+        """
+        bm25_ids = [self.bm25_leg(plan) for plan in plans]
+        requests = [self.build_query_requests(plan, query_vector, ids) for plan, ids in zip(plans, bm25_ids)]
+        start_time = time.perf_counter()
+        responses = await self.qdrant_client.query_batch_points(
+            collection_name=collection_name,
+            requests=[request for plan_requests in requests for request in plan_requests]
+        )
+        for plan in plans:
+            self.record_search_latency(plan["tuning_key"], plan["search_params"], start_time, len(plans))
+        responses = iter(responses)
+        return [
+            self.fuse_legs(plan, [next(responses).points for _ in plan_requests], ids)
+            for plan, plan_requests, ids in zip(plans, requests, bm25_ids)
+        ]
+    
+    async def multi_search(self, user_question: str, searches: list, document_types: str = "squad") -> list:
+        """
+        Embed the user question once and run several searches through Qdrant's batch query API; see Retrieval.multi_search.
+        """
+        try:
+            logging.info(f"Running {len(searches)} searches for question: {user_question}")
+            plans = self.plan_searches(user_question, searches, document_types, await self.collection_checker())
+            search_results = self.run_bm25_plans(plans)
+            batches = self.group_plans(plans)
+            query_vector = await self.ollama_embedding(prompt=user_question) if batches else None
+            for collection_name, indexes in batches.items():
+                logging.info(f"Sending {len(indexes)} batched queries to {collection_name}")
+                results = await self.search_plans(collection_name, [plans[index] for index in indexes], query_vector)
+                for index, result in zip(indexes, results):
+                    search_results[index] = self.format_plan_results(plans[index], result)
+            
+            return search_results
+        except Exception as e:
+            logging.error(f"Error during multi search: {e}")
+            raise e
+    
+    async def multi_collection_retrieval(self, types: str = "similarity", document_types: list = None, topk: int = 10, structured: bool = False, payload_fields: list = None, **kwargs) -> list:
+        """
+        Run the same retrieval against several document collections concurrently and merge the hits.
+        
+        The collections share one query embedding through the embedding batcher, so total
+        latency is close to the slowest collection rather than the sum.
+        
+        Args:
+            types (str): The type of retrieval ("similarity", "expert", "keyword", "fused" or "bm25"). Defaults to "similarity".
+            document_types (list): The document types to search, e.g. ["squad", "pdf"].
+            topk (int): Number of merged results to return; each collection also returns up to topk. Defaults to 10.
+            structured (bool): Return id, merge score, raw score, source collection and payload for each hit. Defaults to False.
+            payload_fields (list): Extra payload fields returned in structured mode.
+            **kwargs: Additional arguments passed to retrieval, including ti.
+        
+        Returns:
+            search_result (list): The merged global top-k, each hit tagged with its source collection in structured mode.
+        """
+        try:
+            document_types = list(dict.fromkeys(document_types or ["squad"]))
+            logging.info(f"Fanning out {types} retrieval to {document_types}")
+            results = await asyncio.gather(*[
+                self.retrieval(types, document_type, topk, True, payload_fields, **kwargs)
+                for document_type in document_types
+            ])
+            collection_results = {
+                self.get_collection_name(types, document_type): result
+                for document_type, result in zip(document_types, results)
+            }
+            
+            return self.merge_collection_results(collection_results, types, topk, structured)
+        except Exception as e:
+            logging.error(f"Error during multi-collection retrieval: {e}")
+            raise e
+    
+    
+    async def retrieval(self, types: str = "similarity", document_types: str = "squad", topk: int = 10, structured: bool = False, payload_fields: list = None,
+                  hnsw_ef: int = None, exact: bool = False, oversampling: float = None, latency_budget_ms: float = None,
+                  mmr_lambda: float = None, mmr_fetch_k: int = None, **kwargs) -> list:
+        """
+        Retrieve relevant documents from Qdrant based on the user question; see Retrieval.retrieval.
+        """
+        try:
+            user_question, plan = self.plan_retrieval(
+                types, document_types, topk, structured, payload_fields, hnsw_ef, exact, oversampling, latency_budget_ms, mmr_lambda, mmr_fetch_k, kwargs['ti']
+            )
+            if types == "bm25":
+                result = self.bm25_plan_search(plan)
+            elif not await self.collection_exists(plan["collection_name"]):
+                logging.warning(f"Collection {plan['collection_name']} does not exist. Please check the collection name.")
+                return []
+            else:
+                query_vector = await self.ollama_embedding(
+                    prompt=user_question
+                )
+                result = (await self.search_plans(plan["collection_name"], [plan], query_vector))[0]
             
-            return search_result
+            return self.finish_retrieval(plan, result, topk, mmr_lambda)
         except Exception as e:
             logging.error(f"Error during retrieval: {e}")
             raise e
+
+
+class NumpyRetrieval(Retrieval):
+    def __init__(
+        self, 
+        embed_model: str = "imac/zpoint_large_embedding_zh"
+    ):
+        """
+        Initialize the NumpyRetrieval class.
+        
+        Searches exported NumPy vector indexes by exact brute force instead of a Qdrant
+        server, for small collections, benchmarks and as an exact-recall baseline for HNSW.
+        
+        Args:
+            embed_model (str): The embedding model to be used. Defaults to "imac/zpoint_large_embedding_zh".
+        """
+        try:
+            self.embed_model = embed_model
+            self.qdrant_client = None
+            self.numpy_index_dir = os.getenv("NUMPY_INDEX_DIR", "dags/data/numpy_index")
+            self.numpy_index_dtype = os.getenv("NUMPY_INDEX_DTYPE", "float32")
+            self.vector_indexes = {}
+            self.bm25_index_dir = os.getenv("BM25_INDEX_DIR", "dags/data/bm25_index")
+            self.bm25_indexes = {}
+            self.ef_tuner = AdaptiveEf()
+        except Exception as e:
+            logging.error(f"Error initializing NumpyRetrieval class: {e}")
+            raise e
+    
+    def get_vector_index(self, collection_name: str) -> NumpyVectorIndex:
+        """
+        Get the cached vector index of a collection.
+        
+        Args:
+            collection_name (str): Name of the collection.
+        
+        Returns:
+            vector_index (NumpyVectorIndex): The vector index.
+        """
+        if collection_name not in self.vector_indexes:
+            self.vector_indexes[collection_name] = NumpyVectorIndex(
+                index_dir=self.numpy_index_dir,
+                collection_name=collection_name,
+                dtype=self.numpy_index_dtype
+            )
+        return self.vector_indexes[collection_name]
+    
+    def collection_exists(self, collection_name: str) -> bool:
+        """
+        Check if the vector index of the collection exists.
+        
+        Args:
+            collection_name: Name of the collection to check
+        
+        Returns:
+            bool: True if the index exists, False otherwise
+        """
+        if not self.get_vector_index(collection_name).exists():
+            logging.warning(f"Vector index for {collection_name} does not exist in {self.numpy_index_dir}.")
+            return False
+        return True
+    
+    def vector_search(self, collection_name: str, query_vectors: list, limit: int = 5, keywords: list = None,
+                      with_payload: object = True, with_vectors: bool = False, point_ids: list = None) -> list:
+        """
+        Run a batch of exact cosine searches against the vector index of a collection.
+        
+        Args:
+            collection_name (str): Name of the collection.
+            query_vectors (list): List of query vectors.
+            limit (int): Number of results per query. Defaults to 5.
+            keywords (list): Only search documents whose text contains every keyword, like keyword_filter.
+            with_payload (object): True for the whole payload, or a list of payload fields. Defaults to True.
+            with_vectors (bool): Also return the stored vectors of the hits. Defaults to False.
+            point_ids (list): Only search these points, like a Qdrant has_id filter.
+        
+        Returns:
+            results (list): For each query, a list of scored points with non-negative scores.
+        """
+        vector_index = self.get_vector_index(collection_name)
+        if not vector_index.load():
+            return [[] for _ in query_vectors]
+        
+        mask = None
+        if keywords:
+            mask = vector_index.keyword_mask(keywords)
+        if point_ids is not None:
+            point_ids = {str(point_id) for point_id in point_ids}
+            id_mask = np.fromiter(
+                (str(document["id"]) in point_ids for document in vector_index.documents),
+                dtype=bool,
+                count=len(vector_index.documents)
+            )
+            mask = id_mask if mask is None else mask & id_mask
+        
+        results = []
+        for hits in vector_index.search(query_vectors, limit=limit, mask=mask):
+            points = []
+            for score, row in hits:
+                if score < 0:
+                    break
+                document = vector_index.documents[row]
+                points.append(models.ScoredPoint(
+                    id=document["id"],
+                    version=0,
+                    score=score,
+                    payload={
+                        key: value for key, value in document.items()
+                        if key != "id" and (with_payload is True or key in (with_payload or []))
+                    },
+                    vector=vector_index.vectors[row].astype(np.float32).tolist() if with_vectors else None,
+                ))
+            results.append(points)
+        return results
+    
+    
+    def batch_similarity_search(self, collection_name: str, query_vectors: list, limit: int = 5, with_payload: object = True) -> list:
+        """
+        Perform exact similarity search for many pre-computed query vectors with one matrix multiply.
+        
+        Args:
+            collection_name (str): Name of the collection.
+            query_vectors (list): List of query vectors.
+            limit (int): Number of results per query. Defaults to 5.
+            with_payload (object): Payload selector. Defaults to True.
+        
+        Returns:
+            results (list): List of search results for each query vector.
+        """
+        try:
+            return self.vector_search(collection_name, query_vectors, limit, None, with_payload)
+        except Exception as e:
+            logging.error(f"Error during batch similarity search: {e}")
+            raise e
+    
+    def collection_checker(self) -> object:
+        """
+        Check the vector index of each collection as it is searched.
+        
+        Returns:
+            collection_exists (callable): Maps a collection name to True if its index exists.
+        """
+        return self.collection_exists
+    
+    def search_plans(self, collection_name: str, plans: list, query_vector: list) -> list:
+        """
+        Run exact searches for several plans; search_params is ignored since brute force is always exact.
+        
+        Args:
+            collection_name (str): Name of the collection.
+            plans (list): Plans returned by search_plan.
+            query_vector (list): Embedding vector of the user question.
+        
+        Returns:
+            results (list): List of scored points for each plan.
+        """
+        results = []
+        for plan in plans:
+            bm25_ids = self.bm25_leg(plan)
+            keywords = plan["keyword_list"] if plan["types"] == "keyword" else None
+            legs = self.vector_search(collection_name, [query_vector], plan["limit"], keywords, plan["payload_fields"], plan["with_vectors"])
+            if bm25_ids:
+                legs += self.vector_search(collection_name, [query_vector], len(bm25_ids), None, plan["payload_fields"], plan["with_vectors"], bm25_ids)
+            results.append(self.fuse_legs(plan, legs, bm25_ids))
+        return results
+
+
+class AsyncNumpyRetrieval(NumpyRetrieval):
+    @staticmethod
+    async def close_clients() -> None:
+        """
+        Nothing to close; the brute-force backend holds no connections.
+        """
+    
+    async def multi_search(self, *args, **kwargs) -> list:
+        """
+        Run NumpyRetrieval.multi_search in a worker thread.
+        """
+        return await asyncio.to_thread(super().multi_search, *args, **kwargs)
+    
+    async def multi_collection_retrieval(self, *args, **kwargs) -> list:
+        """
+        Fan out to several collections concurrently, as AsyncRetrieval.multi_collection_retrieval does.
+        """
+        return await AsyncRetrieval.multi_collection_retrieval(self, *args, **kwargs)
+    
+    async def retrieval(self, *args, **kwargs) -> list:
+        """
+        Run NumpyRetrieval.retrieval in a worker thread.
+        """
+        return await asyncio.to_thread(super().retrieval, *args, **kwargs)
+
+
+def get_retrieval_class(backend: str = None, asynchronous: bool = False) -> type:
+    """
+    Get the retrieval class of the configured backend.
+    
+    Args:
+        backend (str): "qdrant" or "numpy". Defaults to env RETRIEVAL_BACKEND or "qdrant".
+        asynchronous (bool): Return the async variant. Defaults to False.
+    
+    Returns:
+        retrieval_class (type): The retrieval class.
+    """
+    backend = (backend or os.getenv("RETRIEVAL_BACKEND", "qdrant")).lower()
+    if backend == "numpy":
+        return AsyncNumpyRetrieval if asynchronous else NumpyRetrieval
+    if backend != "qdrant":
+        raise ValueError(f"Unknown retrieval backend: {backend}")
+    return AsyncRetrieval if asynchronous else Retrieval
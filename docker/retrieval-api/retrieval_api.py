@@ -1,10 +1,11 @@
 import os
 import logging
 import threading
-from typing import Optional
+from typing import List, Optional, Union
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from retrieval import Retrieval
+from retrieval import get_retrieval_class
+from single_flight import SingleFlight
 import uvicorn
 import time
 
@@ -18,11 +19,36 @@ INACTIVITY_TIMEOUT = 300
 
 class RetrievalRequest(BaseModel):
     types: str = "similarity"
-    document_types: str = "squad"
+    document_types: Union[str, List[str]] = "squad"
     topk: int = 10
     embed_model: str = "imac/zpoint_large_embedding_zh"
     user_question: str
     keyword_list: Optional[str] = None
+    structured: bool = False
+    payload_fields: Optional[List[str]] = None
+    hnsw_ef: Optional[int] = None
+    exact: bool = False
+    oversampling: Optional[float] = None
+    latency_budget_ms: Optional[float] = None
+    mmr_lambda: Optional[float] = None
+    mmr_fetch_k: Optional[int] = None
+
+class SearchSpec(BaseModel):
+    types: str = "similarity"
+    topk: int = 10
+    keyword_list: Optional[Union[List[str], str]] = None
+    structured: bool = False
+    payload_fields: Optional[List[str]] = None
+    hnsw_ef: Optional[int] = None
+    exact: bool = False
+    oversampling: Optional[float] = None
+    latency_budget_ms: Optional[float] = None
+
+class MultiRetrievalRequest(BaseModel):
+    document_types: str = "squad"
+    embed_model: str = "imac/zpoint_large_embedding_zh"
+    user_question: str
+    searches: List[SearchSpec]
 
 class MockTi:
     def __init__(self, user_question: str, keyword_list: list = None):
@@ -45,15 +71,18 @@ class MockTi:
                 return self.keyword_list
         return None
 
-# 初始化檢索對象
+# 初始化檢索對象，RETRIEVAL_BACKEND=numpy 時改用不需 Qdrant 的暴力搜尋
+retrieval_class = get_retrieval_class(asynchronous=True)
 retrieval_instances = {}
+# 合併相同且同時進行中的檢索請求
+single_flight = SingleFlight()
 
 def get_retrieval_instance(embed_model):
     """獲取或創建檢索實例"""
     global retrieval_instances
     if embed_model not in retrieval_instances:
         logger.info(f"Creating new retrieval instance for model: {embed_model}")
-        retrieval_instances[embed_model] = Retrieval(embed_model=embed_model)
+        retrieval_instances[embed_model] = retrieval_class(embed_model=embed_model)
     return retrieval_instances[embed_model]
 
 def update_last_used_time():
@@ -74,10 +103,10 @@ def inactivity_monitor():
 def root():
     """健康檢查接口"""
     update_last_used_time()
-    return {"status": "healthy", "service": "retrieval-api"}
+    return {"status": "healthy", "service": "retrieval-api", "single_flight": single_flight.stats()}
 
 @app.post("/retrieve")
-def retrieve(request: RetrievalRequest):
+async def retrieve(request: RetrievalRequest):
     """執行檢索任務的接口"""
     update_last_used_time()
     
@@ -91,12 +120,50 @@ def retrieve(request: RetrievalRequest):
             keyword_list=request.keyword_list
         )
         
+        # document_types 為列表時，同時檢索多個 collection 並合併結果
+        if isinstance(request.document_types, list):
+            document_types = request.document_types
+            retrieval_func = retrieval_obj.multi_collection_retrieval
+        else:
+            document_types = [request.document_types]
+            retrieval_func = retrieval_obj.retrieval
+        
+        # 相同的 (模型, collection, 類型, 問題, topk) 共用同一個進行中的檢索
+        flight_key = (
+            request.embed_model,
+            tuple(retrieval_obj.get_collection_name(request.types, document_type) for document_type in document_types),
+            isinstance(request.document_types, list),
+            request.types,
+            request.user_question,
+            request.topk,
+            request.keyword_list,
+            request.structured,
+            tuple(request.payload_fields or ()),
+            request.hnsw_ef,
+            request.exact,
+            request.oversampling,
+            request.latency_budget_ms,
+            request.mmr_lambda,
+            request.mmr_fetch_k,
+        )
+        
         # 執行檢索
-        result = retrieval_obj.retrieval(
-            types=request.types,
-            document_types=request.document_types,
-            topk=request.topk,
-            ti=mock_ti
+        result = await single_flight.do(
+            flight_key,
+            lambda: retrieval_func(
+                types=request.types,
+                document_types=request.document_types,
+                topk=request.topk,
+                structured=request.structured,
+                payload_fields=request.payload_fields,
+                hnsw_ef=request.hnsw_ef,
+                exact=request.exact,
+                oversampling=request.oversampling,
+                latency_budget_ms=request.latency_budget_ms,
+                mmr_lambda=request.mmr_lambda,
+                mmr_fetch_k=request.mmr_fetch_k,
+                ti=mock_ti
+            )
         )
         
         return {"status": "success", "result": result}
@@ -104,6 +171,35 @@ def retrieve(request: RetrievalRequest):
         logger.error(f"Error during retrieval: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/retrieve/multi")
+async def retrieve_multi(request: MultiRetrievalRequest):
+    """以單次嵌入執行多個檢索任務的接口"""
+    update_last_used_time()
+    
+    try:
+        logger.info(f"Multi retrieval object created with: {request}")
+        retrieval_obj = get_retrieval_instance(request.embed_model)
+        
+        searches = [search.dict() for search in request.searches]
+        flight_key = ("multi", request.embed_model, request.document_types, request.user_question, repr(searches))
+        search_results = await single_flight.do(
+            flight_key,
+            lambda: retrieval_obj.multi_search(
+                user_question=request.user_question,
+                searches=searches,
+                document_types=request.document_types
+            )
+        )
+        
+        result = [
+            {"types": search.types, "result": search_result}
+            for search, search_result in zip(request.searches, search_results)
+        ]
+        return {"status": "success", "result": result}
+    except Exception as e:
+        logger.error(f"Error during multi retrieval: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.on_event("startup")
 def startup_event():
     """啟動時的事件處理"""
@@ -111,5 +207,11 @@ def startup_event():
     monitor_thread = threading.Thread(target=inactivity_monitor, daemon=True)
     monitor_thread.start()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """關閉時釋放共用連線池"""
+    logger.info("Retrieval API shutting down...")
+    await retrieval_class.close_clients()
+
 if __name__ == "__main__":
     uvicorn.run("retrieval_api:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
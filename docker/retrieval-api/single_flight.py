@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Initialize the SingleFlight class.
+
+        Concurrent calls with the same key share one in-flight computation and all
+        receive its result (or its exception). The key is released as soon as the
+        computation finishes, so results are never cached beyond the burst.
+        """
+        self.in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: tuple, func) -> object:
+        """
+        Run func once per key among concurrent callers.
+
+        Args:
+            key (tuple): Hashable key identifying the computation.
+            func (callable): Zero-argument coroutine function producing the result.
+
+        Returns:
+            result (object): The result of the shared computation.
+        """
+        self.calls += 1
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logging.info(f"Coalescing request with an in-flight computation ({len(self.in_flight)} in flight)")
+        else:
+            task = asyncio.ensure_future(func())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        # shield keeps the shared task alive if one of the waiting clients disconnects
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            stats (dict): Total calls, coalesced calls and computations currently in flight.
+        """
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self.in_flight)}
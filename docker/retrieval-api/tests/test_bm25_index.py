@@ -0,0 +1,61 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from bm25_index import BM25Index
+
+
+def documents(file_name: str, texts: list) -> list:
+    return [{"id": f"{file_name}-{index}", "document": text, "file_name": file_name} for index, text in enumerate(texts)]
+
+
+def test_reindexing_a_file_replaces_its_documents(tmp_path):
+    index = BM25Index(index_dir=str(tmp_path), collection_name="squad")
+    index.add_documents(documents("a.json", ["normans in france", "apple pie recipe"]))
+    index.add_documents(documents("b.json", ["carrot cake"]))
+    stats = index.read_manifest()
+
+    index.add_documents(documents("a.json", ["normans in france", "apple pie recipe"]))
+
+    manifest = index.read_manifest()
+    assert (manifest["num_docs"], manifest["total_length"]) == (stats["num_docs"], stats["total_length"])
+    hits = index.search("normans", limit=5)
+    assert [document["id"] for _, document in hits] == ["a.json-0"]
+
+
+def test_scores_after_reindexing_match_a_fresh_index(tmp_path):
+    reindexed = BM25Index(index_dir=str(tmp_path / "reindexed"), collection_name="squad")
+    fresh = BM25Index(index_dir=str(tmp_path / "fresh"), collection_name="squad")
+    for index in (reindexed, fresh):
+        index.add_documents(documents("a.json", ["normans in france", "normans in england"]))
+        index.add_documents(documents("b.json", ["france and spain"]))
+    reindexed.add_documents(documents("a.json", ["normans in france", "normans in england"]))
+
+    def scores(index: BM25Index) -> dict:
+        return {document["id"]: score for score, document in index.search("normans france", limit=5)}
+
+    assert scores(reindexed) == scores(fresh)
+
+
+def test_merge_drops_deleted_documents(tmp_path):
+    index = BM25Index(index_dir=str(tmp_path), collection_name="squad", max_segments=2)
+    for _ in range(3):
+        index.add_documents(documents("a.json", ["normans in france"]))
+
+    manifest = index.read_manifest()
+    assert len(manifest["segments"]) == 1 and manifest["deleted"] == {}
+    with open(tmp_path / "squad" / manifest["segments"][0] / "documents.json", "r", encoding="utf-8") as f:
+        assert [document["id"] for document in json.load(f)] == ["a.json-0"]
+    assert manifest["num_docs"] == 1
+
+
+def test_concurrent_writers_keep_every_update(tmp_path):
+    def add(file_number: int) -> int:
+        index = BM25Index(index_dir=str(tmp_path), collection_name="squad", max_segments=4)
+        return index.add_documents(documents(f"{file_number}.json", [f"document {file_number}"]))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(add, range(16)))
+
+    index = BM25Index(index_dir=str(tmp_path), collection_name="squad")
+    assert index.read_manifest()["num_docs"] == 16
+    assert len(index.search("document", limit=20)) == 16
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+
+import retrieval
+from embedding_batcher import EmbeddingBatcher
+
+
+EMBED_MODEL = "imac/zpoint_large_embedding_zh"
+VECTORS = {
+    "apple pie recipe": [1.0, 0.0, 0.0],
+    "banana bread": [0.8, 0.6, 0.0],
+    "carrot cake": [0.6, 0.8, 0.0],
+}
+# the same document is indexed in both collections, as happens when a file is embedded twice
+COLLECTIONS = {
+    "squad": ["apple pie recipe", "banana bread"],
+    "pdf": ["apple pie recipe", "carrot cake"],
+}
+
+
+class FakeTi:
+    def xcom_pull(self, task_ids, key=None):
+        return "how do I bake an apple pie"
+
+
+def embed(prompt: str) -> list:
+    return [1.0, 0.1, 0.0]
+
+
+def points(documents: list) -> list:
+    return [
+        models.PointStruct(id=index, vector=VECTORS[document], payload={"document": document, "file_name": "recipes.json"})
+        for index, document in enumerate(documents, start=4)
+    ]
+
+
+@pytest.fixture
+def sync_retrieval(monkeypatch, tmp_path):
+    client = QdrantClient(":memory:")
+    for document_type, documents in COLLECTIONS.items():
+        collection_name = f"{document_type}_{EMBED_MODEL.split('/')[-1]}"
+        client.create_collection(collection_name, vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE))
+        client.upsert(collection_name, points(documents))
+    monkeypatch.setenv("BM25_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(retrieval, "get_qdrant_client", lambda: client)
+    sync_retrieval = retrieval.Retrieval(embed_model=EMBED_MODEL)
+    sync_retrieval.ollama_embedding = embed
+    return sync_retrieval
+
+
+def test_document_in_two_collections_is_merged_once(sync_retrieval):
+    result = sync_retrieval.multi_collection_retrieval("similarity", ["squad", "pdf"], topk=3, ti=FakeTi())
+
+    assert result == ["apple pie recipe", "banana bread", "carrot cake"]
+
+
+def test_structured_merge_keeps_the_best_copy_and_its_collection(sync_retrieval):
+    result = sync_retrieval.multi_collection_retrieval("similarity", ["squad", "pdf"], topk=3, structured=True, ti=FakeTi())
+
+    assert [hit["payload"]["document"] for hit in result] == ["apple pie recipe", "banana bread", "carrot cake"]
+    assert result[0]["collection"] in {"squad_zpoint_large_embedding_zh", "pdf_zpoint_large_embedding_zh"}
+    assert result[0]["score"] == max(hit["score"] for hit in result)
+
+
+def test_async_document_in_two_collections_is_merged_once(monkeypatch, tmp_path):
+    async def run() -> list:
+        client = AsyncQdrantClient(":memory:")
+        for document_type, documents in COLLECTIONS.items():
+            collection_name = f"{document_type}_{EMBED_MODEL.split('/')[-1]}"
+            await client.create_collection(collection_name, vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE))
+            await client.upsert(collection_name, points(documents))
+        monkeypatch.setattr(retrieval.AsyncRetrieval, "_qdrant_client", client)
+        async_retrieval = retrieval.AsyncRetrieval(embed_model=EMBED_MODEL)
+
+        async def embed_batch(prompts: list) -> list:
+            return [embed(prompt) for prompt in prompts]
+
+        async_retrieval.embedding_batcher = EmbeddingBatcher(embed_batch)
+        return await async_retrieval.multi_collection_retrieval("similarity", ["squad", "pdf"], topk=3, structured=True, ti=FakeTi())
+
+    monkeypatch.setenv("BM25_INDEX_DIR", str(tmp_path))
+    result = asyncio.run(run())
+
+    assert [hit["payload"]["document"] for hit in result] == ["apple pie recipe", "banana bread", "carrot cake"]
+    assert [hit["id"] for hit in result].count("4") == 1
@@ -0,0 +1,28 @@
+import numpy as np
+
+from numpy_index import NumpyVectorIndex
+
+
+def build_index(tmp_path, texts: list) -> NumpyVectorIndex:
+    index = NumpyVectorIndex(index_dir=str(tmp_path), collection_name="docs")
+    vectors = np.eye(len(texts), dtype=np.float32).tolist()
+    index.write(vectors, [{"id": str(i), "document": text} for i, text in enumerate(texts)])
+    assert index.load()
+    return index
+
+
+def test_keyword_mask_is_case_insensitive_and_tokenized(tmp_path):
+    index = build_index(tmp_path, ["Kubernetes runs Airflow", "kubernetesish pods", "AIRFLOW on kubernetes"])
+
+    assert index.keyword_mask(["kubernetes"]).tolist() == [True, False, True]
+    assert index.keyword_mask(["Airflow", "KUBERNETES"]).tolist() == [True, False, True]
+    assert index.keyword_mask(["runs airflow"]).tolist() == [True, False, False]
+
+
+def test_keyword_mask_follows_a_rebuilt_index(tmp_path):
+    index = build_index(tmp_path, ["alpha", "beta"])
+    assert index.keyword_mask(["beta"]).tolist() == [False, True]
+
+    rebuilt = build_index(tmp_path, ["beta", "gamma", "beta gamma"])
+    assert index.load()
+    assert index.keyword_mask(["beta"]).tolist() == rebuilt.keyword_mask(["beta"]).tolist() == [True, False, True]
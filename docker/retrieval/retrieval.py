@@ -1,8 +1,8 @@
-import os
 import ast
 import ollama
 import logging
-from qdrant_client import QdrantClient, models
+from qdrant_client import models
+from qdrant_factory import get_qdrant_client
 
 
 class Retrieval:
@@ -19,7 +19,7 @@ class Retrieval:
         """
         try:
             self.embed_model = embed_model
-            self.qdrant_client = QdrantClient(url=os.getenv("QDRANT_URL"))
+            self.qdrant_client = get_qdrant_client()
         except Exception as e:
             logging.error(f"Error initializing Retrieval class: {e}")
             raise e
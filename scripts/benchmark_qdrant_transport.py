@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dags"))
+from qdrant_client import models
+from utils.qdrant_factory import get_qdrant_client
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('qdrant-transport-benchmark')
+
+
+class TransportBenchmark:
+    def __init__(self, url: str, vector_size: int = 1024, num_points: int = 5000,
+                 batch_size: int = 256, num_queries: int = 200, topk: int = 10, seed: int = 42):
+        """初始化 Qdrant 傳輸協定基準測試"""
+        self.url = url
+        self.vector_size = vector_size
+        self.num_points = num_points
+        self.batch_size = batch_size
+        self.num_queries = num_queries
+        self.topk = topk
+        self.random = random.Random(seed)
+        self.vectors = [self._random_vector() for _ in range(num_points)]
+        self.queries = [self._random_vector() for _ in range(num_queries)]
+
+    def _random_vector(self) -> list:
+        """產生隨機向量"""
+        return [self.random.uniform(-1.0, 1.0) for _ in range(self.vector_size)]
+
+    def run_transport(self, prefer_grpc: bool) -> dict:
+        """以指定的傳輸協定執行 upsert 與 search 測試"""
+        transport = "grpc" if prefer_grpc else "rest"
+        collection_name = f"benchmark_transport_{transport}"
+        client = get_qdrant_client(url=self.url, prefer_grpc=prefer_grpc)
+
+        if client.collection_exists(collection_name):
+            client.delete_collection(collection_name)
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=self.vector_size, distance=models.Distance.COSINE),
+        )
+
+        try:
+            logger.info(f"[{transport}] upserting {self.num_points} points in batches of {self.batch_size}")
+            start_time = time.perf_counter()
+            for offset in range(0, self.num_points, self.batch_size):
+                client.upsert(
+                    collection_name=collection_name,
+                    points=[
+                        models.PointStruct(id=point_id, vector=self.vectors[point_id], payload={"document": f"document {point_id}"})
+                        for point_id in range(offset, min(offset + self.batch_size, self.num_points))
+                    ],
+                    wait=True,
+                )
+            upsert_seconds = time.perf_counter() - start_time
+
+            logger.info(f"[{transport}] running {self.num_queries} searches")
+            start_time = time.perf_counter()
+            for query_vector in self.queries:
+                client.query_points(
+                    collection_name=collection_name,
+                    query=query_vector,
+                    limit=self.topk,
+                    with_payload=True,
+                )
+            search_seconds = time.perf_counter() - start_time
+        finally:
+            client.delete_collection(collection_name)
+
+        result = {
+            "transport": transport,
+            "upsert_seconds": round(upsert_seconds, 4),
+            "upsert_points_per_second": round(self.num_points / upsert_seconds, 2),
+            "search_seconds": round(search_seconds, 4),
+            "search_queries_per_second": round(self.num_queries / search_seconds, 2),
+        }
+        logger.info(f"[{transport}] result: {result}")
+        return result
+
+    def run(self) -> dict:
+        """依序測試 REST 與 gRPC 並彙整結果"""
+        results = [self.run_transport(prefer_grpc=False), self.run_transport(prefer_grpc=True)]
+        rest_result, grpc_result = results
+        return {
+            "test_time": datetime.now().isoformat(),
+            "url": self.url,
+            "vector_size": self.vector_size,
+            "num_points": self.num_points,
+            "batch_size": self.batch_size,
+            "num_queries": self.num_queries,
+            "results": results,
+            "grpc_upsert_speedup": round(grpc_result["upsert_points_per_second"] / rest_result["upsert_points_per_second"], 2),
+            "grpc_search_speedup": round(grpc_result["search_queries_per_second"] / rest_result["search_queries_per_second"], 2),
+        }
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description='比較 Qdrant REST 與 gRPC 的 upsert 與 search 吞吐量')
+    parser.add_argument('--qdrant-url', default=os.getenv("QDRANT_URL", "http://127.0.0.1:6333"), help='Qdrant URL')
+    parser.add_argument('--vector-size', type=int, default=1024, help='向量維度')
+    parser.add_argument('--num-points', type=int, default=5000, help='寫入的點數量')
+    parser.add_argument('--batch-size', type=int, default=256, help='每次 upsert 的點數量')
+    parser.add_argument('--num-queries', type=int, default=200, help='搜尋次數')
+    parser.add_argument('--topk', type=int, default=10, help='每次搜尋回傳的結果數')
+    parser.add_argument('--output', help='結果 JSON 檔案路徑')
+
+    args = parser.parse_args()
+
+    benchmark = TransportBenchmark(
+        url=args.qdrant_url,
+        vector_size=args.vector_size,
+        num_points=args.num_points,
+        batch_size=args.batch_size,
+        num_queries=args.num_queries,
+        topk=args.topk,
+    )
+    summary = benchmark.run()
+    print(json.dumps(summary, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"已保存結果到: {args.output}")
+
+if __name__ == "__main__":
+    main()
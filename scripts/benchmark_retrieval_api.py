@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import zlib
+import asyncio
+import logging
+import argparse
+import shutil
+import tempfile
+from datetime import datetime
+import numpy as np
+
+RETRIEVAL_API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker", "retrieval-api")
+DEFAULT_QA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dags", "data", "qa_pairs.json")
+RETRIEVAL_TYPES = ("similarity", "expert", "keyword", "fused", "bm25")
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('retrieval-api-benchmark')
+
+
+class FakeEmbedder:
+    def __init__(self, vector_size: int = 1024, latency_ms: float = 0.0):
+        """以文字的 CRC32 為種子產生固定向量的假嵌入模型"""
+        self.vector_size = vector_size
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def embed(self, text: str) -> list:
+        """產生單一文字的向量"""
+        rng = np.random.default_rng(zlib.crc32(str(text).encode("utf-8")))
+        return rng.standard_normal(self.vector_size, dtype=np.float32).tolist()
+
+    async def embed_batch(self, prompts: list) -> list:
+        """取代 AsyncRetrieval.ollama_embed_batch，模擬一次批次嵌入呼叫"""
+        self.calls += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return [self.embed(prompt) for prompt in prompts]
+
+
+class RetrievalBenchmark:
+    def __init__(self, qa_path: str, num_documents: int = 5000, num_queries: int = 500, concurrency: int = 16,
+                 topk: int = 10, vector_size: int = 1024, embed_latency_ms: float = 0.0,
+                 backend: str = "qdrant", types: tuple = RETRIEVAL_TYPES,
+                 embed_model: str = "imac/zpoint_large_embedding_zh", document_types: str = "squad"):
+        """初始化檢索 API 基準測試"""
+        self.num_documents = num_documents
+        self.num_queries = num_queries
+        self.concurrency = concurrency
+        self.topk = topk
+        self.vector_size = vector_size
+        self.backend = backend
+        self.types = types
+        self.embed_model = embed_model
+        self.document_types = document_types
+        self.embedder = FakeEmbedder(vector_size=vector_size, latency_ms=embed_latency_ms)
+        self.work_dir = tempfile.mkdtemp(prefix="retrieval_benchmark_")
+
+        with open(qa_path, 'r', encoding='utf-8') as f:
+            self.qa_pairs = list(json.load(f).items())
+        logger.info(f"已讀取 {len(self.qa_pairs)} 組問答: {qa_path}")
+
+        # retrieval-api 在匯入時讀取環境變數，必須先設定
+        os.environ["RETRIEVAL_BACKEND"] = backend
+        os.environ["BM25_INDEX_DIR"] = os.path.join(self.work_dir, "bm25_index")
+        os.environ["NUMPY_INDEX_DIR"] = os.path.join(self.work_dir, "numpy_index")
+        sys.path.insert(0, RETRIEVAL_API_DIR)
+
+    def build_documents(self) -> tuple:
+        """以問答資料產生指定數量的文件，數量不足時循環使用"""
+        documents = []
+        expert_documents = []
+        for index in range(self.num_documents):
+            question, answer = self.qa_pairs[index % len(self.qa_pairs)]
+            documents.append({"id": index, "document": f"{question} {answer}", "file_name": "qa_pairs.json"})
+            expert_documents.append({"id": index, "question": question, "answer": answer})
+        return documents, expert_documents
+
+    async def load_collections(self) -> None:
+        """建立 Qdrant in-memory collection、NumPy 索引與 BM25 索引"""
+        from qdrant_client import AsyncQdrantClient, models
+        from retrieval import AsyncRetrieval, NumpyRetrieval
+        from bm25_index import BM25Index
+        from numpy_index import NumpyVectorIndex
+
+        embed_model_name = self.embed_model.split('/')[-1]
+        collection_name = f"{self.document_types}_{embed_model_name}"
+        expert_collection_name = f"{self.document_types}_expert_{embed_model_name}"
+        documents, expert_documents = self.build_documents()
+        vectors = [self.embedder.embed(document["document"]) for document in documents]
+        expert_vectors = [self.embedder.embed(document["question"]) for document in expert_documents]
+
+        # 以假嵌入模型取代 Ollama，並讓共用的 Qdrant client 指向 in-memory 模式
+        AsyncRetrieval.ollama_embed_batch = self.embedder.embed_batch
+        NumpyRetrieval.ollama_embedding = lambda _retrieval, prompt: self.embedder.embed(prompt)
+        AsyncRetrieval._qdrant_client = AsyncQdrantClient(location=":memory:")
+
+        if self.backend == "numpy":
+            NumpyVectorIndex(os.environ["NUMPY_INDEX_DIR"], collection_name).write(
+                vectors, [{**document, "id": str(document["id"])} for document in documents])
+            NumpyVectorIndex(os.environ["NUMPY_INDEX_DIR"], expert_collection_name).write(
+                expert_vectors, [{**document, "id": str(document["id"])} for document in expert_documents])
+        else:
+            client = AsyncRetrieval._qdrant_client
+            for name, points in ((collection_name, zip(vectors, documents)), (expert_collection_name, zip(expert_vectors, expert_documents))):
+                await client.create_collection(
+                    collection_name=name,
+                    vectors_config=models.VectorParams(size=self.vector_size, distance=models.Distance.COSINE),
+                )
+                await client.upsert(
+                    collection_name=name,
+                    points=[
+                        models.PointStruct(id=document["id"], vector=vector, payload={k: v for k, v in document.items() if k != "id"})
+                        for vector, document in points
+                    ],
+                )
+
+        BM25Index(os.environ["BM25_INDEX_DIR"], collection_name).add_documents(
+            [{**document, "id": str(document["id"])} for document in documents])
+        logger.info(f"已建立 {self.backend} 後端的 {self.num_documents} 筆文件")
+
+    def build_payloads(self, types: str) -> list:
+        """以問答資料的問題產生請求內容，關鍵字取問題中最長的三個詞"""
+        from bm25_index import tokenize
+
+        payloads = []
+        for index in range(self.num_queries):
+            question, _ = self.qa_pairs[index % len(self.qa_pairs)]
+            keywords = sorted(set(tokenize(question)), key=len, reverse=True)[:3]
+            payloads.append({
+                "types": types,
+                "document_types": self.document_types,
+                "topk": self.topk,
+                "embed_model": self.embed_model,
+                "user_question": question,
+                "keyword_list": str(keywords),
+            })
+        return payloads
+
+    async def run_type(self, client: object, types: str) -> dict:
+        """以指定並發數重播問題並統計延遲"""
+        queue = asyncio.Queue()
+        for payload in self.build_payloads(types):
+            queue.put_nowait(payload)
+        latencies = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                payload = queue.get_nowait()
+                start_time = time.perf_counter()
+                response = await client.post("/retrieve", json=payload)
+                latencies.append((time.perf_counter() - start_time) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        embed_calls = self.embedder.calls
+        start_time = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(self.concurrency)])
+        elapsed = time.perf_counter() - start_time
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        result = {
+            "types": types,
+            "requests": len(latencies),
+            "errors": errors,
+            "qps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(np.mean(latencies)), 3),
+            "embed_calls": self.embedder.calls - embed_calls,
+        }
+        logger.info(f"[{types}] result: {result}")
+        return result
+
+    async def run(self) -> dict:
+        """建立資料後依序測試各檢索類型並彙整結果"""
+        import httpx
+
+        try:
+            await self.load_collections()
+            import retrieval_api
+
+            # ASGITransport 直接呼叫 FastAPI app，不觸發 startup 事件，也不需開啟連接埠
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=retrieval_api.app), base_url="http://retrieval-api", timeout=300) as client:
+                # 暖機一次，避免首次建立實例與載入索引的時間計入結果
+                for types in self.types:
+                    await client.post("/retrieve", json=self.build_payloads(types)[0])
+                results = [await self.run_type(client, types) for types in self.types]
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+        return {
+            "test_time": datetime.now().isoformat(),
+            "backend": self.backend,
+            "num_documents": self.num_documents,
+            "num_queries": self.num_queries,
+            "concurrency": self.concurrency,
+            "topk": self.topk,
+            "vector_size": self.vector_size,
+            "embed_latency_ms": self.embedder.latency_ms,
+            "results": results,
+        }
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description='以 in-memory Qdrant 與假嵌入模型測量 retrieval-api 的延遲與吞吐量')
+    parser.add_argument('--qa-path', default=DEFAULT_QA_PATH, help='問答資料 JSON 路徑')
+    parser.add_argument('--num-documents', type=int, default=5000, help='collection 中的文件數量')
+    parser.add_argument('--num-queries', type=int, default=500, help='每種檢索類型重播的問題數量')
+    parser.add_argument('--concurrency', type=int, default=16, help='同時送出的請求數')
+    parser.add_argument('--topk', type=int, default=10, help='每次檢索回傳的結果數')
+    parser.add_argument('--vector-size', type=int, default=1024, help='向量維度')
+    parser.add_argument('--embed-latency-ms', type=float, default=0.0, help='模擬每次嵌入呼叫的延遲 (毫秒)')
+    parser.add_argument('--backend', default="qdrant", choices=["qdrant", "numpy"], help='檢索後端')
+    parser.add_argument('--types', default=",".join(RETRIEVAL_TYPES), help='以逗號分隔的檢索類型')
+    parser.add_argument('--output', help='結果 JSON 檔案路徑')
+
+    args = parser.parse_args()
+
+    benchmark = RetrievalBenchmark(
+        qa_path=args.qa_path,
+        num_documents=args.num_documents,
+        num_queries=args.num_queries,
+        concurrency=args.concurrency,
+        topk=args.topk,
+        vector_size=args.vector_size,
+        embed_latency_ms=args.embed_latency_ms,
+        backend=args.backend,
+        types=tuple(types.strip() for types in args.types.split(",") if types.strip()),
+    )
+    summary = asyncio.run(benchmark.run())
+    print(json.dumps(summary, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"已保存結果到: {args.output}")
+
+if __name__ == "__main__":
+    main()